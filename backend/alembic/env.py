@@ -0,0 +1,69 @@
+"""
+Entorno de Alembic
+
+El esquema base lo crea `init_db()` (create_all); las migraciones cubren los
+cambios posteriores sobre bases de datos existentes.
+"""
+from logging.config import fileConfig
+
+from alembic import context
+from sqlalchemy import engine_from_config, pool
+
+from app.config import settings
+from app.database import Base
+from app.models import models  # noqa: F401  (registra las tablas en Base.metadata)
+from app.search import SEARCH_TABLE
+
+config = context.config
+config.set_main_option("sqlalchemy.url", settings.DATABASE_URL.replace("%", "%%"))
+
+if config.config_file_name is not None:
+    fileConfig(config.config_file_name)
+
+target_metadata = Base.metadata
+
+
+def include_object(object, name, type_, reflected, compare_to):
+    """El índice de búsqueda se gestiona con DDL propio (search.py)"""
+    if type_ == "table" and name is not None and name.startswith(SEARCH_TABLE):
+        return False
+    return True
+
+
+def run_migrations_offline() -> None:
+    """Genera el SQL sin conectarse a la base de datos"""
+    context.configure(
+        url=config.get_main_option("sqlalchemy.url"),
+        target_metadata=target_metadata,
+        include_object=include_object,
+        literal_binds=True,
+        dialect_opts={"paramstyle": "named"},
+    )
+
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+def run_migrations_online() -> None:
+    """Aplica las migraciones sobre la base de datos"""
+    connectable = engine_from_config(
+        config.get_section(config.config_ini_section, {}),
+        prefix="sqlalchemy.",
+        poolclass=pool.NullPool,
+    )
+
+    with connectable.connect() as connection:
+        context.configure(
+            connection=connection,
+            target_metadata=target_metadata,
+            include_object=include_object,
+        )
+
+        with context.begin_transaction():
+            context.run_migrations()
+
+
+if context.is_offline_mode():
+    run_migrations_offline()
+else:
+    run_migrations_online()
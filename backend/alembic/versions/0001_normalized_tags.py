@@ -0,0 +1,126 @@
+"""Etiquetas normalizadas: tablas tags/task_tags y migración de Task.tags
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-18
+
+"""
+from alembic import op
+import sqlalchemy as sa
+import json
+
+# revision identifiers, used by Alembic.
+revision = '0001'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+BATCH_SIZE = 1000
+TAG_MAX_LENGTH = 50
+
+tasks = sa.table(
+    'tasks',
+    sa.column('id', sa.Integer),
+    sa.column('tags', sa.String),
+)
+tags = sa.table(
+    'tags',
+    sa.column('id', sa.Integer),
+    sa.column('name', sa.String),
+)
+task_tags = sa.table(
+    'task_tags',
+    sa.column('task_id', sa.Integer),
+    sa.column('tag_id', sa.Integer),
+)
+
+
+def _parse_tags(raw):
+    """Copia congelada de app.tags.parse_tags"""
+    if not raw:
+        return []
+    try:
+        values = json.loads(raw)
+    except ValueError:
+        values = raw.split(",")
+    if isinstance(values, str):
+        values = [values]
+    if not isinstance(values, list):
+        return []
+    names = []
+    for value in values:
+        if not isinstance(value, (str, int, float)):
+            continue
+        name = str(value).strip().lower()[:TAG_MAX_LENGTH]
+        if name:
+            names.append(name)
+    return list(dict.fromkeys(names))
+
+
+def _create_tables() -> None:
+    existing = set(sa.inspect(op.get_bind()).get_table_names())
+
+    if 'tags' not in existing:
+        op.create_table(
+            'tags',
+            sa.Column('id', sa.Integer(), primary_key=True),
+            sa.Column('name', sa.String(length=50), nullable=False, unique=True),
+            sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+        )
+
+    if 'task_tags' not in existing:
+        op.create_table(
+            'task_tags',
+            sa.Column('task_id', sa.Integer(), sa.ForeignKey('tasks.id', ondelete='CASCADE'), primary_key=True),
+            sa.Column('tag_id', sa.Integer(), sa.ForeignKey('tags.id', ondelete='CASCADE'), primary_key=True),
+        )
+        op.create_index('idx_task_tag_tag', 'task_tags', ['tag_id', 'task_id'])
+
+
+def _backfill() -> None:
+    """Recorre tasks por ID en lotes e inserta sus etiquetas normalizadas"""
+    connection = op.get_bind()
+    tag_ids = dict(connection.execute(sa.select(tags.c.name, tags.c.id)).all())
+    last_id = 0
+
+    while True:
+        rows = connection.execute(
+            sa.select(tasks.c.id, tasks.c.tags)
+            .where(tasks.c.id > last_id, tasks.c.tags.isnot(None))
+            .order_by(tasks.c.id)
+            .limit(BATCH_SIZE)
+        ).all()
+        if not rows:
+            break
+        last_id = rows[-1][0]
+
+        parsed = {task_id: _parse_tags(raw) for task_id, raw in rows}
+        missing = list(dict.fromkeys(
+            name for names in parsed.values() for name in names if name not in tag_ids
+        ))
+        if missing:
+            connection.execute(tags.insert(), [{'name': name} for name in missing])
+            tag_ids.update(connection.execute(
+                sa.select(tags.c.name, tags.c.id).where(tags.c.name.in_(missing))
+            ).all())
+
+        connection.execute(task_tags.delete().where(task_tags.c.task_id.in_(list(parsed))))
+        links = [
+            {'task_id': task_id, 'tag_id': tag_ids[name]}
+            for task_id, names in parsed.items()
+            for name in names
+        ]
+        if links:
+            connection.execute(task_tags.insert(), links)
+
+
+def upgrade() -> None:
+    _create_tables()
+    _backfill()
+
+
+def downgrade() -> None:
+    # Task.tags sigue siendo la fuente: basta con eliminar las tablas
+    op.drop_index('idx_task_tag_tag', table_name='task_tags')
+    op.drop_table('task_tags')
+    op.drop_table('tags')
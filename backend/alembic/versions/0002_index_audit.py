@@ -0,0 +1,81 @@
+"""Auditoría de índices: elimina duplicados y añade compuestos para get_tasks
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-18
+
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = '0002'
+down_revision = '0001'
+branch_labels = None
+depends_on = None
+
+# Índices redundantes (PK ya indexada, duplicados de unique=True/index=True,
+# prefijos de compuestos) o sin consultas que los usen: (nombre, tabla, columnas)
+DROPPED = [
+    ('ix_users_id', 'users', ['id']),
+    ('idx_user_email', 'users', ['email']),
+    ('idx_user_username', 'users', ['username']),
+    ('idx_user_active', 'users', ['is_active']),
+    ('ix_projects_id', 'projects', ['id']),
+    ('idx_project_slug', 'projects', ['slug']),
+    ('idx_project_owner', 'projects', ['owner_id']),
+    ('idx_project_active', 'projects', ['is_active']),
+    ('ix_tasks_id', 'tasks', ['id']),
+    ('ix_tasks_status', 'tasks', ['status']),
+    ('ix_tasks_priority', 'tasks', ['priority']),
+    ('idx_task_status', 'tasks', ['status']),
+    ('idx_task_priority', 'tasks', ['priority']),
+    ('idx_task_user', 'tasks', ['user_id']),
+    ('idx_task_project', 'tasks', ['project_id']),
+    ('idx_task_due_date', 'tasks', ['due_date']),
+    ('ix_task_assignments_id', 'task_assignments', ['id']),
+    ('idx_assignment_task', 'task_assignments', ['task_id']),
+    ('ix_comments_id', 'comments', ['id']),
+    ('idx_comment_task', 'comments', ['task_id']),
+    ('idx_comment_created', 'comments', ['created_at']),
+]
+
+# Compuestos de keyset pagination ya declarados en los modelos antes de
+# existir migraciones: se garantizan aquí para bases de datos antiguas
+ENSURED = [
+    ('idx_user_created', 'users', ['created_at', 'id']),
+    ('idx_project_owner_created', 'projects', ['owner_id', 'created_at', 'id']),
+    ('idx_task_created', 'tasks', ['created_at', 'id']),
+    ('idx_task_user_created', 'tasks', ['user_id', 'created_at', 'id']),
+    ('idx_comment_task_created', 'comments', ['task_id', 'created_at', 'id']),
+]
+
+CREATED = [
+    ('idx_task_user_status_created', 'tasks', ['user_id', 'status', 'created_at', 'id']),
+    ('idx_task_project_status', 'tasks', ['project_id', 'status']),
+    ('idx_task_parent', 'tasks', ['parent_task_id']),
+]
+
+
+def _create(indexes) -> None:
+    # En PostgreSQL se crean con CONCURRENTLY para no bloquear escrituras en
+    # tablas grandes; requiere ejecutarse fuera de la transacción
+    if op.get_bind().dialect.name == 'postgresql':
+        with op.get_context().autocommit_block():
+            for name, table, columns in indexes:
+                op.create_index(name, table, columns, postgresql_concurrently=True, if_not_exists=True)
+    else:
+        for name, table, columns in indexes:
+            op.create_index(name, table, columns, if_not_exists=True)
+
+
+def upgrade() -> None:
+    # Crear antes de borrar: las consultas nunca se quedan sin índice
+    _create(ENSURED + CREATED)
+    for name, table, _ in DROPPED:
+        op.drop_index(name, table_name=table, if_exists=True)
+
+
+def downgrade() -> None:
+    _create(DROPPED)
+    for name, table, _ in CREATED:
+        op.drop_index(name, table_name=table, if_exists=True)
@@ -0,0 +1,69 @@
+"""Almacenamiento frío de tareas: archived_tasks y archived_task_assignments
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-18
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = '0003'
+down_revision = '0002'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # init_db() (create_all) puede haberlas creado ya
+    existing = set(sa.inspect(op.get_bind()).get_table_names())
+    if 'archived_tasks' in existing:
+        return
+
+    # Los tipos enum ya existen (los crea la tabla tasks)
+    status = postgresql.ENUM(name='status', create_type=False) \
+        if op.get_bind().dialect.name == 'postgresql' else sa.String(11)
+    priority = postgresql.ENUM(name='priority', create_type=False) \
+        if op.get_bind().dialect.name == 'postgresql' else sa.String(6)
+
+    op.create_table(
+        'archived_tasks',
+        sa.Column('id', sa.Integer(), primary_key=True, autoincrement=False),
+        sa.Column('title', sa.String(length=200), nullable=False),
+        sa.Column('description', sa.Text(), nullable=True),
+        sa.Column('status', status, nullable=False),
+        sa.Column('priority', priority, nullable=False),
+        sa.Column('due_date', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('start_date', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('completed_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('estimated_hours', sa.Integer(), nullable=True),
+        sa.Column('actual_hours', sa.Integer(), nullable=True),
+        sa.Column('progress', sa.Integer(), nullable=False),
+        sa.Column('tags', sa.String(length=500), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+        sa.Column('user_id', sa.Integer(), sa.ForeignKey('users.id', ondelete='CASCADE'), nullable=False),
+        sa.Column('project_id', sa.Integer(), sa.ForeignKey('projects.id', ondelete='CASCADE'), nullable=True),
+        sa.Column('parent_task_id', sa.Integer(), nullable=True),
+        sa.Column('archived_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+        sa.Column('comments_snapshot', sa.Text(), nullable=True),
+    )
+    op.create_index('idx_archived_task_user_created', 'archived_tasks',
+                    ['user_id', 'created_at', 'id'])
+    op.create_index('idx_archived_task_project', 'archived_tasks', ['project_id'])
+
+    op.create_table(
+        'archived_task_assignments',
+        sa.Column('task_id', sa.Integer(), sa.ForeignKey('archived_tasks.id', ondelete='CASCADE'), primary_key=True),
+        sa.Column('user_id', sa.Integer(), sa.ForeignKey('users.id', ondelete='CASCADE'), primary_key=True),
+        sa.Column('assigned_at', sa.DateTime(timezone=True), nullable=False),
+    )
+    op.create_index('idx_archived_assignment_user', 'archived_task_assignments', ['user_id'])
+
+
+def downgrade() -> None:
+    # Las tareas archivadas se pierden: restaurarlas antes si hace falta
+    op.drop_table('archived_task_assignments')
+    op.drop_table('archived_tasks')
@@ -0,0 +1,120 @@
+"""Índice de búsqueda de texto completo: search_documents y carga inicial
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-18
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from app.config import settings
+
+# revision identifiers, used by Alembic.
+revision = '0004'
+down_revision = '0003'
+branch_labels = None
+depends_on = None
+
+BATCH_SIZE = 5000
+
+# Copia congelada del DDL de app.search
+POSTGRES_DDL = [
+    """
+    CREATE TABLE IF NOT EXISTS search_documents (
+        entity_type VARCHAR(16) NOT NULL,
+        entity_id INTEGER NOT NULL,
+        task_id INTEGER NOT NULL REFERENCES tasks(id) ON DELETE CASCADE,
+        document TSVECTOR NOT NULL,
+        PRIMARY KEY (entity_type, entity_id)
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS idx_search_document ON search_documents USING GIN (document)",
+    "CREATE INDEX IF NOT EXISTS idx_search_task ON search_documents (task_id)",
+]
+
+SQLITE_DDL = [
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS search_documents USING fts5(
+        entity_type UNINDEXED,
+        entity_id UNINDEXED,
+        task_id UNINDEXED,
+        title,
+        body,
+        tokenize = 'unicode61 remove_diacritics 2'
+    )
+    """,
+]
+
+POSTGRES_BACKFILL = [
+    """
+    INSERT INTO search_documents (entity_type, entity_id, task_id, document)
+    SELECT 'task', id, id,
+        setweight(to_tsvector(CAST(:config AS regconfig), coalesce(title, '')), 'A')
+        || setweight(to_tsvector(CAST(:config AS regconfig), coalesce(description, '')), 'B')
+    FROM tasks
+    WHERE id > :low AND id <= :high
+    ON CONFLICT (entity_type, entity_id) DO NOTHING
+    """,
+    """
+    INSERT INTO search_documents (entity_type, entity_id, task_id, document)
+    SELECT 'comment', id, task_id,
+        setweight(to_tsvector(CAST(:config AS regconfig), coalesce(content, '')), 'B')
+    FROM comments
+    WHERE id > :low AND id <= :high
+    ON CONFLICT (entity_type, entity_id) DO NOTHING
+    """,
+]
+
+SQLITE_BACKFILL = [
+    """
+    INSERT INTO search_documents (entity_type, entity_id, task_id, title, body)
+    SELECT 'task', id, id, coalesce(title, ''), coalesce(description, '') FROM tasks
+    """,
+    """
+    INSERT INTO search_documents (entity_type, entity_id, task_id, title, body)
+    SELECT 'comment', id, task_id, '', coalesce(content, '') FROM comments
+    """,
+]
+
+
+def _backfill_postgres(connection) -> None:
+    """
+    Indexa tareas y comentarios por rangos de ID
+
+    Las filas que ya estén indexadas (si create_all creó la tabla y la
+    aplicación ya escribió) se respetan.
+    """
+    for statement, source in zip(POSTGRES_BACKFILL, ('tasks', 'comments')):
+        max_id = connection.execute(sa.text(f"SELECT max(id) FROM {source}")).scalar() or 0
+        for low in range(0, max_id, BATCH_SIZE):
+            connection.execute(sa.text(statement), {
+                'config': settings.SEARCH_TEXT_CONFIG,
+                'low': low,
+                'high': low + BATCH_SIZE,
+            })
+
+
+def _backfill_sqlite(connection) -> None:
+    """Reconstruye el índice completo (FTS5 no tiene claves únicas que respetar)"""
+    connection.execute(sa.text("DELETE FROM search_documents"))
+    for statement in SQLITE_BACKFILL:
+        connection.execute(sa.text(statement))
+
+
+def upgrade() -> None:
+    connection = op.get_bind()
+    dialect = connection.dialect.name
+    if dialect == 'postgresql':
+        for statement in POSTGRES_DDL:
+            connection.execute(sa.text(statement))
+        _backfill_postgres(connection)
+    elif dialect == 'sqlite':
+        for statement in SQLITE_DDL:
+            connection.execute(sa.text(statement))
+        _backfill_sqlite(connection)
+
+
+def downgrade() -> None:
+    # La búsqueda deja de funcionar; el índice se regenera al volver a subir
+    op.execute("DROP TABLE IF EXISTS search_documents")
@@ -0,0 +1,85 @@
+"""Contadores de tareas por proyecto: project_task_counters y carga inicial
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-18
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '0005'
+down_revision = '0004'
+branch_labels = None
+depends_on = None
+
+projects = sa.table(
+    'projects',
+    sa.column('id', sa.Integer),
+)
+tasks = sa.table(
+    'tasks',
+    sa.column('id', sa.Integer),
+    sa.column('project_id', sa.Integer),
+    sa.column('status', sa.String),
+)
+counters = sa.table(
+    'project_task_counters',
+    sa.column('project_id', sa.Integer),
+    sa.column('total_tasks', sa.Integer),
+    sa.column('completed_tasks', sa.Integer),
+    sa.column('in_progress_tasks', sa.Integer),
+)
+
+
+def _count_status(name: str):
+    # El enum guarda el nombre del miembro; CAST para comparar como texto
+    # también con el tipo enum de PostgreSQL
+    return sa.func.coalesce(sa.func.sum(
+        sa.case((sa.cast(tasks.c.status, sa.String) == name, 1), else_=0)
+    ), 0)
+
+
+def _create_table() -> None:
+    # init_db() (create_all) puede haberla creado ya
+    if 'project_task_counters' in set(sa.inspect(op.get_bind()).get_table_names()):
+        return
+    op.create_table(
+        'project_task_counters',
+        sa.Column('project_id', sa.Integer(), sa.ForeignKey('projects.id', ondelete='CASCADE'), primary_key=True),
+        sa.Column('total_tasks', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('completed_tasks', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('in_progress_tasks', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+    )
+
+
+def _backfill() -> None:
+    """
+    Un contador por proyecto que aún no lo tenga, con un único
+    INSERT ... SELECT agrupado por proyecto (los proyectos sin tareas a 0)
+    """
+    missing = ~sa.exists().where(counters.c.project_id == projects.c.id)
+    op.execute(counters.insert().from_select(
+        ['project_id', 'total_tasks', 'completed_tasks', 'in_progress_tasks'],
+        sa.select(
+            projects.c.id,
+            sa.func.count(tasks.c.id),
+            _count_status('COMPLETED'),
+            _count_status('IN_PROGRESS'),
+        )
+        .select_from(projects.outerjoin(tasks, tasks.c.project_id == projects.c.id))
+        .where(missing)
+        .group_by(projects.c.id)
+    ))
+
+
+def upgrade() -> None:
+    _create_table()
+    _backfill()
+
+
+def downgrade() -> None:
+    # Las lecturas vuelven al GROUP BY sobre tasks (PROJECT_STATS_COUNTERS=False)
+    op.drop_table('project_task_counters')
@@ -0,0 +1,229 @@
+from sqlalchemy import Column, and_, delete, func, insert, or_, select
+from sqlalchemy.orm import Session
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional
+import json
+import logging
+from . import models, search
+from .config import settings
+from .project_stats import refresh_counters
+from .tags import normalize_tag_names, sync_task_tags
+
+logger = logging.getLogger(__name__)
+
+# Archivado de tareas (almacenamiento caliente/frío)
+#
+# Las tareas completadas o archivadas que llevan más de ARCHIVE_AFTER_DAYS sin
+# cambios se mueven de `tasks` a `archived_tasks` en lotes pequeños, cada uno
+# en su propia transacción: los bloqueos duran lo que tarda un lote y el resto
+# de escrituras no espera. Así los índices que usan los tableros activos sólo
+# contienen tareas vivas.
+
+ARCHIVABLE_STATUSES = (models.Status.COMPLETED, models.Status.ARCHIVED)
+
+TASK_FIELDS = [
+    name for name, value in vars(models.TaskFieldsMixin).items()
+    if isinstance(value, Column)
+] + ["id", "user_id", "project_id", "parent_task_id"]
+
+
+def _archivable(cutoff: datetime) -> List[Any]:
+    """Tareas terminadas, sin cambios desde `cutoff` y sin subtareas activas"""
+    # NOT IN sobre el conjunto de padres (se calcula una vez) en lugar de un
+    # NOT EXISTS correlacionado por fila
+    parents = select(models.Task.parent_task_id).where(models.Task.parent_task_id.isnot(None))
+    return [
+        models.Task.status.in_(ARCHIVABLE_STATUSES),
+        func.coalesce(models.Task.completed_at, models.Task.updated_at) < cutoff,
+        models.Task.id.not_in(parents),
+    ]
+
+
+def _comment_snapshot(comment: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        key: value.isoformat() if isinstance(value, datetime) else value
+        for key, value in comment.items()
+    }
+
+
+def _archive_batch(db: Session, cutoff: datetime, batch_size: int) -> int:
+    """Mueve un lote de tareas a almacenamiento frío y confirma"""
+    # SKIP LOCKED: las filas que otra transacción está editando se dejan
+    # para la siguiente pasada en lugar de esperar por ellas
+    ids = db.scalars(
+        select(models.Task.id)
+        .where(*_archivable(cutoff))
+        .order_by(models.Task.id)
+        .limit(batch_size)
+        .with_for_update(skip_locked=True)
+    ).all()
+    if not ids:
+        return 0
+
+    columns = [getattr(models.Task, name) for name in TASK_FIELDS]
+    rows = [dict(row._mapping) for row in db.execute(select(*columns).where(models.Task.id.in_(ids)))]
+
+    comments: Dict[int, List[Dict[str, Any]]] = {}
+    for comment in db.execute(
+        select(
+            models.Comment.id, models.Comment.task_id, models.Comment.author_id,
+            models.Comment.content, models.Comment.created_at, models.Comment.updated_at
+        ).where(models.Comment.task_id.in_(ids)).order_by(models.Comment.id)
+    ):
+        comments.setdefault(comment.task_id, []).append(_comment_snapshot(dict(comment._mapping)))
+
+    assignments = [
+        dict(row._mapping) for row in db.execute(
+            select(
+                models.TaskAssignment.task_id,
+                models.TaskAssignment.user_id,
+                models.TaskAssignment.assigned_at
+            ).where(models.TaskAssignment.task_id.in_(ids))
+        )
+    ]
+
+    for row in rows:
+        snapshot = comments.get(row["id"])
+        row["comments_snapshot"] = json.dumps(snapshot) if snapshot else None
+    db.execute(insert(models.ArchivedTask), rows)
+    if assignments:
+        db.execute(insert(models.ArchivedTaskAssignment), assignments)
+
+    # Las FKs con ON DELETE CASCADE ya lo harían; explícito para motores
+    # sin claves foráneas activas
+    for table in (models.Comment, models.TaskAssignment, models.TaskTag):
+        db.execute(delete(table).where(table.task_id.in_(ids)))
+    search.remove_tasks(db, ids)
+    db.execute(delete(models.Task).where(models.Task.id.in_(ids)))
+
+    project_ids = {row["project_id"] for row in rows if row["project_id"]}
+    if settings.PROJECT_STATS_COUNTERS and project_ids:
+        refresh_counters(db, project_ids)
+
+    db.commit()
+    return len(ids)
+
+
+def archive_tasks(
+    db: Session,
+    older_than_days: Optional[int] = None,
+    batch_size: Optional[int] = None,
+    max_batches: Optional[int] = None
+) -> int:
+    """
+    Archiva las tareas terminadas hace más de `older_than_days` días
+
+    Las tareas con subtareas activas no se archivan hasta que éstas lo estén.
+    Cada lote se confirma por separado; se puede interrumpir y relanzar.
+
+    Returns:
+        Número de tareas archivadas
+    """
+    older_than_days = older_than_days if older_than_days is not None else settings.ARCHIVE_AFTER_DAYS
+    batch_size = batch_size or settings.ARCHIVE_BATCH_SIZE
+    cutoff = datetime.now(timezone.utc) - timedelta(days=older_than_days)
+
+    archived = 0
+    batches = 0
+    while max_batches is None or batches < max_batches:
+        moved = _archive_batch(db, cutoff, batch_size)
+        if not moved:
+            break
+        archived += moved
+        batches += 1
+
+    if archived:
+        logger.info(f"Archived {archived} tasks in {batches} batches")
+    return archived
+
+
+def restore_task(db: Session, task_id: int) -> Optional[models.Task]:
+    """
+    Devuelve una tarea archivada a `tasks` (y antes a sus ancestros archivados)
+
+    Se descartan las asignaciones y comentarios de usuarios que ya no existen.
+
+    Returns:
+        La tarea restaurada, o None si no está archivada
+    """
+    archived = db.get(models.ArchivedTask, task_id)
+    if archived is None:
+        return None
+
+    if archived.parent_task_id and db.get(models.Task, archived.parent_task_id) is None:
+        if restore_task(db, archived.parent_task_id) is None:
+            # El padre ya no existe en ninguna de las dos tablas
+            archived.parent_task_id = None
+
+    row = {name: getattr(archived, name) for name in TASK_FIELDS}
+    comments = json.loads(archived.comments_snapshot) if archived.comments_snapshot else []
+    assignments = db.execute(
+        select(models.ArchivedTaskAssignment.user_id, models.ArchivedTaskAssignment.assigned_at)
+        .where(models.ArchivedTaskAssignment.task_id == task_id)
+    ).all()
+
+    user_ids = {user_id for user_id, _ in assignments} | {c["author_id"] for c in comments}
+    existing_users = set(db.scalars(
+        select(models.User.id).where(models.User.id.in_(user_ids))
+    ).all()) if user_ids else set()
+
+    db.execute(insert(models.Task), [row])
+    if assignments:
+        rows = [
+            {"task_id": task_id, "user_id": user_id, "assigned_at": assigned_at}
+            for user_id, assigned_at in assignments if user_id in existing_users
+        ]
+        if rows:
+            db.execute(insert(models.TaskAssignment), rows)
+    comment_rows = [
+        {
+            **comment,
+            "created_at": datetime.fromisoformat(comment["created_at"]),
+            "updated_at": datetime.fromisoformat(comment["updated_at"]),
+        }
+        for comment in comments if comment["author_id"] in existing_users
+    ]
+    if comment_rows:
+        db.execute(insert(models.Comment), comment_rows)
+
+    db.execute(delete(models.ArchivedTaskAssignment).where(
+        models.ArchivedTaskAssignment.task_id == task_id
+    ))
+    db.delete(archived)
+    db.flush()
+
+    task = db.get(models.Task, task_id)
+    search.index_task(db, task)
+    for comment in db.scalars(select(models.Comment).where(models.Comment.task_id == task_id)):
+        search.index_comment(db, comment)
+    if task.tags:
+        sync_task_tags(db, {task_id: task.tags})
+    if settings.PROJECT_STATS_COUNTERS and task.project_id:
+        refresh_counters(db, [task.project_id])
+
+    db.commit()
+    return task
+
+
+def archived_tag_conditions(
+    tags_any: Optional[List[str]] = None,
+    tags_all: Optional[List[str]] = None
+) -> List[Any]:
+    """
+    Filtros de etiquetas para la tabla fría
+
+    Las tareas archivadas no están en task_tags: se filtra con LIKE sobre el
+    JSON de `tags`, aceptable porque la tabla fría sólo se consulta bajo
+    petición.
+    """
+    column = func.lower(models.ArchivedTask.tags)
+    conditions = []
+    if tags_any:
+        conditions.append(or_(*[
+            column.contains(f'"{name}"', autoescape=True) for name in normalize_tag_names(tags_any)
+        ]))
+    if tags_all:
+        conditions.append(and_(*[
+            column.contains(f'"{name}"', autoescape=True) for name in normalize_tag_names(tags_all)
+        ]))
+    return conditions
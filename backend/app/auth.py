@@ -1,24 +1,37 @@
 from datetime import datetime, timedelta
 from typing import Optional, Union
 from jose import JWTError, jwt
-from passlib.context import CryptContext
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
-from sqlalchemy.orm import Session
-from .database import get_db
+from sqlalchemy import inspect, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, make_transient_to_detached
+from .database import get_async_db, get_async_read_db, get_db
 from .models import User
 from .schemas import TokenPayload
 from .config import settings
+from .metrics import registry
+from .passwords import pwd_context, password_service
+from .principal_cache import PrincipalCache
 import logging
 
 logger = logging.getLogger(__name__)
 
-# Password hashing context
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
-
 # OAuth2 scheme
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl=f"{settings.API_V1_STR}/auth/login")
 
+# Caché de usuarios verificados (evita una consulta por request)
+principal_cache = PrincipalCache(
+    max_size=settings.PRINCIPAL_CACHE_MAX_SIZE,
+    ttl_seconds=settings.PRINCIPAL_CACHE_TTL_SECONDS
+)
+registry.counter(
+    "principal_cache_hits_total", "Principal cache hits"
+).set_function(lambda: principal_cache.hits)
+registry.counter(
+    "principal_cache_misses_total", "Principal cache misses"
+).set_function(lambda: principal_cache.misses)
+
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """Verifica que la contraseña coincida con el hash"""
@@ -139,22 +152,116 @@ def authenticate_user(db: Session, username: str, password: str) -> Optional[Use
     if not user:
         return None
     
-    if not verify_password(password, user.hashed_password):
+    valid, new_hash = pwd_context.verify_and_update(password, user.hashed_password)
+    if not valid:
+        return None
+    
+    if not user.is_active:
+        return None
+    
+    if new_hash:
+        _rehash_password(db, user, new_hash)
+    
+    return user
+
+
+async def authenticate_user_async(db: AsyncSession, username: str, password: str) -> Optional[User]:
+    """
+    Igual que `authenticate_user` pero con la sesión async y verificando la
+    contraseña en el pool de `password_service`, sin bloquear el event loop
+    
+    Raises:
+        HTTPException: 503 si el pool de hashing está saturado
+    """
+    user = await db.scalar(
+        select(User).where(or_(User.username == username, User.email == username))
+    )
+    
+    if not user:
+        return None
+    
+    valid, new_hash = await password_service.verify_and_update(
+        password, user.hashed_password
+    )
+    if not valid:
         return None
     
     if not user.is_active:
         return None
     
+    if new_hash:
+        user.hashed_password = new_hash
+        await db.commit()
+        principal_cache.invalidate_user(user.id)
+        logger.info(f"Password hash upgraded for user {user.id}")
+    
     return user
 
 
-async def get_current_user(
+def _rehash_password(db: Session, user: User, new_hash: str) -> None:
+    """Guarda el hash recalculado con el coste actual de bcrypt"""
+    user.hashed_password = new_hash
+    db.commit()
+    principal_cache.invalidate_user(user.id)
+    logger.info(f"Password hash upgraded for user {user.id}")
+
+
+def _snapshot_user(user: User) -> dict:
+    """Copia las columnas de un usuario para guardarlas en la caché"""
+    return {
+        attr.key: getattr(user, attr.key)
+        for attr in inspect(User).column_attrs
+    }
+
+
+def _user_from_snapshot(db: Session, snapshot: dict) -> User:
+    """
+    Reconstruye un usuario cacheado y lo asocia a la sesión sin consultar la BD
+    """
+    user = User(**snapshot)
+    make_transient_to_detached(user)
+    return db.merge(user, load=False)
+
+
+def _credentials_exception() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Could not validate credentials",
+        headers={"WWW-Authenticate": "Bearer"},
+    )
+
+
+def _cache_user(token: str, token_data: TokenPayload, user: User, version: int) -> None:
+    if settings.PRINCIPAL_CACHE_ENABLED:
+        principal_cache.set(
+            token,
+            user.id,
+            _snapshot_user(user),
+            version,
+            token_exp=token_data.exp
+        )
+
+
+def _ensure_active(user: User) -> User:
+    if not user.is_active:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Inactive user"
+        )
+    return user
+
+
+def get_current_user(
     token: str = Depends(oauth2_scheme),
     db: Session = Depends(get_db)
 ) -> User:
     """
     Obtiene el usuario actual desde el token JWT
     
+    Es síncrona a propósito: FastAPI la ejecuta en su pool de hilos y la
+    consulta del usuario no bloquea el event loop. Los endpoints async usan
+    `get_current_user_async`.
+    
     Args:
         token: Token JWT del usuario
         db: Sesión de base de datos
@@ -165,29 +272,63 @@ async def get_current_user(
     Raises:
         HTTPException: Si el token es inválido o el usuario no existe
     """
-    credentials_exception = HTTPException(
-        status_code=status.HTTP_401_UNAUTHORIZED,
-        detail="Could not validate credentials",
-        headers={"WWW-Authenticate": "Bearer"},
-    )
-    
     token_data = decode_token(token)
     
     if token_data.sub is None:
-        raise credentials_exception
+        raise _credentials_exception()
+    
+    # Permite a RoutingSession aplicar read-your-writes por usuario
+    db.info["user_id"] = token_data.sub
+    
+    snapshot = None
+    if settings.PRINCIPAL_CACHE_ENABLED:
+        snapshot = principal_cache.get(token)
     
+    if snapshot is not None:
+        return _ensure_active(_user_from_snapshot(db, snapshot))
+    
+    version = principal_cache.version(token_data.sub)
     user = db.query(User).filter(User.id == token_data.sub).first()
     
     if user is None:
-        raise credentials_exception
+        raise _credentials_exception()
     
-    if not user.is_active:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Inactive user"
-        )
+    _cache_user(token, token_data, user, version)
+    return _ensure_active(user)
+
+
+async def get_current_user_async(
+    token: str = Depends(oauth2_scheme),
+    db: AsyncSession = Depends(get_async_db)
+) -> User:
+    """
+    Igual que `get_current_user` pero con la sesión async de la request
     
-    return user
+    Para endpoints async: el usuario se lee (o se asocia desde la caché) en
+    la misma sesión que usa el endpoint, sin abrir una sesión síncrona.
+    """
+    token_data = decode_token(token)
+    
+    if token_data.sub is None:
+        raise _credentials_exception()
+    
+    db.info["user_id"] = token_data.sub
+    
+    snapshot = None
+    if settings.PRINCIPAL_CACHE_ENABLED:
+        snapshot = principal_cache.get(token)
+    
+    if snapshot is not None:
+        return _ensure_active(_user_from_snapshot(db.sync_session, snapshot))
+    
+    version = principal_cache.version(token_data.sub)
+    user = await db.get(User, token_data.sub)
+    
+    if user is None:
+        raise _credentials_exception()
+    
+    _cache_user(token, token_data, user, version)
+    return _ensure_active(user)
 
 
 async def get_current_active_user(
@@ -218,6 +359,20 @@ async def get_current_superuser(
     return current_user
 
 
+async def get_user_async_read_db(
+    current_user: User = Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_read_db)
+) -> AsyncSession:
+    """
+    Sesión async de sólo lectura para endpoints autenticados
+
+    Es la misma sesión de `get_current_user_async` (una por request): el
+    usuario se resuelve antes de autorizar las réplicas, así que se lee del
+    primario, y RoutingSession aplica read-your-writes con su ID.
+    """
+    return db
+
+
 def create_tokens_for_user(user: User) -> dict:
     """
     Crea access y refresh tokens para un usuario
@@ -228,8 +383,9 @@ def create_tokens_for_user(user: User) -> dict:
     Returns:
         Dict con access_token y refresh_token
     """
-    access_token = create_access_token(data={"sub": user.id})
-    refresh_token = create_refresh_token(data={"sub": user.id})
+    # JWT exige que "sub" sea un string
+    access_token = create_access_token(data={"sub": str(user.id)})
+    refresh_token = create_refresh_token(data={"sub": str(user.id)})
     
     return {
         "access_token": access_token,
@@ -1,5 +1,5 @@
 from pydantic_settings import BaseSettings
-from typing import List, Optional
+from typing import Dict, List, Optional
 from functools import lru_cache
 import secrets
 
@@ -14,6 +14,12 @@ class Settings(BaseSettings):
     
     # Database
     DATABASE_URL: str
+    ASYNC_DATABASE_URL: Optional[str] = None  # Por defecto se deriva de DATABASE_URL
+    DATABASE_REPLICA_URLS: List[str] = []  # Réplicas de solo lectura (opcional)
+    REPLICA_STICKY_SECONDS: float = 5.0  # Read-your-writes tras una escritura
+    # Dónde se guarda esa ventana: "redis" (REDIS_URL, compartida entre
+    # workers) o "local" (memoria del proceso: sólo con un único worker)
+    REPLICA_STICKY_BACKEND: str = "redis"
     DB_ECHO: bool = False
     
     # Redis
@@ -24,7 +30,18 @@ class Settings(BaseSettings):
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
     REFRESH_TOKEN_EXPIRE_DAYS: int = 7
-    
+
+    # Principal cache (usuarios autenticados)
+    PRINCIPAL_CACHE_ENABLED: bool = True
+    PRINCIPAL_CACHE_TTL_SECONDS: int = 60
+    PRINCIPAL_CACHE_MAX_SIZE: int = 10000
+
+    # Password hashing
+    BCRYPT_ROUNDS: int = 12
+    PASSWORD_HASH_EXECUTOR: str = "thread"  # thread | process
+    PASSWORD_HASH_WORKERS: int = 4
+    PASSWORD_HASH_MAX_PENDING: int = 64
+
     # CORS
     BACKEND_CORS_ORIGINS: List[str] = [
         "http://localhost:4200",
@@ -32,6 +49,23 @@ class Settings(BaseSettings):
         "http://localhost"
     ]
     
+    # Métricas internas (/internal/metrics)
+    # Desactivadas por defecto; si se activan exigen INTERNAL_METRICS_TOKEN
+    # (Authorization: Bearer, para el scraper) o el JWT de un superusuario
+    INTERNAL_METRICS_ENABLED: bool = False
+    INTERNAL_METRICS_TOKEN: Optional[str] = None
+    METRICS_MULTIPROC_DIR: Optional[str] = None  # Directorio compartido entre workers (gunicorn)
+    METRICS_FLUSH_SECONDS: float = 5.0  # Cada cuánto vuelca cada worker sus métricas
+    
+    # Logging (cola acotada con hilo escritor)
+    LOG_LEVEL: Optional[str] = None  # Por defecto DEBUG si DEBUG, si no INFO
+    LOG_FORMAT: str = "json"  # json | text
+    LOG_QUEUE_SIZE: int = 10000  # Registros en espera; si se llena se descartan
+    LOG_SAMPLING: Dict[str, float] = {}  # Prefijo de logger -> fracción de INFO que se conserva
+    
+    # Log de acceso (una línea por petición, logger app.access)
+    ACCESS_LOG_ENABLED: bool = True
+    
     # Rate Limiting
     RATE_LIMIT_PER_MINUTE: int = 60
     
@@ -56,6 +90,35 @@ class Settings(BaseSettings):
     DEFAULT_PAGE_SIZE: int = 20
     MAX_PAGE_SIZE: int = 100
     
+    # Streaming de hilos de comentarios (NDJSON)
+    COMMENT_STREAM_BATCH_SIZE: int = 500
+    
+    # Borrado de proyectos grandes por partes (en segundo plano)
+    PROJECT_PURGE_CHUNK_SIZE: int = 1000
+    
+    # Operaciones en lote
+    BULK_MAX_ITEMS: int = 1000
+    
+    # Totales de listados (X-Total-Count)
+    TASK_COUNT_CACHE_TTL_SECONDS: int = 30
+    TASK_COUNT_CACHE_MAX_SIZE: int = 10000
+    COUNT_ESTIMATE_THRESHOLD: int = 10000  # Por debajo se cuenta exacto
+    
+    # Búsqueda de texto completo
+    SEARCH_TEXT_CONFIG: str = "simple"  # Configuración de to_tsvector (PostgreSQL)
+    SEARCH_MAX_RESULTS: int = 50
+    
+    # Archivado de tareas terminadas (almacenamiento frío)
+    ARCHIVE_AFTER_DAYS: int = 90
+    ARCHIVE_BATCH_SIZE: int = 500
+    
+    # Árboles de subtareas
+    TASK_TREE_DEFAULT_DEPTH: int = 5
+    TASK_TREE_MAX_DEPTH: int = 20
+    
+    # Estadísticas de proyecto con contadores incrementales (proyectos grandes)
+    PROJECT_STATS_COUNTERS: bool = False
+    
     # Timezone
     TZ: str = "Europe/Madrid"
     
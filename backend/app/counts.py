@@ -0,0 +1,126 @@
+from sqlalchemy import Select, func, select, text
+from sqlalchemy.orm import Session
+from collections import OrderedDict
+from threading import Lock
+from typing import Any, Dict, Hashable, Optional, Tuple
+import enum
+import json
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class CountMode(str, enum.Enum):
+    """Modo de cálculo de totales para listados"""
+    EXACT = "exact"          # COUNT(*) exacto
+    CACHED = "cached"        # COUNT(*) cacheado por filtro, invalidado al escribir
+    ESTIMATED = "estimated"  # Estadísticas del planner (PostgreSQL)
+
+
+class CountCache:
+    """
+    Caché de conteos por filtro con invalidación por generaciones
+
+    Las claves empiezan por el `user_id` del filtro (o None). Invalidar un
+    usuario deja obsoletos sus conteos y los que no filtran por usuario;
+    invalidar sin usuario deja obsoleto todo. Es local a cada proceso: el
+    TTL acota lo que puede desfasarse respecto a escrituras de otros workers.
+    """
+
+    def __init__(self, ttl_seconds: float = 30, max_size: int = 10000):
+        self.ttl_seconds = ttl_seconds
+        self.max_size = max_size
+        self._entries: "OrderedDict[Hashable, Tuple[Tuple[int, int], float, int]]" = OrderedDict()
+        self._global_generation = 0
+        self._unscoped_generation = 0
+        self._user_generations: Dict[int, int] = {}
+        self._lock = Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _generation(self, user_id: Optional[int]) -> Tuple[int, int]:
+        if user_id is None:
+            return self._global_generation, self._unscoped_generation
+        return self._global_generation, self._user_generations.get(user_id, 0)
+
+    def generation(self, user_id: Optional[int]) -> Tuple[int, int]:
+        """Generación actual (leer antes de contar)"""
+        with self._lock:
+            return self._generation(user_id)
+
+    def get(self, key: Tuple[Any, ...]) -> Optional[int]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            generation, expires_at, value = entry
+            if expires_at <= time.monotonic() or generation != self._generation(key[0]):
+                del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key: Tuple[Any, ...], value: int, generation: Tuple[int, int]) -> None:
+        with self._lock:
+            self._entries[key] = (generation, time.monotonic() + self.ttl_seconds, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, user_id: Optional[int] = None) -> None:
+        """Invalida los conteos afectados por una escritura de `user_id` (o todos)"""
+        with self._lock:
+            if user_id is None:
+                self._global_generation += 1
+            else:
+                self._user_generations[user_id] = self._user_generations.get(user_id, 0) + 1
+                self._unscoped_generation += 1
+
+
+def exact_count(db: Session, query: Select) -> int:
+    """COUNT(*) exacto de una consulta (sin ORDER BY/LIMIT)"""
+    return db.scalar(select(func.count()).select_from(query.subquery()))
+
+
+def planner_estimate(db: Session, query: Select, table_name: str, filtered: bool) -> Optional[int]:
+    """
+    Estimación de filas según las estadísticas de PostgreSQL
+
+    Sin filtros se usa `pg_class.reltuples`; con filtros, las filas que
+    estima el planner para la consulta (EXPLAIN, sin ejecutarla).
+
+    Returns:
+        Estimación o None si no está disponible (otro motor, sin ANALYZE)
+    """
+    connection = db.connection()
+    if connection.dialect.name != "postgresql":
+        return None
+
+    try:
+        # Savepoint: un fallo no debe abortar la transacción de la request
+        with connection.begin_nested():
+            if not filtered:
+                estimate = connection.execute(
+                    text("SELECT reltuples::bigint FROM pg_class WHERE oid = to_regclass(:table)"),
+                    {"table": table_name}
+                ).scalar()
+            else:
+                sql = str(query.compile(
+                    dialect=connection.dialect,
+                    compile_kwargs={"literal_binds": True}
+                ))
+                plan = connection.exec_driver_sql(f"EXPLAIN (FORMAT JSON) {sql}").scalar()
+                if isinstance(plan, str):
+                    plan = json.loads(plan)
+                estimate = plan[0]["Plan"]["Plan Rows"]
+    except Exception as e:
+        logger.warning(f"Planner estimate failed: {str(e)}")
+        return None
+
+    if estimate is None or estimate < 0:
+        return None
+    return int(estimate)
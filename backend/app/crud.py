@@ -1,9 +1,25 @@
-from sqlalchemy.orm import Session
-from sqlalchemy import and_, or_
-from typing import Optional, List
+from sqlalchemy.orm import Session, selectinload
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import and_, or_, case, cast, delete, func, insert, select, update, Integer, Select
+from pydantic import ValidationError
+from typing import Any, Dict, Iterator, Optional, List, Sequence, Tuple
 from datetime import datetime
-from . import models, schemas
-from .auth import get_password_hash
+import logging
+import re
+from . import models, schemas, search
+from .loaders import loader_options
+from .pagination import apply_keyset, encode_cursor
+from .project_stats import adjust_counters, get_project_stats, refresh_counters, status_deltas
+from .auth import get_password_hash, principal_cache
+from .config import settings
+from .counts import CountCache, CountMode, exact_count, planner_estimate
+from .passwords import password_service
+from .archive import archive_tasks, archived_tag_conditions, restore_task
+from .task_tree import get_project_forest, get_task_tree, subtree_ids
+from .tags import get_tag_cloud, normalize_tag_names, sync_task_tags, tagged_task_ids
+
+logger = logging.getLogger(__name__)
 
 
 # ============ User CRUD ============
@@ -13,6 +29,11 @@ def get_user(db: Session, user_id: int) -> Optional[models.User]:
     return db.query(models.User).filter(models.User.id == user_id).first()
 
 
+async def get_user_async(db: AsyncSession, user_id: int) -> Optional[models.User]:
+    """Obtener usuario por ID (async)"""
+    return await db.get(models.User, user_id)
+
+
 def get_user_by_email(db: Session, email: str) -> Optional[models.User]:
     """Obtener usuario por email"""
     return db.query(models.User).filter(models.User.email == email).first()
@@ -23,15 +44,31 @@ def get_user_by_username(db: Session, username: str) -> Optional[models.User]:
     return db.query(models.User).filter(models.User.username == username).first()
 
 
-def get_users(db: Session, skip: int = 0, limit: int = 100) -> List[models.User]:
-    """Obtener lista de usuarios"""
-    return db.query(models.User).offset(skip).limit(limit).all()
+def get_users(
+    db: Session,
+    skip: int = 0,
+    limit: int = 100,
+    cursor: Optional[str] = None,
+    options: Sequence[Any] = ()
+) -> List[models.User]:
+    """
+    Obtener lista de usuarios
+    
+    Con `cursor` se pagina por (created_at, id) en lugar de por offset; en
+    los dos casos con el mismo orden, para que las páginas sean estables.
+    `options` son opciones de carga (p. ej. `fieldsets.projection_options`).
+    """
+    query = apply_keyset(
+        select(models.User).options(*options), models.User.created_at, models.User.id, cursor
+    )
+    if cursor is None:
+        query = query.offset(skip)
+    
+    return db.scalars(query.limit(limit)).all()
 
 
-def create_user(db: Session, user: schemas.UserCreate) -> models.User:
-    """Crear nuevo usuario"""
-    hashed_password = get_password_hash(user.password)
-    db_user = models.User(
+def _new_user(user: schemas.UserCreate, hashed_password: str) -> models.User:
+    return models.User(
         email=user.email,
         username=user.username,
         full_name=user.full_name,
@@ -39,12 +76,32 @@ def create_user(db: Session, user: schemas.UserCreate) -> models.User:
         bio=user.bio,
         hashed_password=hashed_password,
     )
+
+
+def create_user(
+    db: Session,
+    user: schemas.UserCreate,
+    hashed_password: Optional[str] = None
+) -> models.User:
+    """Crear nuevo usuario"""
+    if hashed_password is None:
+        hashed_password = get_password_hash(user.password)
+    db_user = _new_user(user, hashed_password)
     db.add(db_user)
     db.commit()
     db.refresh(db_user)
     return db_user
 
 
+async def create_user_async(db: AsyncSession, user: schemas.UserCreate) -> models.User:
+    """Crear nuevo usuario (async) calculando el hash fuera del event loop"""
+    db_user = _new_user(user, await password_service.hash(user.password))
+    db.add(db_user)
+    await db.commit()
+    await db.refresh(db_user)
+    return db_user
+
+
 def update_user(db: Session, user_id: int, user: schemas.UserUpdate) -> Optional[models.User]:
     """Actualizar usuario"""
     db_user = get_user(db, user_id)
@@ -56,18 +113,63 @@ def update_user(db: Session, user_id: int, user: schemas.UserUpdate) -> Optional
         setattr(db_user, field, value)
     
     db.commit()
+    principal_cache.invalidate_user(user_id)
     db.refresh(db_user)
     return db_user
 
 
-def delete_user(db: Session, user_id: int) -> bool:
-    """Eliminar usuario"""
+def deactivate_user(db: Session, user_id: int) -> Optional[models.User]:
+    """Desactivar usuario"""
     db_user = get_user(db, user_id)
     if not db_user:
+        return None
+    
+    db_user.is_active = False
+    db.commit()
+    principal_cache.invalidate_user(user_id)
+    db.refresh(db_user)
+    return db_user
+
+
+def _affected_project_ids(db: Session, *conditions: Any) -> List[int]:
+    """Proyectos con tareas que cumplen `conditions` (para recalcular contadores)"""
+    if not settings.PROJECT_STATS_COUNTERS:
+        return []
+    return db.scalars(
+        select(models.Task.project_id).where(
+            *conditions, models.Task.project_id.isnot(None)
+        ).distinct()
+    ).all()
+
+
+def delete_user(db: Session, user_id: int) -> bool:
+    """
+    Eliminar usuario
+    
+    Un único DELETE: proyectos, tareas, comentarios y asignaciones se borran
+    en la base de datos con ON DELETE CASCADE, sin cargarlos en la sesión.
+    """
+    project_ids = _affected_project_ids(db, models.Task.user_id == user_id)
+    search.remove_tasks_matching(db, select(models.Task.id).where(models.Task.user_id == user_id))
+    search.remove_comments_matching(
+        db, select(models.Comment.id).where(models.Comment.author_id == user_id)
+    )
+    
+    result = db.execute(
+        delete(models.User)
+        .where(models.User.id == user_id)
+        .execution_options(synchronize_session=False)
+    )
+    if not result.rowcount:
+        db.rollback()
         return False
     
-    db.delete(db_user)
+    if project_ids:
+        refresh_counters(db, project_ids)
     db.commit()
+    db.expire_all()
+    principal_cache.invalidate_user(user_id)
+    task_count_cache.invalidate()
     return True
 
 
@@ -87,35 +189,122 @@ def get_projects(
     db: Session, 
     owner_id: Optional[int] = None,
     skip: int = 0, 
-    limit: int = 100
+    limit: int = 100,
+    cursor: Optional[str] = None,
+    options: Sequence[Any] = ()
 ) -> List[models.Project]:
-    """Obtener lista de proyectos"""
-    query = db.query(models.Project)
+    """
+    Obtener lista de proyectos
+    
+    Con `cursor` se pagina por (created_at, id) en lugar de por offset; en
+    los dos casos con el mismo orden, para que las páginas sean estables.
+    `options` son opciones de carga (p. ej. `fieldsets.projection_options`).
+    """
+    query = select(models.Project).options(*options)
     
     if owner_id:
-        query = query.filter(models.Project.owner_id == owner_id)
+        query = query.where(models.Project.owner_id == owner_id)
+    
+    query = apply_keyset(query, models.Project.created_at, models.Project.id, cursor)
+    if cursor is None:
+        query = query.offset(skip)
+    
+    return db.scalars(query.limit(limit)).all()
+
+
+def get_projects_with_stats(
+    db: Session,
+    owner_id: Optional[int] = None,
+    skip: int = 0,
+    limit: int = 100,
+    cursor: Optional[str] = None
+) -> List[schemas.ProjectWithStats]:
+    """
+    Obtener lista de proyectos con estadísticas de tareas
+    
+    Las estadísticas de toda la página se calculan con una sola consulta
+    """
+    projects = get_projects(db, owner_id=owner_id, skip=skip, limit=limit, cursor=cursor)
+    stats = get_project_stats(db, [project.id for project in projects])
+    
+    return [
+        schemas.ProjectWithStats.model_validate(project).model_copy(update=stats[project.id])
+        for project in projects
+    ]
+
+
+SLUG_MAX_LENGTH = 100
+SLUG_MAX_ATTEMPTS = 10
+
+
+def _next_free_slug(db: Session, base_slug: str) -> str:
+    """
+    Siguiente slug libre (`base`, `base-1`, `base-2`...)
     
-    return query.offset(skip).limit(limit).all()
+    Sólo cuentan como sufijos los slugs `base-<n>` (expresión regular en la
+    base de datos) y el mayor se calcula con MAX, sin traer filas. No cuentan
+    los de proyectos cuyo nombre ya acaba en ese número ("Marketing 2024"
+    tiene `marketing-2024` como slug base, no como sufijo); si el siguiente
+    sufijo lo ocupa uno de ellos, se sigue al mayor de todos.
+    """
+    slug = models.Project.slug
+    suffix = func.substr(slug, len(base_slug) + 2)
+    suffixed = and_(
+        slug.startswith(f"{base_slug}-", autoescape=True),
+        slug.regexp_match(f"^{re.escape(base_slug)}-[0-9]{{1,9}}$")
+    )
+    # CASE: el CAST sólo se evalúa sobre sufijos numéricos
+    number = case((suffixed, cast(suffix, Integer)))
+    base_taken, highest_generated, highest = db.execute(
+        select(
+            func.count(case((slug == base_slug, 1))),
+            func.max(case((~models.Project.name.endswith(suffix), number))),
+            func.max(number),
+        )
+        .where(or_(slug == base_slug, suffixed))
+    ).one()
+    
+    if not base_taken:
+        return base_slug
+    
+    candidate = (highest_generated or 0) + 1
+    if highest and candidate <= highest and db.scalar(
+        select(func.count()).where(slug == f"{base_slug}-{candidate}")
+    ):
+        candidate = highest + 1
+    return f"{base_slug}-{candidate}"
 
 
 def create_project(db: Session, project: schemas.ProjectCreate, owner_id: int) -> models.Project:
-    """Crear nuevo proyecto"""
+    """
+    Crear nuevo proyecto
+    
+    Se intenta insertar directamente con el slug base. Sólo si choca con la
+    restricción única se busca el siguiente sufijo libre (una consulta) y se
+    reintenta, lo que también resuelve creaciones concurrentes con el mismo
+    nombre.
+    """
     from slugify import slugify
     
-    slug = slugify(project.name)
-    # Asegurar slug único
-    base_slug = slug
-    counter = 1
-    while get_project_by_slug(db, slug):
-        slug = f"{base_slug}-{counter}"
-        counter += 1
-    
-    db_project = models.Project(
-        **project.model_dump(),
-        slug=slug,
-        owner_id=owner_id
-    )
-    db.add(db_project)
+    # Dejar sitio para el sufijo "-<n>"
+    base_slug = slugify(project.name, max_length=SLUG_MAX_LENGTH - 8) or "project"
+    slug = base_slug
+    
+    for attempt in range(SLUG_MAX_ATTEMPTS):
+        db_project = models.Project(
+            **project.model_dump(),
+            slug=slug,
+            owner_id=owner_id
+        )
+        try:
+            with db.begin_nested():
+                db.add(db_project)
+            break
+        except IntegrityError:
+            if attempt == SLUG_MAX_ATTEMPTS - 1:
+                raise
+            slug = _next_free_slug(db, base_slug)
+    
     db.commit()
     db.refresh(db_project)
     return db_project
@@ -141,48 +330,448 @@ def update_project(
 
 
 def delete_project(db: Session, project_id: int) -> bool:
-    """Eliminar proyecto"""
-    db_project = get_project(db, project_id)
-    if not db_project:
+    """
+    Eliminar proyecto
+    
+    Las tareas y sus comentarios se borran en la base de datos con
+    ON DELETE CASCADE. Para proyectos muy grandes, ver `purge_project`.
+    """
+    search.remove_tasks_matching(db, select(models.Task.id).where(models.Task.project_id == project_id))
+    
+    result = db.execute(
+        delete(models.Project)
+        .where(models.Project.id == project_id)
+        .execution_options(synchronize_session=False)
+    )
+    if not result.rowcount:
+        db.rollback()
         return False
     
-    db.delete(db_project)
     db.commit()
+    db.expire_all()
+    task_count_cache.invalidate()
     return True
 
 
-# ============ Task CRUD ============
+def purge_project(db: Session, project_id: int, chunk_size: Optional[int] = None) -> int:
+    """
+    Eliminar un proyecto grande por partes
+    
+    El proyecto se desactiva y sus tareas se borran en lotes de `chunk_size`
+    (cada uno en su transacción, empezando por las más recientes para que
+    las subtareas caigan antes que sus padres); al final se borra el
+    proyecto. Pensado para ejecutarse en segundo plano.
+    
+    Returns:
+        Número de tareas borradas
+    """
+    chunk_size = chunk_size or settings.PROJECT_PURGE_CHUNK_SIZE
+    db.execute(
+        update(models.Project)
+        .where(models.Project.id == project_id)
+        .values(is_active=False)
+        .execution_options(synchronize_session=False)
+    )
+    db.commit()
+    
+    deleted = 0
+    while True:
+        task_ids = db.scalars(
+            select(models.Task.id)
+            .where(models.Task.project_id == project_id)
+            .order_by(models.Task.id.desc())
+            .limit(chunk_size)
+        ).all()
+        if not task_ids:
+            break
+        search.remove_tasks(db, task_ids)
+        db.execute(
+            delete(models.Task)
+            .where(models.Task.id.in_(task_ids))
+            .execution_options(synchronize_session=False)
+        )
+        db.commit()
+        deleted += len(task_ids)
+        task_count_cache.invalidate()
+    
+    delete_project(db, project_id)
+    return deleted
 
-def get_task(db: Session, task_id: int) -> Optional[models.Task]:
-    """Obtener tarea por ID"""
-    return db.query(models.Task).filter(models.Task.id == task_id).first()
 
+# ============ Task CRUD ============
 
-def get_tasks(
+def get_task(
     db: Session,
+    task_id: int,
+    options: Sequence[Any] = (),
+    include_archived: bool = False,
+    archived_options: Sequence[Any] = ()
+) -> Optional[models.Task]:
+    """
+    Obtener tarea por ID
+    
+    `options` son opciones de carga, normalmente
+    `loader_options(models.Task, <schema de respuesta>)`. Con
+    `include_archived`, si no está activa se busca en `archived_tasks`
+    (cargada con `archived_options`).
+    """
+    task = db.query(models.Task).options(*options).filter(models.Task.id == task_id).first()
+    if task is None and include_archived:
+        return db.scalars(
+            select(models.ArchivedTask)
+            .where(models.ArchivedTask.id == task_id)
+            .options(*archived_options)
+        ).first()
+    return task
+
+
+def task_visible_to(task: Any, user: models.User) -> bool:
+    """
+    Si `user` puede ver `task` (propietario, asignado o superusuario)
+
+    `task` (activa o archivada) debe tener `assignees` ya cargado.
+    """
+    if user.is_superuser or task.user_id == user.id:
+        return True
+    return any(assignee.id == user.id for assignee in task.assignees)
+
+
+def _select_accessible_task(task_id: int, user: models.User) -> Select:
+    """ID de la tarea si `user` puede verla (compartida sync/async)"""
+    query = select(models.Task.id).where(models.Task.id == task_id)
+    if not user.is_superuser:
+        query = query.where(or_(
+            models.Task.user_id == user.id,
+            models.Task.assignees.any(models.User.id == user.id)
+        ))
+    return query
+
+
+def can_access_task(db: Session, task_id: int, user: models.User) -> bool:
+    """
+    Si la tarea existe y `user` puede verla (mismo criterio que
+    `task_visible_to`), con una sola consulta
+    """
+    return db.scalar(_select_accessible_task(task_id, user)) is not None
+
+
+async def can_access_task_async(db: AsyncSession, task_id: int, user: models.User) -> bool:
+    """Como `can_access_task` (async)"""
+    return await db.scalar(_select_accessible_task(task_id, user)) is not None
+
+
+async def get_task_async(
+    db: AsyncSession,
+    task_id: int,
+    options: Optional[Sequence[Any]] = None,
+    include_archived: bool = False,
+    archived_options: Sequence[Any] = ()
+) -> Optional[models.Task]:
+    """
+    Obtener tarea por ID (async)
+
+    Como `get_task`. En async no hay lazy loading: `options` debe cargar
+    todo lo que se serializa (por defecto, lo de `schemas.Task`).
+    """
+    if options is None:
+        options = loader_options(models.Task, schemas.Task)
+    task = (await db.scalars(
+        select(models.Task).options(*options).where(models.Task.id == task_id)
+    )).first()
+    if task is None and include_archived:
+        task = (await db.scalars(
+            select(models.ArchivedTask)
+            .where(models.ArchivedTask.id == task_id)
+            .options(*archived_options)
+        )).first()
+    return task
+
+
+def _task_filters(
     user_id: Optional[int] = None,
     project_id: Optional[int] = None,
     status: Optional[models.Status] = None,
     priority: Optional[models.Priority] = None,
-    skip: int = 0,
-    limit: int = 100
-) -> List[models.Task]:
-    """Obtener lista de tareas con filtros"""
-    query = db.query(models.Task)
+    tags_any: Optional[List[str]] = None,
+    tags_all: Optional[List[str]] = None,
+    model: Any = models.Task
+) -> List[Any]:
+    """Condiciones WHERE de los filtros de listado de tareas (o de `model`)"""
+    conditions = []
     
     if user_id:
-        query = query.filter(models.Task.user_id == user_id)
+        conditions.append(model.user_id == user_id)
     
     if project_id:
-        query = query.filter(models.Task.project_id == project_id)
+        conditions.append(model.project_id == project_id)
     
     if status:
-        query = query.filter(models.Task.status == status)
+        conditions.append(model.status == status)
     
     if priority:
-        query = query.filter(models.Task.priority == priority)
+        conditions.append(model.priority == priority)
+    
+    if model is models.ArchivedTask:
+        return conditions + archived_tag_conditions(tags_any, tags_all)
+    
+    # Etiquetas: subconsultas sobre task_tags (índices), no LIKE sobre Task.tags
+    if tags_any:
+        conditions.append(models.Task.id.in_(tagged_task_ids(normalize_tag_names(tags_any))))
+    
+    if tags_all:
+        conditions.append(models.Task.id.in_(
+            tagged_task_ids(normalize_tag_names(tags_all), match_all=True)
+        ))
+    
+    return conditions
+
+
+def _select_tasks(
+    user_id: Optional[int] = None,
+    project_id: Optional[int] = None,
+    status: Optional[models.Status] = None,
+    priority: Optional[models.Priority] = None,
+    skip: int = 0,
+    limit: int = 100,
+    cursor: Optional[str] = None,
+    tags_any: Optional[List[str]] = None,
+    tags_all: Optional[List[str]] = None,
+    model: Any = models.Task
+) -> Select:
+    """Construye la consulta de tareas con filtros (compartida sync/async)"""
+    query = select(model).where(
+        *_task_filters(user_id, project_id, status, priority, tags_any, tags_all, model)
+    )
+    
+    # Con cursor se pagina por (created_at, id); sin él, por offset
+    query = apply_keyset(query, model.created_at, model.id, cursor)
+    if cursor is None:
+        query = query.offset(skip)
+    
+    return query.limit(limit)
+
+
+def get_tasks(
+    db: Session,
+    user_id: Optional[int] = None,
+    project_id: Optional[int] = None,
+    status: Optional[models.Status] = None,
+    priority: Optional[models.Priority] = None,
+    skip: int = 0,
+    limit: int = 100,
+    cursor: Optional[str] = None,
+    options: Sequence[Any] = (),
+    tags_any: Optional[List[str]] = None,
+    tags_all: Optional[List[str]] = None,
+    include_archived: bool = False,
+    archived_options: Sequence[Any] = ()
+) -> List[models.Task]:
+    """
+    Obtener lista de tareas con filtros
+    
+    `options` son opciones de carga, normalmente
+    `loader_options(models.Task, <schema de respuesta>)`.
+    `tags_any` / `tags_all`: tareas con alguna / todas las etiquetas.
+    `include_archived`: añade las tareas archivadas, mezcladas por
+    (created_at, id) descendente.
+    """
+    queries = _task_list_queries(
+        user_id, project_id, status, priority, skip, limit, cursor, tags_any, tags_all,
+        options, include_archived, archived_options
+    )
+    results = [task for query in queries for task in db.scalars(query).all()]
+    return _merge_task_pages(results, include_archived, skip, limit, cursor)
+
+
+def _task_list_queries(
+    user_id: Optional[int],
+    project_id: Optional[int],
+    status: Optional[models.Status],
+    priority: Optional[models.Priority],
+    skip: int,
+    limit: int,
+    cursor: Optional[str],
+    tags_any: Optional[List[str]],
+    tags_all: Optional[List[str]],
+    options: Sequence[Any],
+    include_archived: bool,
+    archived_options: Sequence[Any]
+) -> List[Select]:
+    """Consultas de `get_tasks` (una, o dos con las archivadas; compartida sync/async)"""
+    if not include_archived:
+        return [_select_tasks(
+            user_id, project_id, status, priority, skip, limit, cursor, tags_any, tags_all
+        ).options(*options)]
+    
+    # Se piden skip + limit filas a cada tabla y se mezclan en `_merge_task_pages`
+    window = limit if cursor else skip + limit
+    return [
+        _select_tasks(
+            user_id, project_id, status, priority, 0, window, cursor, tags_any, tags_all, model
+        ).options(*model_options)
+        for model, model_options in (
+            (models.Task, options),
+            (models.ArchivedTask, archived_options),
+        )
+    ]
+
+
+def _merge_task_pages(
+    results: List[Any],
+    include_archived: bool,
+    skip: int,
+    limit: int,
+    cursor: Optional[str]
+) -> List[Any]:
+    """Mezcla activas y archivadas por (created_at, id) descendente y corta la página"""
+    if not include_archived:
+        return results
+    results.sort(key=lambda task: (task.created_at, task.id), reverse=True)
+    offset = 0 if cursor else skip
+    return results[offset:offset + limit]
+
+
+async def get_tasks_async(
+    db: AsyncSession,
+    user_id: Optional[int] = None,
+    project_id: Optional[int] = None,
+    status: Optional[models.Status] = None,
+    priority: Optional[models.Priority] = None,
+    skip: int = 0,
+    limit: int = 100,
+    cursor: Optional[str] = None,
+    options: Optional[Sequence[Any]] = None,
+    tags_any: Optional[List[str]] = None,
+    tags_all: Optional[List[str]] = None,
+    include_archived: bool = False,
+    archived_options: Sequence[Any] = ()
+) -> List[models.Task]:
+    """
+    Obtener lista de tareas con filtros (async)
+
+    Como `get_tasks`. En async no hay lazy loading: `options` debe cargar
+    todo lo que se serializa (por defecto, lo de `schemas.Task`).
+    """
+    if options is None:
+        options = loader_options(models.Task, schemas.Task)
+    queries = _task_list_queries(
+        user_id, project_id, status, priority, skip, limit, cursor, tags_any, tags_all,
+        options, include_archived, archived_options
+    )
+    results = []
+    for query in queries:
+        results.extend((await db.scalars(query)).all())
+    return _merge_task_pages(results, include_archived, skip, limit, cursor)
+
+
+# Conteos cacheados de tareas por filtro (CountMode.CACHED)
+task_count_cache = CountCache(
+    ttl_seconds=settings.TASK_COUNT_CACHE_TTL_SECONDS,
+    max_size=settings.TASK_COUNT_CACHE_MAX_SIZE
+)
+
+
+def count_tasks(
+    db: Session,
+    mode: CountMode = CountMode.EXACT,
+    user_id: Optional[int] = None,
+    project_id: Optional[int] = None,
+    status: Optional[models.Status] = None,
+    priority: Optional[models.Priority] = None,
+    tags_any: Optional[List[str]] = None,
+    tags_all: Optional[List[str]] = None
+) -> int:
+    """
+    Total de tareas que cumplen los filtros de `get_tasks`
+    
+    - exact: COUNT(*) en cada llamada
+    - cached: COUNT(*) cacheado por filtro; las escrituras de tareas lo invalidan
+    - estimated: estimación del planner; si estima menos de
+      COUNT_ESTIMATE_THRESHOLD filas se cuenta de forma exacta
+    """
+    conditions = _task_filters(user_id, project_id, status, priority, tags_any, tags_all)
+    query = select(models.Task.id).where(*conditions)
+    
+    if mode == CountMode.ESTIMATED:
+        estimate = planner_estimate(
+            db, query, models.Task.__tablename__, filtered=bool(conditions)
+        )
+        if estimate is not None and estimate >= settings.COUNT_ESTIMATE_THRESHOLD:
+            return estimate
+        return exact_count(db, query)
     
-    return query.order_by(models.Task.created_at.desc()).offset(skip).limit(limit).all()
+    if mode == CountMode.CACHED:
+        key = (
+            user_id or None, project_id or None, status or None, priority or None,
+            tuple(sorted(normalize_tag_names(tags_any or []))),
+            tuple(sorted(normalize_tag_names(tags_all or [])))
+        )
+        cached = task_count_cache.get(key)
+        if cached is not None:
+            return cached
+        generation = task_count_cache.generation(key[0])
+        total = exact_count(db, query)
+        task_count_cache.set(key, total, generation)
+        return total
+    
+    return exact_count(db, query)
+
+
+def archive_old_tasks(db: Session, older_than_days: Optional[int] = None) -> int:
+    """Mueve a almacenamiento frío las tareas terminadas antiguas (ver archive.py)"""
+    archived = archive_tasks(db, older_than_days)
+    if archived:
+        task_count_cache.invalidate()
+    return archived
+
+
+def restore_archived_task(db: Session, task_id: int) -> Optional[models.Task]:
+    """Devuelve una tarea archivada a la tabla de tareas activas"""
+    task = restore_task(db, task_id)
+    if task is not None:
+        task_count_cache.invalidate(task.user_id)
+    return task
+
+
+def get_task_subtree(
+    db: Session,
+    task_id: int,
+    max_depth: int = settings.TASK_TREE_DEFAULT_DEPTH
+) -> Optional[Dict[str, Any]]:
+    """Subárbol de una tarea con agregados por nodo (ver task_tree.py)"""
+    return get_task_tree(db, task_id, max_depth)
+
+
+def get_project_task_forest(
+    db: Session,
+    project_id: int,
+    max_depth: int = settings.TASK_TREE_DEFAULT_DEPTH
+) -> List[Dict[str, Any]]:
+    """Árboles de tareas de un proyecto con agregados por nodo"""
+    return get_project_forest(db, project_id, max_depth)
+
+
+def get_task_tag_cloud(
+    db: Session,
+    user_id: Optional[int] = None,
+    project_id: Optional[int] = None,
+    limit: int = 50
+) -> List[Dict[str, Any]]:
+    """Etiquetas más usadas con su número de tareas"""
+    return [
+        {"name": name, "count": count}
+        for name, count in get_tag_cloud(db, user_id, project_id, limit)
+    ]
+
+
+def search_tasks(
+    db: Session,
+    query: str,
+    user_id: Optional[int] = None,
+    limit: int = 20
+) -> List[Dict[str, Any]]:
+    """Búsqueda de texto completo en tareas y comentarios (ver search.py)"""
+    return search.search(db, query, user_id=user_id, limit=limit)
 
 
 def create_task(db: Session, task: schemas.TaskCreate, user_id: int) -> models.Task:
@@ -191,7 +780,13 @@ def create_task(db: Session, task: schemas.TaskCreate, user_id: int) -> models.T
     db_task = models.Task(**task_data, user_id=user_id)
     
     db.add(db_task)
+    db.flush()
+    search.index_task(db, db_task)
+    if db_task.tags:
+        sync_task_tags(db, {db_task.id: db_task.tags})
+    adjust_counters(db, db_task.project_id, status_deltas(db_task.status))
     db.commit()
+    task_count_cache.invalidate(user_id)
     db.refresh(db_task)
     
     # Asignar usuarios si se especificaron
@@ -208,11 +803,194 @@ def create_task(db: Session, task: schemas.TaskCreate, user_id: int) -> models.T
     return db_task
 
 
+def _existing_ids(db: Session, column: Any, ids: set, *conditions: Any) -> set:
+    """Devuelve cuáles de `ids` existen en `column` y cumplen `conditions` (una sola consulta)"""
+    if not ids:
+        return set()
+    return set(db.scalars(select(column).where(column.in_(ids), *conditions)).all())
+
+
+def create_tasks_bulk(
+    db: Session,
+    items: List[Dict[str, Any]],
+    user_id: int,
+    atomic: bool = False,
+    owner_id: Optional[int] = None
+) -> schemas.TaskBulkCreateResult:
+    """
+    Crear tareas en lote en una sola transacción
+    
+    Cada elemento se valida como `TaskCreate` y se comprueba que sus
+    proyectos, tareas padre y asignados existan (una consulta por tipo de
+    referencia). Las tareas válidas se insertan con un INSERT multi-fila
+    con RETURNING y sus asignaciones con otro, y se hace un único commit.
+    
+    Con `owner_id`, los proyectos y tareas padre deben ser de ese usuario.
+    Un proyecto o tarea padre inexistente o ajeno (no se distinguen) es un
+    error del elemento, como cualquier otro: sin `atomic` sólo se descarta
+    ese elemento.
+    
+    Args:
+        db: Sesión de base de datos
+        items: Datos crudos de cada tarea
+        user_id: Propietario de las tareas
+        atomic: Si es True y algún elemento falla, no se crea ninguno
+        owner_id: Si se indica, sólo se admiten referencias a proyectos y
+            tareas de ese usuario (None para superusuarios)
+        
+    Returns:
+        IDs creados (en el orden de entrada) y errores por índice
+    """
+    result = schemas.TaskBulkCreateResult()
+    valid: List[tuple] = []
+    
+    for index, item in enumerate(items):
+        try:
+            valid.append((index, schemas.TaskCreate.model_validate(item)))
+        except ValidationError as e:
+            result.errors.append(schemas.BulkItemError(
+                index=index,
+                errors=e.errors(include_url=False, include_context=False)
+            ))
+    
+    # Validación referencial por lotes
+    projects = _existing_ids(
+        db, models.Project.id, {t.project_id for _, t in valid if t.project_id},
+        *([models.Project.owner_id == owner_id] if owner_id is not None else [])
+    )
+    parents = _existing_ids(
+        db, models.Task.id, {t.parent_task_id for _, t in valid if t.parent_task_id},
+        *([models.Task.user_id == owner_id] if owner_id is not None else [])
+    )
+    assignees = _existing_ids(
+        db, models.User.id, {a for _, t in valid for a in (t.assignee_ids or [])}
+    )
+    
+    to_insert = []
+    for index, task in valid:
+        errors = []
+        if task.project_id and task.project_id not in projects:
+            errors.append({"loc": ["project_id"], "msg": "Project not found", "type": "not_found"})
+        if task.parent_task_id and task.parent_task_id not in parents:
+            errors.append({"loc": ["parent_task_id"], "msg": "Parent task not found", "type": "not_found"})
+        missing = sorted(set(task.assignee_ids or []) - assignees)
+        if missing:
+            errors.append({"loc": ["assignee_ids"], "msg": f"Users not found: {missing}", "type": "not_found"})
+        
+        if errors:
+            result.errors.append(schemas.BulkItemError(index=index, errors=errors))
+        else:
+            to_insert.append(task)
+    
+    result.errors.sort(key=lambda error: error.index)
+    if not to_insert or (atomic and result.errors):
+        return result
+    
+    rows = [
+        {**task.model_dump(exclude={'assignee_ids'}), "user_id": user_id}
+        for task in to_insert
+    ]
+    created_ids = db.scalars(
+        insert(models.Task).returning(models.Task.id, sort_by_parameter_order=True),
+        rows
+    ).all()
+    
+    assignment_rows = [
+        {"task_id": task_id, "user_id": assignee_id}
+        for task_id, task in zip(created_ids, to_insert)
+        for assignee_id in dict.fromkeys(task.assignee_ids or [])
+    ]
+    if assignment_rows:
+        db.execute(insert(models.TaskAssignment), assignment_rows)
+    
+    search.index_tasks(db, [
+        (task_id, task.title, task.description)
+        for task_id, task in zip(created_ids, to_insert)
+    ])
+    sync_task_tags(db, {
+        task_id: task.tags
+        for task_id, task in zip(created_ids, to_insert)
+        if task.tags
+    })
+    
+    project_deltas: Dict[int, Dict[str, int]] = {}
+    for task in to_insert:
+        if task.project_id:
+            deltas = project_deltas.setdefault(task.project_id, dict.fromkeys(status_deltas(None), 0))
+            for field, delta in status_deltas(task.status).items():
+                deltas[field] += delta
+    for project_id, deltas in project_deltas.items():
+        adjust_counters(db, project_id, deltas)
+    
+    db.commit()
+    task_count_cache.invalidate(user_id)
+    result.created_ids = list(created_ids)
+    return result
+
+
+def set_task_assignees(
+    db: Session,
+    task_id: int,
+    assignee_ids: List[int]
+) -> schemas.AssigneeDiff:
+    """
+    Sincronizar las asignaciones de una tarea con `assignee_ids` (sin commit)
+    
+    Sólo se insertan los usuarios nuevos y se borran los que sobran, cada
+    grupo en una sentencia; las asignaciones que se mantienen conservan su
+    `assigned_at`.
+    
+    Returns:
+        Usuarios añadidos y eliminados
+    """
+    current = set(db.scalars(
+        select(models.TaskAssignment.user_id).where(models.TaskAssignment.task_id == task_id)
+    ).all())
+    desired = set(assignee_ids)
+    
+    added = sorted(desired - current)
+    removed = sorted(current - desired)
+    
+    if removed:
+        db.execute(
+            delete(models.TaskAssignment)
+            .where(
+                models.TaskAssignment.task_id == task_id,
+                models.TaskAssignment.user_id.in_(removed)
+            )
+            .execution_options(synchronize_session=False)
+        )
+    
+    if added:
+        db.execute(
+            insert(models.TaskAssignment),
+            [{"task_id": task_id, "user_id": user_id} for user_id in added]
+        )
+    
+    return schemas.AssigneeDiff(added=added, removed=removed)
+
+
 def update_task(db: Session, task_id: int, task: schemas.TaskUpdate) -> Optional[models.Task]:
     """Actualizar tarea"""
+    db_task, _ = update_task_with_assignee_diff(db, task_id, task)
+    return db_task
+
+
+def update_task_with_assignee_diff(
+    db: Session,
+    task_id: int,
+    task: schemas.TaskUpdate
+) -> Tuple[Optional[models.Task], Optional[schemas.AssigneeDiff]]:
+    """
+    Actualizar tarea devolviendo también los cambios de asignación
+    
+    Returns:
+        Tupla (tarea o None si no existe, diff de asignados o None si no se
+        enviaron `assignee_ids`). Permite notificar sólo a los nuevos asignados.
+    """
     db_task = get_task(db, task_id)
     if not db_task:
-        return None
+        return None, None
     
     update_data = task.model_dump(exclude_unset=True, exclude={'assignee_ids'})
     
@@ -220,37 +998,171 @@ def update_task(db: Session, task_id: int, task: schemas.TaskUpdate) -> Optional
     if 'status' in update_data and update_data['status'] == models.Status.COMPLETED:
         update_data['completed_at'] = datetime.utcnow()
     
+    previous_project_id, previous_status = db_task.project_id, db_task.status
+    
     for field, value in update_data.items():
         setattr(db_task, field, value)
     
+    if 'title' in update_data or 'description' in update_data:
+        search.index_task(db, db_task)
+    
+    if 'tags' in update_data:
+        sync_task_tags(db, {db_task.id: db_task.tags})
+    
+    if (db_task.project_id, db_task.status) != (previous_project_id, previous_status):
+        adjust_counters(db, previous_project_id, status_deltas(previous_status, -1))
+        adjust_counters(db, db_task.project_id, status_deltas(db_task.status))
+    
     # Actualizar asignaciones si se especificaron
+    assignee_diff = None
     if task.assignee_ids is not None:
-        # Eliminar asignaciones actuales
-        db.query(models.TaskAssignment).filter(
-            models.TaskAssignment.task_id == task_id
-        ).delete()
-        
-        # Crear nuevas asignaciones
-        for assignee_id in task.assignee_ids:
-            assignment = models.TaskAssignment(
-                task_id=task_id,
-                user_id=assignee_id
-            )
-            db.add(assignment)
+        assignee_diff = set_task_assignees(db, task_id, task.assignee_ids)
     
     db.commit()
+    task_count_cache.invalidate(db_task.user_id)
     db.refresh(db_task)
-    return db_task
+    return db_task, assignee_diff
+
+
+def _bulk_task_conditions(
+    changes: schemas.TaskBulkUpdate,
+    owner_id: Optional[int]
+) -> List[Any]:
+    """Condiciones WHERE que seleccionan las tareas de una operación en lote"""
+    conditions = []
+    if owner_id is not None:
+        conditions.append(models.Task.user_id == owner_id)
+    
+    if changes.task_ids is not None:
+        conditions.append(models.Task.id.in_(changes.task_ids))
+    else:
+        task_filter = changes.filter
+        if task_filter.project_id is not None:
+            conditions.append(models.Task.project_id == task_filter.project_id)
+        if task_filter.status is not None:
+            conditions.append(models.Task.status == task_filter.status)
+        if task_filter.priority is not None:
+            conditions.append(models.Task.priority == task_filter.priority)
+        if task_filter.assignee_id is not None:
+            conditions.append(models.Task.assignees.any(models.User.id == task_filter.assignee_id))
+    
+    return conditions
+
+
+def bulk_update_tasks(
+    db: Session,
+    changes: schemas.TaskBulkUpdate,
+    owner_id: Optional[int] = None
+) -> schemas.TaskBulkUpdateResult:
+    """
+    Actualizar estado/prioridad/asignado de muchas tareas con sentencias set-based
+    
+    Los cambios de estado y prioridad se aplican en un único UPDATE y la
+    reasignación en un UPDATE sobre task_assignments. `completed_at` se
+    mantiene igual que en `update_task`.
+    
+    Args:
+        db: Sesión de base de datos
+        changes: Tareas objetivo (IDs o filtro) y cambios a aplicar
+        owner_id: Si se indica, sólo se modifican tareas de ese usuario
+    """
+    conditions = _bulk_task_conditions(changes, owner_id)
+    
+    values = {}
+    if changes.status is not None:
+        values['status'] = changes.status
+        # Actualizar completed_at si el status cambió a completed
+        if changes.status == models.Status.COMPLETED:
+            values['completed_at'] = datetime.utcnow()
+    if changes.priority is not None:
+        values['priority'] = changes.priority
+    
+    # Si hay cambio de campos y reasignación, el primer UPDATE puede alterar
+    # el resultado del filtro: fijar antes el conjunto de tareas
+    if values and changes.reassign_from is not None:
+        task_ids = db.scalars(select(models.Task.id).where(*conditions)).all()
+        conditions = [models.Task.id.in_(task_ids)]
+    
+    result = schemas.TaskBulkUpdateResult()
+    
+    if changes.reassign_from is not None:
+        target_tasks = select(models.Task.id).where(*conditions)
+        assignment = models.TaskAssignment
+        # Donde el nuevo usuario ya estaba asignado, sólo sobra la asignación
+        # antigua (origen y destino son distintos: lo garantiza TaskBulkUpdate)
+        db.execute(
+            delete(assignment)
+            .where(
+                assignment.user_id == changes.reassign_from,
+                assignment.task_id.in_(target_tasks),
+                assignment.task_id.in_(
+                    select(assignment.task_id).where(assignment.user_id == changes.reassign_to)
+                )
+            )
+            .execution_options(synchronize_session=False)
+        )
+        result.reassigned = db.execute(
+            update(assignment)
+            .where(
+                assignment.user_id == changes.reassign_from,
+                assignment.task_id.in_(target_tasks)
+            )
+            .values(user_id=changes.reassign_to, assigned_at=func.now())
+            .execution_options(synchronize_session=False)
+        ).rowcount
+    
+    if values:
+        affected_projects = []
+        if settings.PROJECT_STATS_COUNTERS and 'status' in values:
+            affected_projects = db.scalars(
+                select(models.Task.project_id).where(*conditions).distinct()
+            ).all()
+        
+        result.updated = db.execute(
+            update(models.Task)
+            .where(*conditions)
+            .values(**values)
+            .execution_options(synchronize_session=False)
+        ).rowcount
+        
+        refresh_counters(db, affected_projects)
+    
+    db.commit()
+    task_count_cache.invalidate(owner_id)
+    return result
 
 
 def delete_task(db: Session, task_id: int) -> bool:
-    """Eliminar tarea"""
+    """
+    Eliminar tarea
+    
+    Las subtareas (todo el subárbol), sus comentarios, etiquetas y
+    asignaciones se borran en la base de datos con ON DELETE CASCADE.
+    """
     db_task = get_task(db, task_id)
     if not db_task:
         return False
     
+    project_id = db_task.project_id
+    has_subtasks = False
+    if settings.PROJECT_STATS_COUNTERS:
+        has_subtasks = db.scalar(
+            select(models.Task.id).where(models.Task.parent_task_id == task_id).limit(1)
+        ) is not None
+    
+    # Antes del DELETE: en SQLite el índice no sigue la cascada
+    search.remove_tasks_matching(db, subtree_ids(task_id))
+    search.remove_task(db, task_id)
     db.delete(db_task)
+    db.execute(delete(models.TaskTag).where(models.TaskTag.task_id == task_id))
+    if has_subtasks:
+        # El subárbol se borra en cascada: recalcular
+        db.flush()
+        refresh_counters(db, [project_id])
+    else:
+        adjust_counters(db, project_id, status_deltas(db_task.status, -1))
     db.commit()
+    task_count_cache.invalidate(db_task.user_id)
     return True
 
 
@@ -261,11 +1173,94 @@ def get_comment(db: Session, comment_id: int) -> Optional[models.Comment]:
     return db.query(models.Comment).filter(models.Comment.id == comment_id).first()
 
 
-def get_comments_by_task(db: Session, task_id: int) -> List[models.Comment]:
-    """Obtener comentarios de una tarea"""
-    return db.query(models.Comment).filter(
-        models.Comment.task_id == task_id
-    ).order_by(models.Comment.created_at.desc()).all()
+def _select_comments_by_task(
+    task_id: int,
+    limit: Optional[int] = None,
+    cursor: Optional[str] = None
+) -> Select:
+    """Construye la consulta de comentarios de una tarea"""
+    query = select(models.Comment).where(models.Comment.task_id == task_id)
+    query = apply_keyset(query, models.Comment.created_at, models.Comment.id, cursor)
+    if limit is not None:
+        query = query.limit(limit)
+    return query
+
+
+def get_comments_by_task(
+    db: Session,
+    task_id: int,
+    limit: Optional[int] = None,
+    cursor: Optional[str] = None,
+    options: Sequence[Any] = ()
+) -> List[models.Comment]:
+    """Obtener comentarios de una tarea (todos si no se indica `limit`)"""
+    query = _select_comments_by_task(task_id, limit, cursor).options(*options)
+    return db.scalars(query).all()
+
+
+def compact_comment_options() -> Tuple[Any, ...]:
+    """
+    Opciones de carga para `schemas.CommentCompact`: los autores de la
+    página en una sola consulta IN, sólo con las columnas que se serializan
+    """
+    return (
+        selectinload(models.Comment.author).load_only(
+            models.User.id,
+            models.User.username,
+            models.User.full_name,
+            models.User.avatar_url
+        ),
+    )
+
+
+def iter_comments_by_task(
+    db: Session,
+    task_id: int,
+    batch_size: int = 500,
+    options: Sequence[Any] = ()
+) -> Iterator[List[models.Comment]]:
+    """
+    Recorre todos los comentarios de una tarea en lotes por cursor
+    
+    Cada lote se saca de la sesión después de entregarlo, así que la memoria
+    no crece con la longitud del hilo. Si el cursor dejara de avanzar, el
+    recorrido se corta en lugar de repetir el mismo lote indefinidamente.
+    """
+    cursor = None
+    while True:
+        comments = get_comments_by_task(db, task_id, limit=batch_size, cursor=cursor, options=options)
+        if not comments:
+            return
+        yield comments
+        if len(comments) < batch_size:
+            return
+        last = comments[-1]
+        following = encode_cursor(last.created_at, last.id)
+        if following == cursor:
+            logger.error(f"Comment cursor did not advance for task {task_id}; stopping")
+            return
+        cursor = following
+        db.expunge_all()
+
+
+async def get_comments_by_task_async(
+    db: AsyncSession,
+    task_id: int,
+    limit: Optional[int] = None,
+    cursor: Optional[str] = None,
+    options: Optional[Sequence[Any]] = None
+) -> List[models.Comment]:
+    """
+    Obtener comentarios de una tarea (async)
+
+    `options` debe cargar todo lo que se serializa (por defecto, lo de
+    `schemas.Comment`).
+    """
+    if options is None:
+        options = loader_options(models.Comment, schemas.Comment)
+    query = _select_comments_by_task(task_id, limit, cursor).options(*options)
+    result = await db.scalars(query)
+    return result.all()
 
 
 def create_comment(
@@ -280,6 +1275,8 @@ def create_comment(
         author_id=author_id
     )
     db.add(db_comment)
+    db.flush()
+    search.index_comment(db, db_comment)
     db.commit()
     db.refresh(db_comment)
     return db_comment
@@ -296,6 +1293,7 @@ def update_comment(
         return None
     
     db_comment.content = comment.content
+    search.index_comment(db, db_comment)
     db.commit()
     db.refresh(db_comment)
     return db_comment
@@ -308,5 +1306,6 @@ def delete_comment(db: Session, comment_id: int) -> bool:
         return False
     
     db.delete(db_comment)
+    search.remove_comment(db, comment_id)
     db.commit()
     return True
\ No newline at end of file
@@ -1,53 +1,185 @@
+from fastapi import Depends
 from sqlalchemy import create_engine, event
+from sqlalchemy.engine import URL, Engine, make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker, Session
-from sqlalchemy.pool import QueuePool
-from typing import Generator
+from typing import AsyncGenerator, Generator, List, Optional
 import logging
 from .config import settings
+from .db_routing import RedisStickyStore, RoutingSession, set_sticky_store
+from .pool_metrics import InstrumentedAsyncQueuePool, InstrumentedQueuePool, instrument_engine
 
 logger = logging.getLogger(__name__)
 
-# Configuración del engine con pool de conexiones
-engine = create_engine(
-    settings.DATABASE_URL,
-    poolclass=QueuePool,
-    pool_size=10,
-    max_overflow=20,
-    pool_pre_ping=True,  # Verifica conexiones antes de usarlas
-    pool_recycle=3600,   # Recicla conexiones cada hora
-    echo=settings.DB_ECHO,
-    connect_args={
-        "connect_timeout": 10,
-        "keepalives": 1,
-        "keepalives_idle": 30,
-        "keepalives_interval": 10,
-        "keepalives_count": 5,
-    }
-)
+
+def enable_sqlite_foreign_keys(db_engine: Engine) -> None:
+    """
+    Activa las claves foráneas en SQLite (desactivadas por defecto) para
+    que los borrados se propaguen con ON DELETE CASCADE como en PostgreSQL
+    """
+    if db_engine.dialect.name != "sqlite":
+        return
+
+    @event.listens_for(db_engine, "connect")
+    def _set_foreign_keys(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA foreign_keys=ON")
+        cursor.close()
+
+
+def create_db_engine(url: str, name: str) -> Engine:
+    """
+    Crea un engine síncrono con el pool instrumentado
+
+    Args:
+        url: URL de la base de datos
+        name: Nombre del pool en las métricas
+    """
+    connect_args = {}
+    if make_url(url).get_backend_name() == "postgresql":
+        connect_args = {
+            "connect_timeout": 10,
+            "keepalives": 1,
+            "keepalives_idle": 30,
+            "keepalives_interval": 10,
+            "keepalives_count": 5,
+        }
+
+    db_engine = create_engine(
+        url,
+        poolclass=InstrumentedQueuePool,
+        pool_size=10,
+        max_overflow=20,
+        pool_pre_ping=True,  # Verifica conexiones antes de usarlas
+        pool_recycle=3600,   # Recicla conexiones cada hora
+        echo=settings.DB_ECHO,
+        connect_args=connect_args
+    )
+    instrument_engine(db_engine, name)
+    enable_sqlite_foreign_keys(db_engine)
+    return db_engine
+
+
+# Driver async para cada backend (los síncronos se sustituyen)
+ASYNC_DRIVERS = {
+    "postgresql": "asyncpg",
+    "sqlite": "aiosqlite",
+}
+
+
+def get_async_database_url(url: str) -> URL:
+    """
+    Deriva la URL del driver async a partir de DATABASE_URL
+    (psycopg2, psycopg, pg8000... -> asyncpg; pysqlite -> aiosqlite).
+    Las URLs que ya usan un driver async se dejan como están.
+
+    Raises:
+        ValueError: Si el backend no tiene driver async configurado
+    """
+    parsed = make_url(url)
+    if parsed.get_driver_name() in ("asyncpg", "psycopg_async", "aiosqlite", "aiomysql", "asyncmy"):
+        return parsed
+    backend = parsed.get_backend_name()
+    if backend not in ASYNC_DRIVERS:
+        raise ValueError(f"No async driver configured for {backend}; set ASYNC_DATABASE_URL")
+    return parsed.set(drivername=f"{backend}+{ASYNC_DRIVERS[backend]}")
+
+
+def create_async_db_engine(url: str, name: str) -> AsyncEngine:
+    """
+    Crea un engine async con el mismo dimensionado de pool que el síncrono
+    """
+    async_url = get_async_database_url(url)
+    connect_args = {}
+    if async_url.get_backend_name() == "postgresql":
+        connect_args = {"timeout": 10}
+
+    db_engine = create_async_engine(
+        async_url,
+        poolclass=InstrumentedAsyncQueuePool,
+        pool_size=10,
+        max_overflow=20,
+        pool_pre_ping=True,
+        pool_recycle=3600,
+        echo=settings.DB_ECHO,
+        connect_args=connect_args
+    )
+    instrument_engine(db_engine.sync_engine, name)
+    enable_sqlite_foreign_keys(db_engine.sync_engine)
+    return db_engine
+
+
+# Engine principal (escrituras) y réplicas de lectura opcionales
+engine = create_db_engine(settings.DATABASE_URL, "primary")
+replica_engines = [
+    create_db_engine(url, f"replica_{index}")
+    for index, url in enumerate(settings.DATABASE_REPLICA_URLS)
+]
+
+# Read-your-writes compartido entre workers (sólo cuenta si hay réplicas)
+if replica_engines and settings.REPLICA_STICKY_BACKEND == "redis":
+    set_sticky_store(RedisStickyStore(settings.REDIS_URL))
 
 # SessionLocal class
+# Las lecturas van a las réplicas (si hay) y las escrituras al primario
 SessionLocal = sessionmaker(
+    class_=RoutingSession,
     autocommit=False,
     autoflush=False,
-    bind=engine
+    bind=engine,
+    primary=engine,
+    replicas=replica_engines,
+    sticky_seconds=settings.REPLICA_STICKY_SECONDS
 )
 
-# Base class for models
-Base = declarative_base()
+class _AsyncDatabase:
+    """
+    Engines async y su sessionmaker, creados en el primer uso
 
+    Así importar la aplicación (o usar sólo la parte síncrona) no exige
+    el driver async instalado.
+    """
+
+    def __init__(self):
+        self.engines: List[AsyncEngine] = []
+        self.sessionmaker: Optional[async_sessionmaker] = None
+
+    def get_sessionmaker(self) -> async_sessionmaker:
+        if self.sessionmaker is None:
+            primary = create_async_db_engine(
+                settings.ASYNC_DATABASE_URL or settings.DATABASE_URL,
+                "primary_async"
+            )
+            replicas = [
+                create_async_db_engine(url, f"replica_{index}_async")
+                for index, url in enumerate(settings.DATABASE_REPLICA_URLS)
+            ]
+            self.engines = [primary, *replicas]
+            # expire_on_commit=False: tras el commit no se pueden hacer lazy loads
+            self.sessionmaker = async_sessionmaker(
+                bind=primary,
+                sync_session_class=RoutingSession,
+                autoflush=False,
+                expire_on_commit=False,
+                primary=primary.sync_engine,
+                replicas=[replica.sync_engine for replica in replicas],
+                sticky_seconds=settings.REPLICA_STICKY_SECONDS
+            )
+        return self.sessionmaker
 
-# Event listeners para logging
-@event.listens_for(engine, "connect")
-def receive_connect(dbapi_conn, connection_record):
-    """Log cuando se establece una nueva conexión"""
-    logger.debug("Database connection established")
+    async def dispose(self) -> None:
+        """Cierra los pools async (si se llegaron a crear)"""
+        engines, self.engines, self.sessionmaker = self.engines, [], None
+        for db_engine in engines:
+            await db_engine.dispose()
 
 
-@event.listens_for(engine, "checkout")
-def receive_checkout(dbapi_conn, connection_record, connection_proxy):
-    """Log cuando se obtiene una conexión del pool"""
-    logger.debug("Connection checked out from pool")
+async_database = _AsyncDatabase()
+
+
+# Base class for models
+Base = declarative_base()
 
 
 # Dependency para obtener sesión de DB
@@ -67,6 +199,40 @@ def get_db() -> Generator[Session, None, None]:
         db.close()
 
 
+# Dependency para endpoints de sólo lectura
+def get_read_db(db: Session = Depends(get_db)) -> Session:
+    """
+    La misma sesión de `get_db` (compartida con la autenticación), pero
+    autorizada a leer de las réplicas. Sólo para endpoints que no escriben.
+    """
+    db.info["use_replica"] = True
+    return db
+
+
+# Dependency para obtener sesión async de DB
+async def get_async_db() -> AsyncGenerator[AsyncSession, None]:
+    """
+    Dependency que proporciona una sesión async de base de datos.
+    Las consultas no bloquean el event loop mientras esperan a la BD.
+    """
+    async with async_database.get_sessionmaker()() as db:
+        try:
+            yield db
+        except Exception as e:
+            logger.error(f"Database session error: {str(e)}")
+            await db.rollback()
+            raise
+
+
+# Dependency async para endpoints de sólo lectura
+async def get_async_read_db(
+    db: AsyncSession = Depends(get_async_db)
+) -> AsyncSession:
+    """Como `get_read_db`: la sesión de `get_async_db` autorizada a leer de las réplicas"""
+    db.info["use_replica"] = True
+    return db
+
+
 # Función para inicializar la base de datos
 def init_db() -> None:
     """
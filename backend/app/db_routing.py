@@ -0,0 +1,178 @@
+from sqlalchemy import Select, event
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+from threading import Lock
+from typing import Any, Dict, Optional, Sequence
+import itertools
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+# Read-your-writes: tras un commit con escrituras, las lecturas del usuario
+# van al primario durante unos segundos. El estado tiene que verlo cualquier
+# worker que atienda su siguiente petición, así que por defecto va en Redis.
+
+
+class LocalStickyStore:
+    """
+    Usuarios fijados al primario en memoria del proceso
+
+    Sólo vale con un único proceso (tests, desarrollo): con varios workers
+    la siguiente petición puede ir a otro que no sabe de la escritura.
+    """
+
+    def __init__(self):
+        # user_id -> instante (monotonic) hasta el que leen del primario
+        self._sticky_until: Dict[int, float] = {}
+        self._lock = Lock()
+
+    def mark(self, user_id: int, window_seconds: float) -> None:
+        now = time.monotonic()
+        with self._lock:
+            self._sticky_until[user_id] = now + window_seconds
+            # Limpieza perezosa para que el diccionario no crezca sin límite
+            if len(self._sticky_until) > 10000:
+                for key in [k for k, until in self._sticky_until.items() if until <= now]:
+                    del self._sticky_until[key]
+
+    def is_sticky(self, user_id: int) -> bool:
+        with self._lock:
+            until = self._sticky_until.get(user_id)
+        return until is not None and until > time.monotonic()
+
+
+class RedisStickyStore:
+    """
+    Usuarios fijados al primario en Redis (una clave con expiración por
+    usuario), compartido entre workers y máquinas
+
+    Si Redis falla, las lecturas van al primario: es más lento pero nunca
+    devuelve datos anteriores a una escritura del usuario.
+    """
+
+    def __init__(self, url: Optional[str] = None, client: Any = None, prefix: str = "db:sticky:"):
+        self._url = url
+        self._client = client
+        self.prefix = prefix
+
+    @property
+    def client(self) -> Any:
+        if self._client is None:
+            import redis
+            self._client = redis.Redis.from_url(self._url, socket_timeout=0.5)
+        return self._client
+
+    def mark(self, user_id: int, window_seconds: float) -> None:
+        try:
+            self.client.set(f"{self.prefix}{user_id}", 1, px=max(1, int(window_seconds * 1000)))
+        except Exception as e:
+            logger.warning(f"Could not store read-your-writes window: {e}")
+
+    def is_sticky(self, user_id: int) -> bool:
+        try:
+            return bool(self.client.exists(f"{self.prefix}{user_id}"))
+        except Exception as e:
+            logger.warning(f"Could not read read-your-writes window, using primary: {e}")
+            return True
+
+
+_sticky_store: Any = LocalStickyStore()
+
+
+def set_sticky_store(store: Any) -> None:
+    """Sustituye el almacén de read-your-writes (ver database.py)"""
+    global _sticky_store
+    _sticky_store = store
+
+
+def mark_user_write(user_id: int, window_seconds: float) -> None:
+    """Fija las lecturas de un usuario al primario durante `window_seconds`"""
+    _sticky_store.mark(user_id, window_seconds)
+
+
+def is_user_sticky(user_id: Optional[int]) -> bool:
+    """Indica si las lecturas del usuario deben ir al primario"""
+    if user_id is None:
+        return False
+    return _sticky_store.is_sticky(user_id)
+
+
+class RoutingSession(Session):
+    """
+    Sesión que puede enviar las lecturas a réplicas
+
+    Por defecto todo va al primario: las rutas de escritura también leen
+    (comprobar que una tarea existe, calcular diferencias, reintentar un
+    slug) y con lag de réplica esas lecturas verían datos viejos. Sólo las
+    sesiones marcadas con `session.info["use_replica"] = True` (endpoints de
+    sólo lectura, ver `database.get_read_db`) leen de las réplicas, y aun
+    así van al primario:
+    - cualquier sentencia que no sea un SELECT (INSERT/UPDATE/DELETE, text())
+    - SELECT ... FOR UPDATE y los flush
+    - todas las lecturas de la sesión una vez que ha escrito
+    - las lecturas de un usuario durante `sticky_seconds` tras un commit suyo
+      con escrituras (read-your-writes). El usuario se indica en
+      `session.info["user_id"]`; el estado se guarda en el almacén de
+      `set_sticky_store` (Redis en producción, ver REPLICA_STICKY_BACKEND)
+
+    Sin réplicas configuradas se comporta como una sesión normal.
+    """
+
+    def __init__(
+        self,
+        primary: Optional[Engine] = None,
+        replicas: Sequence[Engine] = (),
+        sticky_seconds: float = 5.0,
+        **kwargs
+    ):
+        super().__init__(**kwargs)
+        self.primary = primary
+        self.replicas = list(replicas)
+        self.sticky_seconds = sticky_seconds
+        self._replica_cycle = itertools.cycle(self.replicas) if self.replicas else None
+
+    def _reads_from_primary(self) -> bool:
+        if not self.info.get("use_replica", False) or self.info.get("has_writes", False):
+            return True
+        # Una consulta al almacén por sesión (petición), no por sentencia
+        if "user_sticky" not in self.info:
+            self.info["user_sticky"] = is_user_sticky(self.info.get("user_id"))
+        return self.info["user_sticky"]
+
+    def get_bind(self, mapper=None, clause=None, **kwargs):
+        if self.primary is None:
+            return super().get_bind(mapper=mapper, clause=clause, **kwargs)
+
+        if (
+            self._replica_cycle is None
+            or self._flushing
+            or not isinstance(clause, Select)
+            or clause._for_update_arg is not None
+            or self._reads_from_primary()
+        ):
+            return self.primary
+
+        return next(self._replica_cycle)
+
+
+@event.listens_for(RoutingSession, "do_orm_execute")
+def _track_orm_writes(orm_execute_state):
+    """UPDATE/DELETE/INSERT ejecutados con session.execute()"""
+    if not orm_execute_state.is_select:
+        orm_execute_state.session.info["has_writes"] = True
+
+
+@event.listens_for(RoutingSession, "after_flush")
+def _track_flush_writes(session, flush_context):
+    """Escrituras de la unidad de trabajo"""
+    session.info["has_writes"] = True
+
+
+@event.listens_for(RoutingSession, "after_commit")
+def _mark_sticky_after_commit(session):
+    """Tras confirmar escrituras, fija al usuario al primario durante un tiempo"""
+    if session.info.get("has_writes", False):
+        user_id = session.info.get("user_id")
+        if user_id is not None and session.sticky_seconds > 0:
+            mark_user_write(user_id, session.sticky_seconds)
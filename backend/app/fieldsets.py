@@ -0,0 +1,105 @@
+from sqlalchemy import inspect
+from sqlalchemy.orm import load_only
+from pydantic import BaseModel, ConfigDict, create_model
+from functools import lru_cache
+from typing import Any, ClassVar, Optional, Tuple, Type
+from .loaders import loader_options
+
+# Campos parciales en los listados (`?fields=title,status,due_date`)
+#
+# La respuesta se serializa con un schema reducido y la consulta sólo trae
+# esas columnas con `load_only`, más las relaciones que el schema reducido
+# incluya. Las combinaciones de campos las elige el cliente: todas las
+# cachés se indexan por (schema completo, campos ordenados) y están
+# acotadas, nunca por la clase reducida.
+
+# Combinaciones de campos cacheadas por caché
+SPARSE_CACHE_SIZE = 256
+
+# Siempre se cargan: la clave y la posición del cursor (`next_cursor`)
+ALWAYS_LOADED = ("id", "created_at")
+
+
+class InvalidFields(ValueError):
+    """Parámetro `fields` con campos que no existen en el schema"""
+
+
+class SparseModel(BaseModel):
+    """Base de los schemas reducidos"""
+    model_config = ConfigDict(from_attributes=True)
+
+    # Schema completo y campos (ordenados) de los que sale
+    sparse_source: ClassVar[Optional[Type[BaseModel]]] = None
+    sparse_fields: ClassVar[Tuple[str, ...]] = ()
+
+
+def parse_fields(raw: Optional[str], schema: Type[BaseModel]) -> Optional[Tuple[str, ...]]:
+    """
+    Campos pedidos en `fields` (separados por comas), normalizados
+
+    `id` se incluye siempre; el resultado va ordenado y sin repetidos, así
+    `title,id` e `id,title,title` son la misma entrada de caché.
+
+    Returns:
+        Tupla ordenada de nombres, o None si no se restringe nada
+
+    Raises:
+        InvalidFields: Si algún campo no existe en `schema`
+    """
+    if not raw:
+        return None
+    requested = {name.strip() for name in raw.split(",") if name.strip()}
+    if not requested:
+        return None
+    unknown = requested - set(schema.model_fields)
+    if unknown:
+        raise InvalidFields(f"Unknown fields: {', '.join(sorted(unknown))}")
+    requested.add("id")
+    return tuple(sorted(requested))
+
+
+@lru_cache(maxsize=SPARSE_CACHE_SIZE)
+def partial_schema(schema: Type[BaseModel], fields: Tuple[str, ...]) -> Type[SparseModel]:
+    """Schema con sólo `fields` de `schema` (mismos tipos, validaciones y orden)"""
+    definitions = {
+        name: (field.annotation, field)
+        for name, field in schema.model_fields.items() if name in fields
+    }
+    partial = create_model(f"{schema.__name__}Partial", __base__=SparseModel, **definitions)
+    partial.sparse_source = schema
+    partial.sparse_fields = fields
+    return partial
+
+
+def sparse_schema(schema: Type[BaseModel], raw: Optional[str]) -> Type[BaseModel]:
+    """Schema de respuesta para el parámetro `fields` (el completo si no se indica)"""
+    fields = parse_fields(raw, schema)
+    if fields is None or len(fields) == len(schema.model_fields):
+        return schema
+    return partial_schema(schema, fields)
+
+
+def projection_options(model: type, schema: Type[BaseModel]) -> Tuple[Any, ...]:
+    """
+    Opciones de carga para serializar `schema` desde `model`
+
+    Con un schema reducido añade `load_only` con sus columnas (y
+    ALWAYS_LOADED); con uno completo equivale a `loader_options`.
+    """
+    if not issubclass(schema, SparseModel):
+        return loader_options(model, schema)
+    return _sparse_options(model, schema.sparse_source, schema.sparse_fields)
+
+
+@lru_cache(maxsize=SPARSE_CACHE_SIZE)
+def _sparse_options(
+    model: type,
+    schema: Type[BaseModel],
+    fields: Tuple[str, ...]
+) -> Tuple[Any, ...]:
+    columns = inspect(model).column_attrs.keys()
+    names = [name for name in columns if name in fields or name in ALWAYS_LOADED]
+    return (
+        load_only(*[getattr(model, name) for name in names]),
+        *loader_options(model, schema, fields=fields),
+    )
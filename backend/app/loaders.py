@@ -0,0 +1,66 @@
+from sqlalchemy import inspect
+from sqlalchemy.orm import joinedload, selectinload
+from pydantic import BaseModel
+from functools import lru_cache
+from typing import Any, Optional, Tuple, Type, get_args, get_origin
+
+
+def _nested_schema(annotation: Any) -> Optional[Type[BaseModel]]:
+    """Extrae el schema anidado de anotaciones como Optional[X] o List[X]"""
+    if isinstance(annotation, type) and issubclass(annotation, BaseModel):
+        return annotation
+    if get_origin(annotation) is None:
+        return None
+    for arg in get_args(annotation):
+        nested = _nested_schema(arg)
+        if nested is not None:
+            return nested
+    return None
+
+
+@lru_cache(maxsize=512)
+def loader_options(
+    model: type,
+    schema: Type[BaseModel],
+    max_depth: int = 3,
+    fields: Optional[Tuple[str, ...]] = None
+) -> Tuple[Any, ...]:
+    """
+    Opciones de carga para serializar `schema` a partir de `model` sin N+1
+
+    Cada campo del schema que coincide con una relación del modelo se
+    carga por adelantado: colecciones con `selectinload` (una consulta
+    IN por relación) y relaciones many-to-one con `joinedload` (mismo
+    SELECT). Se recorre recursivamente con los schemas anidados.
+
+    Args:
+        model: Clase del modelo SQLAlchemy
+        schema: Schema Pydantic de respuesta
+        max_depth: Profundidad máxima de relaciones anidadas
+        fields: Si se indica, sólo las relaciones de primer nivel con esos nombres
+
+    Returns:
+        Tupla de opciones para `query.options(*...)`
+    """
+    if max_depth <= 0:
+        return ()
+
+    relationships = inspect(model).relationships
+    options = []
+    for name, field in schema.model_fields.items():
+        relationship = relationships.get(name)
+        if relationship is None or (fields is not None and name not in fields):
+            continue
+
+        attribute = getattr(model, name)
+        loader = selectinload(attribute) if relationship.uselist else joinedload(attribute)
+
+        nested = _nested_schema(field.annotation)
+        if nested is not None:
+            child_options = loader_options(relationship.mapper.class_, nested, max_depth - 1)
+            if child_options:
+                loader = loader.options(*child_options)
+
+        options.append(loader)
+
+    return tuple(options)
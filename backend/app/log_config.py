@@ -0,0 +1,190 @@
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+from typing import Dict, Optional
+import json
+import logging
+import queue
+import random
+import sys
+from .config import settings
+from .metrics import registry
+
+# Logging no bloqueante
+#
+# Los handlers de la aplicación sólo encolan el registro (put_nowait en una
+# cola acotada); un QueueListener en un hilo aparte los formatea y escribe.
+# Si el destino se atasca y la cola se llena, los registros se descartan y se
+# cuentan en lugar de bloquear el event loop.
+
+# ID de la petición en curso (lo fija ObservabilityMiddleware)
+request_id_var: ContextVar[Optional[str]] = ContextVar("request_id", default=None)
+
+# Atributos propios de LogRecord: el resto son campos de `extra`
+_RECORD_ATTRS = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime"}
+
+
+class RequestIdFilter(logging.Filter):
+    """Añade `request_id` a cada registro (en el hilo que lo emite)"""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if not hasattr(record, "request_id"):
+            record.request_id = request_id_var.get()
+        return True
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Conserva sólo una fracción de los registros INFO/DEBUG de ciertos loggers
+
+    `rates` asocia un prefijo de logger (p. ej. "app.access") con la
+    fracción que se conserva (0.0–1.0); gana el prefijo más largo.
+    WARNING y superiores se conservan siempre.
+    """
+
+    def __init__(self, rates: Dict[str, float]):
+        super().__init__()
+        self.rates = rates
+        self._by_logger: Dict[str, float] = {}
+        self.sampled_out = 0
+
+    def _rate(self, name: str) -> float:
+        rate = self._by_logger.get(name)
+        if rate is None:
+            matches = [
+                prefix for prefix in self.rates
+                if name == prefix or name.startswith(prefix + ".")
+            ]
+            rate = self.rates[max(matches, key=len)] if matches else 1.0
+            self._by_logger[name] = rate
+        return rate
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING:
+            return True
+        rate = self._rate(record.name)
+        if rate >= 1.0 or random.random() < rate:
+            return True
+        self.sampled_out += 1
+        return False
+
+
+class DroppingQueueHandler(QueueHandler):
+    """QueueHandler que descarta (y cuenta) en lugar de bloquear si la cola está llena"""
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Se resuelve aquí lo que no se puede enviar a otro hilo (args,
+        # traceback), pero el formato final lo aplica el listener
+        record = logging.makeLogRecord(record.__dict__)
+        record.message = record.getMessage()
+        record.msg = record.message
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+class JsonFormatter(logging.Formatter):
+    """Una línea JSON por registro, con los campos de `extra`"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "timestamp": datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for key, value in record.__dict__.items():
+            if key not in _RECORD_ATTRS and key not in entry:
+                entry[key] = value
+        if record.exc_text:
+            entry["exc_info"] = record.exc_text
+        elif record.exc_info:
+            entry["exc_info"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str, ensure_ascii=False)
+
+
+class _Listener(QueueListener):
+    def enqueue_sentinel(self) -> None:
+        # Bloqueante: con la cola llena, esperar a que el hilo escritor la vacíe
+        self.queue.put(self._sentinel)
+
+
+class _Pipeline:
+    """Estado del logging configurado por `setup_logging`"""
+
+    def __init__(self):
+        self.handler: Optional[DroppingQueueHandler] = None
+        self.sampler: Optional[SamplingFilter] = None
+        self.listener: Optional[QueueListener] = None
+
+
+_pipeline = _Pipeline()
+
+registry.counter(
+    "log_records_dropped_total", "Log records dropped because the log queue was full"
+).set_function(lambda: _pipeline.handler.dropped if _pipeline.handler else 0)
+registry.counter(
+    "log_records_sampled_out_total", "INFO/DEBUG log records discarded by sampling"
+).set_function(lambda: _pipeline.sampler.sampled_out if _pipeline.sampler else 0)
+
+
+def setup_logging() -> None:
+    """
+    Configura el logger raíz con la cola acotada y arranca el hilo escritor
+
+    Idempotente: si ya está configurado no hace nada.
+    """
+    if _pipeline.listener is not None:
+        return
+
+    level = settings.LOG_LEVEL or ("DEBUG" if settings.DEBUG else "INFO")
+    output = logging.StreamHandler(sys.stdout)
+    if settings.LOG_FORMAT == "json":
+        output.setFormatter(JsonFormatter())
+    else:
+        output.setFormatter(logging.Formatter(
+            "%(asctime)s - %(name)s - %(levelname)s - [%(request_id)s] %(message)s"
+        ))
+    output.addFilter(RequestIdFilter())
+
+    log_queue: queue.Queue = queue.Queue(maxsize=settings.LOG_QUEUE_SIZE)
+    handler = DroppingQueueHandler(log_queue)
+    sampler = SamplingFilter(settings.LOG_SAMPLING)
+    handler.addFilter(sampler)
+    handler.addFilter(RequestIdFilter())
+
+    root = logging.getLogger()
+    root.handlers = [handler]
+    root.setLevel(level)
+
+    _pipeline.handler = handler
+    _pipeline.sampler = sampler
+    _pipeline.listener = _Listener(log_queue, output, respect_handler_level=True)
+    _pipeline.listener.start()
+
+
+def shutdown_logging() -> None:
+    """Vacía la cola (escribe lo pendiente) y detiene el hilo escritor"""
+    listener = _pipeline.listener
+    if listener is None:
+        return
+    _pipeline.listener = None
+    listener.stop()
+    # Lo que se emita después (p. ej. al cerrar el proceso) ya no tiene
+    # quien lo escriba: se vuelve a escritura directa
+    root = logging.getLogger()
+    root.removeHandler(_pipeline.handler)
+    for handler in listener.handlers:
+        root.addHandler(handler)
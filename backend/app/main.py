@@ -8,14 +8,17 @@ from contextlib import asynccontextmanager
 import logging
 import time
 from .config import settings
-from .database import engine, Base, check_db_connection
-from .routers import auth, users, tasks, projects, comments
-
-# Configurar logging
-logging.basicConfig(
-    level=logging.DEBUG if settings.DEBUG else logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-)
+from .database import engine, async_database, Base, check_db_connection
+from .fieldsets import InvalidFields
+from .log_config import setup_logging, shutdown_logging
+from .metrics import setup_multiprocess
+from .middleware import ObservabilityMiddleware
+from .pagination import InvalidCursor
+from .passwords import password_service
+from .routers import auth, users, tasks, projects, comments, internal
+
+# Configurar logging (cola con hilo escritor, JSON)
+setup_logging()
 logger = logging.getLogger(__name__)
 
 
@@ -40,10 +43,20 @@ async def lifespan(app: FastAPI):
         logger.info("Creating database tables...")
         Base.metadata.create_all(bind=engine)
     
+    # Métricas compartidas entre workers (cada worker arranca su volcado)
+    metrics_store = None
+    if settings.INTERNAL_METRICS_ENABLED:
+        metrics_store = setup_multiprocess(settings.METRICS_MULTIPROC_DIR, settings.METRICS_FLUSH_SECONDS)
+    
     yield
     
     # Shutdown
     logger.info("Shutting down application...")
+    if metrics_store is not None:
+        metrics_store.stop()
+    password_service.shutdown()
+    await async_database.dispose()
+    shutdown_logging()
 
 
 # Crear aplicación FastAPI
@@ -67,7 +80,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
-    expose_headers=["X-Total-Count"]
+    expose_headers=["X-Total-Count", "X-Next-Cursor"]
 )
 
 # GZip Compression
@@ -81,25 +94,12 @@ if settings.is_production:
     )
 
 
-# ============ Custom Middleware ============
-
-@app.middleware("http")
-async def add_process_time_header(request: Request, call_next):
-    """Añade header con tiempo de procesamiento"""
-    start_time = time.time()
-    response = await call_next(request)
-    process_time = time.time() - start_time
-    response.headers["X-Process-Time"] = str(process_time)
-    return response
-
-
-@app.middleware("http")
-async def log_requests(request: Request, call_next):
-    """Log de todas las requests"""
-    logger.info(f"{request.method} {request.url.path}")
-    response = await call_next(request)
-    logger.info(f"Status: {response.status_code}")
-    return response
+# Tiempo de proceso y log de acceso (ASGI puro, el más externo)
+app.add_middleware(
+    ObservabilityMiddleware,
+    access_log=settings.ACCESS_LOG_ENABLED,
+    metrics=settings.INTERNAL_METRICS_ENABLED
+)
 
 
 # ============ Exception Handlers ============
@@ -117,6 +117,24 @@ async def validation_exception_handler(request: Request, exc: RequestValidationE
     )
 
 
+@app.exception_handler(InvalidCursor)
+async def invalid_cursor_handler(request: Request, exc: InvalidCursor):
+    """Cursor de paginación inválido"""
+    return JSONResponse(
+        status_code=status.HTTP_400_BAD_REQUEST,
+        content={"detail": str(exc)}
+    )
+
+
+@app.exception_handler(InvalidFields)
+async def invalid_fields_handler(request: Request, exc: InvalidFields):
+    """Parámetro `fields` con campos desconocidos"""
+    return JSONResponse(
+        status_code=status.HTTP_400_BAD_REQUEST,
+        content={"detail": str(exc)}
+    )
+
+
 @app.exception_handler(Exception)
 async def general_exception_handler(request: Request, exc: Exception):
     """Maneja excepciones generales"""
@@ -214,6 +232,15 @@ app.include_router(
     tags=["Comments"]
 )
 
+# Internal router (métricas, no expuesto en la documentación; requiere
+# INTERNAL_METRICS_TOKEN o un superusuario, ver routers/internal.py)
+if settings.INTERNAL_METRICS_ENABLED:
+    app.include_router(
+        internal.router,
+        prefix="/internal",
+        include_in_schema=False
+    )
+
 
 if __name__ == "__main__":
     import uvicorn
@@ -0,0 +1,353 @@
+from threading import Event, Lock, Thread
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+import bisect
+import glob
+import json
+import logging
+import math
+import os
+import tempfile
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BUCKETS = (
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+    0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)
+
+LabelValues = Tuple[str, ...]
+Sample = Tuple[str, Dict[str, str], float]
+# (nombre, documentación, tipo, muestras)
+Family = Tuple[str, str, str, List[Sample]]
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _format_labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ""
+    parts = []
+    for key, value in labels.items():
+        escaped = str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+        parts.append(f'{key}="{escaped}"')
+    return "{" + ",".join(parts) + "}"
+
+
+class Metric:
+    """Métrica base con etiquetas"""
+
+    type = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = Lock()
+        self._callbacks: Dict[LabelValues, Callable[[], float]] = {}
+
+    def _key(self, labels: Dict[str, str]) -> LabelValues:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(
+                f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}"
+            )
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def _labels(self, key: LabelValues) -> Dict[str, str]:
+        return dict(zip(self.labelnames, key))
+
+    def set_function(self, func: Callable[[], float], **labels: str) -> None:
+        """Calcula el valor en el momento de exportar (p. ej. estado del pool)"""
+        with self._lock:
+            self._callbacks[self._key(labels)] = func
+
+    def _callback_samples(self) -> List[Sample]:
+        with self._lock:
+            callbacks = list(self._callbacks.items())
+        return [(self.name, self._labels(key), float(func())) for key, func in callbacks]
+
+    def samples(self) -> List[Sample]:
+        raise NotImplementedError
+
+
+class Counter(Metric):
+    """Contador monótono"""
+
+    type = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def samples(self) -> List[Sample]:
+        with self._lock:
+            values = list(self._values.items())
+        return [(self.name, self._labels(key), value) for key, value in values] + self._callback_samples()
+
+
+class Gauge(Metric):
+    """Valor que sube y baja"""
+
+    type = "gauge"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[LabelValues, float] = {}
+
+    def set(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def inc(self, amount: float = 1, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount: float = 1, **labels: str) -> None:
+        self.inc(-amount, **labels)
+
+    def samples(self) -> List[Sample]:
+        with self._lock:
+            values = list(self._values.items())
+        return [(self.name, self._labels(key), value) for key, value in values] + self._callback_samples()
+
+
+class Histogram(Metric):
+    """Histograma con buckets acumulados al estilo Prometheus"""
+
+    type = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Iterable[float] = DEFAULT_BUCKETS
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # Por serie: [conteo por bucket..., conteo +Inf, suma]
+        self._values: Dict[LabelValues, List[float]] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._values.get(key)
+            if series is None:
+                series = self._values[key] = [0.0] * (len(self.buckets) + 2)
+            series[index] += 1
+            series[-1] += value
+
+    def samples(self) -> List[Sample]:
+        with self._lock:
+            values = [(key, list(series)) for key, series in self._values.items()]
+
+        result: List[Sample] = []
+        for key, series in values:
+            labels = self._labels(key)
+            cumulative = 0.0
+            for bound, count in zip(self.buckets + (math.inf,), series[:-1]):
+                cumulative += count
+                result.append((f"{self.name}_bucket", {**labels, "le": _format_value(bound)}, cumulative))
+            result.append((f"{self.name}_count", labels, cumulative))
+            result.append((f"{self.name}_sum", labels, series[-1]))
+        return result
+
+
+class MetricsRegistry:
+    """Registro de métricas del proceso"""
+
+    def __init__(self):
+        self._metrics: Dict[str, Metric] = {}
+        self._lock = Lock()
+
+    def register(self, metric: Metric) -> Metric:
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                return existing
+            self._metrics[metric.name] = metric
+            return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self.register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self.register(Gauge(name, documentation, labelnames))
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Optional[Iterable[float]] = None
+    ) -> Histogram:
+        return self.register(Histogram(name, documentation, labelnames, buckets or DEFAULT_BUCKETS))
+
+    def collect(self) -> List[Metric]:
+        with self._lock:
+            return list(self._metrics.values())
+
+    def snapshot(self) -> List[Family]:
+        """Valores actuales de todas las métricas del proceso"""
+        return [
+            (metric.name, metric.documentation, metric.type, metric.samples())
+            for metric in self.collect()
+        ]
+
+    def render(self) -> str:
+        """Exporta todas las métricas en formato de texto de Prometheus"""
+        return render_families(self.snapshot())
+
+
+def render_families(families: Iterable[Family]) -> str:
+    lines = []
+    for metric_name, documentation, metric_type, samples in families:
+        lines.append(f"# HELP {metric_name} {documentation}")
+        lines.append(f"# TYPE {metric_name} {metric_type}")
+        for name, labels, value in samples:
+            lines.append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+    return "\n".join(lines) + "\n"
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+class MultiProcessStore:
+    """
+    Agregación de métricas entre workers (gunicorn) a través de ficheros
+
+    Cada proceso vuelca periódicamente su registro en `metrics_<pid>.json`
+    dentro de `directory` (escritura atómica con rename). Al exportar se
+    suman las muestras de todos los ficheros: contadores e histogramas se
+    acumulan, incluidos los de workers ya terminados; los gauges sólo
+    cuentan si el proceso sigue vivo.
+
+    El directorio debe vaciarse antes de arrancar el servidor (p. ej. un
+    tmpfs por contenedor), igual que con el modo multiproceso de
+    prometheus_client. Los valores de otros workers tienen como mucho
+    `interval` segundos de retraso.
+    """
+
+    def __init__(self, directory: str, registry: "MetricsRegistry", interval: float = 5.0):
+        self.directory = directory
+        self.registry = registry
+        self.interval = interval
+        self._stop = Event()
+        self._thread: Optional[Thread] = None
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, pid: int) -> str:
+        return os.path.join(self.directory, f"metrics_{pid}.json")
+
+    def write(self) -> None:
+        """Vuelca el registro de este proceso a su fichero"""
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, prefix=".metrics_", suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w") as f:
+                json.dump(self.registry.snapshot(), f)
+            os.replace(tmp_path, self._path(os.getpid()))
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    def collect(self) -> List[Family]:
+        """Familias de métricas sumadas entre todos los procesos"""
+        self.write()
+        families: Dict[str, Family] = {}
+        totals: Dict[str, Dict[Tuple, List]] = {}
+        for path in sorted(glob.glob(os.path.join(self.directory, "metrics_*.json"))):
+            pid = int(os.path.basename(path)[len("metrics_"):-len(".json")])
+            try:
+                with open(path) as f:
+                    snapshot = json.load(f)
+            except (OSError, ValueError):
+                # Fichero desaparecido o a medio escribir por otro proceso
+                continue
+            alive = _pid_alive(pid)
+            for metric_name, documentation, metric_type, samples in snapshot:
+                if metric_type == "gauge" and not alive:
+                    continue
+                families.setdefault(metric_name, (metric_name, documentation, metric_type, []))
+                series = totals.setdefault(metric_name, {})
+                for name, labels, value in samples:
+                    key = (name, tuple(sorted(labels.items())))
+                    if key in series:
+                        series[key][2] += value
+                    else:
+                        series[key] = [name, labels, value]
+
+        return [
+            (name, documentation, metric_type, [tuple(sample) for sample in totals[name].values()])
+            for name, documentation, metric_type, _ in families.values()
+        ]
+
+    def render(self) -> str:
+        return render_families(self.collect())
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            try:
+                self.write()
+            except OSError as exc:
+                logger.warning(f"Could not write metrics file: {exc}")
+
+    def start(self) -> None:
+        """Arranca el volcado periódico en un hilo (una vez por worker)"""
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = Thread(target=self._run, name="metrics-writer", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Detiene el hilo y hace un último volcado"""
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._thread.join()
+        self._thread = None
+        self.write()
+
+
+# Registro global
+registry = MetricsRegistry()
+
+# Agregación entre workers (sólo si METRICS_MULTIPROC_DIR está configurado)
+multiprocess_store: Optional[MultiProcessStore] = None
+
+
+def setup_multiprocess(directory: Optional[str], interval: float) -> Optional[MultiProcessStore]:
+    """Crea y arranca el almacén compartido de este worker"""
+    global multiprocess_store
+    if directory and multiprocess_store is None:
+        multiprocess_store = MultiProcessStore(directory, registry, interval)
+        multiprocess_store.start()
+    return multiprocess_store
+
+
+def render_metrics() -> str:
+    """Métricas del servidor completo (todos los workers) o de este proceso"""
+    if multiprocess_store is not None:
+        return multiprocess_store.render()
+    return registry.render()
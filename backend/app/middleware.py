@@ -0,0 +1,131 @@
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+import logging
+import time
+import uuid
+from .log_config import request_id_var
+from .metrics import registry
+
+access_logger = logging.getLogger("app.access")
+
+REQUEST_DURATION = registry.histogram(
+    "http_request_duration_seconds",
+    "Request latency by route template",
+    ["method", "route"],
+)
+REQUESTS = registry.counter(
+    "http_requests_total",
+    "Requests by route template and status class",
+    ["method", "route", "status"],
+)
+IN_FLIGHT = registry.gauge(
+    "http_requests_in_flight",
+    "Requests currently being processed",
+)
+
+# Métodos conocidos; el resto se agrupa para acotar la cardinalidad
+METHODS = {"GET", "POST", "PUT", "PATCH", "DELETE", "HEAD", "OPTIONS"}
+
+# Middleware de observabilidad (ASGI puro)
+#
+# Sustituye a los dos `@app.middleware("http")` (tiempo de proceso y log de
+# peticiones). BaseHTTPMiddleware ejecuta cada petición en una tarea aparte y
+# re-envía el cuerpo de la respuesta por un stream intermedio; aquí sólo se
+# intercepta `send` para leer el status y añadir la cabecera.
+
+
+def _request_id(scope: Scope) -> str:
+    """ID de la cabecera X-Request-ID (si es razonable) o uno nuevo"""
+    for name, value in scope["headers"]:
+        if name == b"x-request-id":
+            if 0 < len(value) <= 128 and value.isascii():
+                return value.decode("ascii")
+            break
+    return uuid.uuid4().hex
+
+
+def _route_template(scope: Scope) -> str:
+    """Plantilla de la ruta resuelta (/api/v1/tasks/{task_id}), no el path real"""
+    route = scope.get("route")
+    path = getattr(route, "path", None)
+    return path if path is not None else "unmatched"
+
+
+class ObservabilityMiddleware:
+    """
+    Añade `X-Process-Time` (segundos hasta las cabeceras, reloj monótono) y
+    emite un único registro de acceso por petición en el logger `app.access`
+
+    Cada petición lleva un ID (el de la cabecera `X-Request-ID` si viene, si
+    no uno nuevo) que se devuelve en la respuesta y se guarda en
+    `request_id_var` para que aparezca en todos sus registros de log.
+
+    Los campos del registro van también en `extra` (method, path, status,
+    duration_ms, client) para los formatters estructurados.
+
+    Con `metrics` registra además la latencia y el número de peticiones por
+    plantilla de ruta y clase de status, y las peticiones en curso.
+    """
+
+    def __init__(self, app: ASGIApp, access_log: bool = True, metrics: bool = True):
+        self.app = app
+        self.access_log = access_log
+        self.metrics = metrics
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        status_code = 500
+        request_id = _request_id(scope)
+        token = request_id_var.set(request_id)
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                headers = MutableHeaders(scope=message)
+                headers.append("X-Process-Time", f"{time.perf_counter() - start:.6f}")
+                headers.append("X-Request-ID", request_id)
+            await send(message)
+
+        if self.metrics:
+            IN_FLIGHT.inc()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            # También cuando la excepción sube hasta ServerErrorMiddleware (500)
+            duration = time.perf_counter() - start
+            if self.metrics:
+                IN_FLIGHT.dec()
+                self._observe(scope, status_code, duration)
+            if self.access_log and access_logger.isEnabledFor(logging.INFO):
+                self._log(scope, status_code, duration)
+        # Si hubo excepción el ID se mantiene para el log del handler de
+        # errores (el servidor ejecuta cada petición en su propio contexto)
+        request_id_var.reset(token)
+
+    @staticmethod
+    def _observe(scope: Scope, status_code: int, duration: float) -> None:
+        method = scope["method"] if scope["method"] in METHODS else "OTHER"
+        route = _route_template(scope)
+        REQUEST_DURATION.observe(duration, method=method, route=route)
+        REQUESTS.inc(method=method, route=route, status=f"{status_code // 100}xx")
+
+    @staticmethod
+    def _log(scope: Scope, status_code: int, duration: float) -> None:
+        client = scope.get("client")
+        record = {
+            "method": scope["method"],
+            "path": scope["path"],
+            "status": status_code,
+            "duration_ms": round(duration * 1000, 3),
+            "client": client[0] if client else None,
+        }
+        access_logger.info(
+            "%s %s %d %.2fms",
+            record["method"], record["path"], status_code, record["duration_ms"],
+            extra=record
+        )
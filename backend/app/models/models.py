@@ -2,7 +2,8 @@ from sqlalchemy import (
     Column, Integer, String, Boolean, DateTime, 
     ForeignKey, Text, Enum, Index, UniqueConstraint
 )
-from sqlalchemy.orm import relationship
+from sqlalchemy import select
+from sqlalchemy.orm import aliased, column_property, relationship
 from sqlalchemy.sql import func
 from datetime import datetime
 import enum
@@ -38,7 +39,7 @@ class User(Base):
     """Modelo de Usuario"""
     __tablename__ = "users"
 
-    id = Column(Integer, primary_key=True, index=True)
+    id = Column(Integer, primary_key=True)
     email = Column(String(255), unique=True, index=True, nullable=False)
     username = Column(String(50), unique=True, index=True, nullable=False)
     full_name = Column(String(100), nullable=True)
@@ -60,17 +61,17 @@ class User(Base):
     updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False)
     last_login = Column(DateTime(timezone=True), nullable=True)
     
-    # Relaciones
-    tasks = relationship("Task", back_populates="owner", cascade="all, delete-orphan")
-    assigned_tasks = relationship("Task", secondary="task_assignments", back_populates="assignees")
-    comments = relationship("Comment", back_populates="author", cascade="all, delete-orphan")
-    projects = relationship("Project", back_populates="owner", cascade="all, delete-orphan")
+    # Relaciones (passive_deletes: los hijos los borra la BD con ON DELETE
+    # CASCADE, sin cargarlos en la sesión)
+    tasks = relationship("Task", back_populates="owner", cascade="all, delete-orphan", passive_deletes=True)
+    assigned_tasks = relationship("Task", secondary="task_assignments", back_populates="assignees", passive_deletes=True)
+    comments = relationship("Comment", back_populates="author", cascade="all, delete-orphan", passive_deletes=True)
+    projects = relationship("Project", back_populates="owner", cascade="all, delete-orphan", passive_deletes=True)
     
     # Índices
     __table_args__ = (
-        Index('idx_user_email', 'email'),
-        Index('idx_user_username', 'username'),
-        Index('idx_user_active', 'is_active'),
+        # email y username: índice único por unique=True + index=True
+        Index('idx_user_created', 'created_at', 'id'),
     )
 
     def __repr__(self):
@@ -81,7 +82,7 @@ class Project(Base):
     """Modelo de Proyecto"""
     __tablename__ = "projects"
 
-    id = Column(Integer, primary_key=True, index=True)
+    id = Column(Integer, primary_key=True)
     name = Column(String(100), nullable=False)
     description = Column(Text, nullable=True)
     slug = Column(String(100), unique=True, index=True, nullable=False)
@@ -107,30 +108,28 @@ class Project(Base):
     
     # Relaciones
     owner = relationship("User", back_populates="projects")
-    tasks = relationship("Task", back_populates="project", cascade="all, delete-orphan")
+    tasks = relationship("Task", back_populates="project", cascade="all, delete-orphan", passive_deletes=True)
     
     # Índices
     __table_args__ = (
-        Index('idx_project_slug', 'slug'),
-        Index('idx_project_owner', 'owner_id'),
-        Index('idx_project_active', 'is_active'),
+        # slug: índice único por unique=True + index=True
+        # owner_id (FK y filtros) usa el prefijo de idx_project_owner_created
+        Index('idx_project_owner_created', 'owner_id', 'created_at', 'id'),
     )
 
     def __repr__(self):
         return f"<Project(id={self.id}, name={self.name}, slug={self.slug})>"
 
 
-class Task(Base):
-    """Modelo de Tarea"""
-    __tablename__ = "tasks"
-
-    id = Column(Integer, primary_key=True, index=True)
+class TaskFieldsMixin:
+    """Columnas de datos de una tarea, compartidas por Task y ArchivedTask"""
+    
     title = Column(String(200), nullable=False)
     description = Column(Text, nullable=True)
     
     # Estado y prioridad
-    status = Column(Enum(Status), default=Status.TODO, nullable=False, index=True)
-    priority = Column(Enum(Priority), default=Priority.MEDIUM, nullable=False, index=True)
+    status = Column(Enum(Status), default=Status.TODO, nullable=False)
+    priority = Column(Enum(Priority), default=Priority.MEDIUM, nullable=False)
     
     # Fechas
     due_date = Column(DateTime(timezone=True), nullable=True)
@@ -148,6 +147,13 @@ class Task(Base):
     # Timestamps
     created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
     updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False)
+
+
+class Task(TaskFieldsMixin, Base):
+    """Modelo de Tarea"""
+    __tablename__ = "tasks"
+
+    id = Column(Integer, primary_key=True)
     
     # Foreign Keys
     user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
@@ -157,45 +163,138 @@ class Task(Base):
     # Relaciones
     owner = relationship("User", back_populates="tasks", foreign_keys=[user_id])
     project = relationship("Project", back_populates="tasks")
-    assignees = relationship("User", secondary="task_assignments", back_populates="assigned_tasks")
-    comments = relationship("Comment", back_populates="task", cascade="all, delete-orphan")
-    subtasks = relationship("Task", backref="parent_task", remote_side=[id])
+    assignees = relationship("User", secondary="task_assignments", back_populates="assigned_tasks", passive_deletes=True)
+    comments = relationship("Comment", back_populates="task", cascade="all, delete-orphan", passive_deletes=True)
+    parent_task = relationship("Task", back_populates="subtasks", remote_side=[id])
+    # Al borrar una tarea su subárbol lo borra la BD (ON DELETE CASCADE de
+    # parent_task_id); sin passive_deletes el ORM pondría a NULL el padre
+    # de las subtareas y quedarían sueltas
+    subtasks = relationship("Task", back_populates="parent_task", cascade="all, delete-orphan", passive_deletes=True)
     
     # Índices
     __table_args__ = (
-        Index('idx_task_status', 'status'),
-        Index('idx_task_priority', 'priority'),
-        Index('idx_task_user', 'user_id'),
-        Index('idx_task_project', 'project_id'),
-        Index('idx_task_due_date', 'due_date'),
-        Index('idx_task_created', 'created_at'),
+        # Diseñados para las consultas reales (ver benchmarks/explain_indexes.py);
+        # status y priority solos son poco selectivos y no se indexan
+        Index('idx_task_created', 'created_at', 'id'),
+        Index('idx_task_user_created', 'user_id', 'created_at', 'id'),
+        Index('idx_task_user_status_created', 'user_id', 'status', 'created_at', 'id'),
+        Index('idx_task_project_status', 'project_id', 'status'),
+        Index('idx_task_parent', 'parent_task_id'),
     )
 
     def __repr__(self):
         return f"<Task(id={self.id}, title={self.title}, status={self.status})>"
 
 
+class ArchivedTask(TaskFieldsMixin, Base):
+    """
+    Tarea archivada (almacenamiento frío, ver archive.py)
+    
+    Conserva el ID original. Los comentarios se guardan como JSON en
+    `comments_snapshot` y las asignaciones en `archived_task_assignments`.
+    """
+    __tablename__ = "archived_tasks"
+
+    id = Column(Integer, primary_key=True, autoincrement=False)
+    
+    # Foreign Keys (la tarea padre puede estar activa o archivada: sin FK)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    project_id = Column(Integer, ForeignKey("projects.id", ondelete="CASCADE"), nullable=True)
+    parent_task_id = Column(Integer, nullable=True)
+    
+    archived_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    comments_snapshot = Column(Text, nullable=True)  # JSON array de comentarios
+    
+    # Relaciones (sólo lectura, para serializar igual que Task)
+    owner = relationship("User", viewonly=True)
+    project = relationship("Project", viewonly=True)
+    assignees = relationship("User", secondary="archived_task_assignments", viewonly=True)
+    
+    __table_args__ = (
+        Index('idx_archived_task_user_created', 'user_id', 'created_at', 'id'),
+        Index('idx_archived_task_project', 'project_id'),
+    )
+
+    def __repr__(self):
+        return f"<ArchivedTask(id={self.id}, title={self.title}, status={self.status})>"
+
+
+class ArchivedTaskAssignment(Base):
+    """Asignaciones de tareas archivadas"""
+    __tablename__ = "archived_task_assignments"
+
+    task_id = Column(Integer, ForeignKey("archived_tasks.id", ondelete="CASCADE"), primary_key=True)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    assigned_at = Column(DateTime(timezone=True), nullable=False)
+    
+    __table_args__ = (
+        Index('idx_archived_assignment_user', 'user_id'),
+    )
+
+
 class TaskAssignment(Base):
     """Tabla intermedia para asignación de tareas"""
     __tablename__ = "task_assignments"
 
-    id = Column(Integer, primary_key=True, index=True)
+    id = Column(Integer, primary_key=True)
     task_id = Column(Integer, ForeignKey("tasks.id", ondelete="CASCADE"), nullable=False)
     user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
     assigned_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
     
     __table_args__ = (
+        # La restricción única cubre las búsquedas por task_id
         UniqueConstraint('task_id', 'user_id', name='uq_task_user_assignment'),
-        Index('idx_assignment_task', 'task_id'),
         Index('idx_assignment_user', 'user_id'),
     )
 
 
+class Tag(Base):
+    """Etiqueta normalizada (nombre en minúsculas, único)"""
+    __tablename__ = "tags"
+
+    id = Column(Integer, primary_key=True)
+    name = Column(String(50), unique=True, nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+
+    def __repr__(self):
+        return f"<Tag(id={self.id}, name={self.name})>"
+
+
+class TaskTag(Base):
+    """Tabla intermedia tarea-etiqueta (se sincroniza desde Task.tags)"""
+    __tablename__ = "task_tags"
+
+    task_id = Column(Integer, ForeignKey("tasks.id", ondelete="CASCADE"), primary_key=True)
+    tag_id = Column(Integer, ForeignKey("tags.id", ondelete="CASCADE"), primary_key=True)
+    
+    __table_args__ = (
+        # La PK (task_id, tag_id) cubre las búsquedas por tarea
+        Index('idx_task_tag_tag', 'tag_id', 'task_id'),
+    )
+
+
+class ProjectTaskCounter(Base):
+    """
+    Contadores de tareas por proyecto mantenidos incrementalmente
+    (opcional, ver PROJECT_STATS_COUNTERS)
+    """
+    __tablename__ = "project_task_counters"
+
+    project_id = Column(Integer, ForeignKey("projects.id", ondelete="CASCADE"), primary_key=True)
+    total_tasks = Column(Integer, default=0, nullable=False)
+    completed_tasks = Column(Integer, default=0, nullable=False)
+    in_progress_tasks = Column(Integer, default=0, nullable=False)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False)
+
+    def __repr__(self):
+        return f"<ProjectTaskCounter(project_id={self.project_id}, total={self.total_tasks})>"
+
+
 class Comment(Base):
     """Modelo de Comentario"""
     __tablename__ = "comments"
 
-    id = Column(Integer, primary_key=True, index=True)
+    id = Column(Integer, primary_key=True)
     content = Column(Text, nullable=False)
     
     # Timestamps
@@ -212,10 +311,22 @@ class Comment(Base):
     
     # Índices
     __table_args__ = (
-        Index('idx_comment_task', 'task_id'),
         Index('idx_comment_author', 'author_id'),
-        Index('idx_comment_created', 'created_at'),
+        Index('idx_comment_task_created', 'task_id', 'created_at', 'id'),
     )
 
     def __repr__(self):
-        return f"<Comment(id={self.id}, task_id={self.task_id}, author_id={self.author_id})>"
\ No newline at end of file
+        return f"<Comment(id={self.id}, task_id={self.task_id}, author_id={self.author_id})>"
+
+
+# Número de subtareas directas, como subconsulta correlacionada (definida al
+# final: aliased() configura los mappers). Es diferida: sólo se calcula con
+# `undefer(Task.subtasks_count)`
+_Subtask = aliased(Task)
+Task.subtasks_count = column_property(
+    select(func.count(_Subtask.id))
+    .where(_Subtask.parent_task_id == Task.id)
+    .correlate_except(_Subtask)
+    .scalar_subquery(),
+    deferred=True
+)
@@ -0,0 +1,89 @@
+from sqlalchemy import Select, literal, tuple_
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.functions import FunctionElement
+from datetime import datetime
+from typing import Any, Optional, Sequence, Tuple
+import base64
+import json
+
+
+class InvalidCursor(ValueError):
+    """Cursor mal formado o manipulado"""
+
+
+def encode_cursor(created_at: datetime, id: int) -> str:
+    """Codifica la posición (created_at, id) como cursor opaco"""
+    raw = json.dumps([created_at.isoformat(), id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    """
+    Decodifica un cursor generado por `encode_cursor`
+
+    Raises:
+        InvalidCursor: Si el cursor no es válido
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, id = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return datetime.fromisoformat(created_at), int(id)
+    except (ValueError, TypeError) as e:
+        raise InvalidCursor("Invalid pagination cursor") from e
+
+
+class keyset_timestamp(FunctionElement):
+    """
+    Timestamp comparable para la paginación por cursor
+
+    En SQLite las fechas son texto: `CURRENT_TIMESTAMP` guarda
+    `YYYY-MM-DD HH:MM:SS` y los parámetros se enlazan como
+    `YYYY-MM-DD HH:MM:SS.ffffff`, así que en una comparación de cadenas la
+    misma fecha sin fracción queda "antes" que con ella. Allí se completa
+    siempre a microsegundos; en el resto de motores es la propia columna
+    (y se sigue usando el índice).
+    """
+    inherit_cache = True
+
+    def __init__(self, expression: Any):
+        super().__init__(expression)
+        self.type = expression.type
+
+
+@compiles(keyset_timestamp)
+def _compile_keyset_timestamp(element, compiler, **kw):
+    return compiler.process(element.clauses, **kw)
+
+
+@compiles(keyset_timestamp, "sqlite")
+def _compile_keyset_timestamp_sqlite(element, compiler, **kw):
+    return f"substr({compiler.process(element.clauses, **kw)} || '.000000', 1, 26)"
+
+
+def apply_keyset(
+    query: Select,
+    created_column: Any,
+    id_column: Any,
+    cursor: Optional[str]
+) -> Select:
+    """
+    Ordena por (created_at, id) descendente y, si hay cursor, devuelve sólo
+    las filas posteriores a él. Usa el índice compuesto (created_at, id)
+    en lugar de recorrer las filas saltadas con OFFSET.
+    """
+    created = keyset_timestamp(created_column)
+    if cursor:
+        created_at, id = decode_cursor(cursor)
+        query = query.where(
+            tuple_(created, id_column)
+            < tuple_(keyset_timestamp(literal(created_at, created_column.type)), id)
+        )
+    return query.order_by(created.desc(), id_column.desc())
+
+
+def next_cursor(items: Sequence[Any], limit: int) -> Optional[str]:
+    """Cursor de la página siguiente, o None si no hay más resultados"""
+    if not items or len(items) < limit:
+        return None
+    last = items[-1]
+    return encode_cursor(last.created_at, last.id)
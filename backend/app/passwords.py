@@ -0,0 +1,137 @@
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional, Tuple
+from passlib.context import CryptContext
+from fastapi import HTTPException, status
+from .config import settings
+from .metrics import registry
+import asyncio
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Password hashing context
+# `min_rounds` hace que `needs_update` marque los hashes con un coste menor
+# al configurado, para rehashearlos en el siguiente login
+pwd_context = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__default_rounds=settings.BCRYPT_ROUNDS,
+    bcrypt__min_rounds=settings.BCRYPT_ROUNDS,
+)
+
+
+def _hash(password: str) -> str:
+    return pwd_context.hash(password)
+
+
+def _verify(plain_password: str, hashed_password: str) -> bool:
+    return pwd_context.verify(plain_password, hashed_password)
+
+
+def _verify_and_update(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    return pwd_context.verify_and_update(plain_password, hashed_password)
+
+
+class PasswordService:
+    """
+    Ejecuta bcrypt fuera del event loop en un pool acotado
+
+    Si hay más operaciones pendientes que `max_pending` la petición se
+    rechaza con 503 en lugar de encolarse, para que una ráfaga de logins
+    no degrade al resto de requests del worker.
+    """
+
+    def __init__(
+        self,
+        executor: str = "thread",
+        max_workers: int = 4,
+        max_pending: int = 64
+    ):
+        if executor not in ("thread", "process"):
+            raise ValueError(f"Unknown password executor: {executor}")
+
+        self.executor_kind = executor
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self._executor: Optional[Executor] = None
+        self._pending = 0
+        self.rejected = 0
+
+    @property
+    def executor(self) -> Executor:
+        if self._executor is None:
+            if self.executor_kind == "process":
+                self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+            else:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.max_workers,
+                    thread_name_prefix="password-hash"
+                )
+        return self._executor
+
+    async def _run(self, func: Callable[..., Any], *args: Any) -> Any:
+        if self._pending >= self.max_pending:
+            self.rejected += 1
+            logger.warning(f"Password service overloaded ({self._pending} pending)")
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Server busy, try again later",
+                headers={"Retry-After": "1"},
+            )
+
+        self._pending += 1
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self.executor, func, *args)
+        finally:
+            self._pending -= 1
+
+    async def hash(self, password: str) -> str:
+        """Genera el hash de una contraseña"""
+        return await self._run(_hash, password)
+
+    async def verify(self, plain_password: str, hashed_password: str) -> bool:
+        """Verifica que la contraseña coincida con el hash"""
+        return await self._run(_verify, plain_password, hashed_password)
+
+    async def verify_and_update(
+        self,
+        plain_password: str,
+        hashed_password: str
+    ) -> Tuple[bool, Optional[str]]:
+        """
+        Verifica la contraseña y, si el hash está desactualizado, genera uno nuevo
+
+        Returns:
+            Tupla (válida, nuevo hash o None)
+        """
+        return await self._run(_verify_and_update, plain_password, hashed_password)
+
+    def stats(self) -> Dict[str, Any]:
+        """Estado del pool"""
+        return {
+            "executor": self.executor_kind,
+            "max_workers": self.max_workers,
+            "max_pending": self.max_pending,
+            "pending": self._pending,
+            "rejected": self.rejected,
+        }
+
+    def shutdown(self) -> None:
+        """Detiene el pool"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+
+password_service = PasswordService(
+    executor=settings.PASSWORD_HASH_EXECUTOR,
+    max_workers=settings.PASSWORD_HASH_WORKERS,
+    max_pending=settings.PASSWORD_HASH_MAX_PENDING
+)
+registry.gauge(
+    "password_hash_pending", "Password hash operations queued or running"
+).set_function(lambda: password_service._pending)
+registry.counter(
+    "password_hash_rejected_total", "Password hash operations shed with 503"
+).set_function(lambda: password_service.rejected)
@@ -0,0 +1,133 @@
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+import logging
+import time
+from .metrics import registry
+
+logger = logging.getLogger(__name__)
+
+CHECKOUT_WAIT = registry.histogram(
+    "db_pool_checkout_wait_seconds",
+    "Time spent waiting for a pooled connection",
+    ["pool"],
+    buckets=(0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 10.0, 30.0),
+)
+CHECKOUT_TIMEOUTS = registry.counter(
+    "db_pool_checkout_timeouts_total",
+    "Checkouts that failed because the pool was exhausted",
+    ["pool"],
+)
+CHECKED_OUT = registry.gauge(
+    "db_pool_checked_out",
+    "Connections currently checked out (in use)",
+    ["pool"],
+)
+OVERFLOW = registry.gauge(
+    "db_pool_overflow",
+    "Overflow connections currently open beyond pool_size",
+    ["pool"],
+)
+POOL_SIZE = registry.gauge("db_pool_size", "Configured pool_size", ["pool"])
+MAX_OVERFLOW = registry.gauge("db_pool_max_overflow", "Configured max_overflow", ["pool"])
+CONNECTIONS_OPENED = registry.counter(
+    "db_pool_connections_opened_total",
+    "New DBAPI connections established",
+    ["pool"],
+)
+CONNECTION_AGE = registry.histogram(
+    "db_pool_connection_age_seconds",
+    "Age of DBAPI connections when they are closed",
+    ["pool"],
+    buckets=(1, 10, 60, 300, 900, 1800, 3600, 7200),
+)
+RECYCLES = registry.counter(
+    "db_pool_recycles_total",
+    "Connections closed because they exceeded pool_recycle",
+    ["pool"],
+)
+INVALIDATIONS = registry.counter(
+    "db_pool_invalidations_total",
+    "Connections invalidated (disconnects, errors)",
+    ["pool"],
+)
+PRE_PING_FAILURES = registry.counter(
+    "db_pool_pre_ping_failures_total",
+    "pool_pre_ping checks that found a dead connection",
+    ["pool"],
+)
+
+
+class _CheckoutTimingMixin:
+    """Mide cuánto espera un checkout hasta obtener conexión"""
+
+    metrics_name = "default"
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        except PoolTimeoutError:
+            CHECKOUT_TIMEOUTS.inc(pool=self.metrics_name)
+            raise
+        finally:
+            CHECKOUT_WAIT.observe(time.perf_counter() - start, pool=self.metrics_name)
+
+
+class InstrumentedQueuePool(_CheckoutTimingMixin, QueuePool):
+    """QueuePool con métricas de espera en checkout"""
+
+
+class InstrumentedAsyncQueuePool(_CheckoutTimingMixin, AsyncAdaptedQueuePool):
+    """AsyncAdaptedQueuePool con métricas de espera en checkout"""
+
+
+def instrument_engine(engine: Engine, name: str) -> None:
+    """
+    Registra los listeners de pool y engine que alimentan las métricas
+
+    Args:
+        engine: Engine síncrono (para engines async usar `.sync_engine`)
+        name: Etiqueta `pool` de las métricas
+    """
+    pool = engine.pool
+    pool.metrics_name = name
+
+    if isinstance(pool, QueuePool):
+        POOL_SIZE.set(pool.size(), pool=name)
+        MAX_OVERFLOW.set(pool._max_overflow, pool=name)
+        CHECKED_OUT.set_function(pool.checkedout, pool=name)
+        OVERFLOW.set_function(lambda: max(0, pool.overflow()), pool=name)
+
+    @event.listens_for(pool, "connect")
+    def receive_connect(dbapi_conn, connection_record):
+        """Log cuando se establece una nueva conexión"""
+        CONNECTIONS_OPENED.inc(pool=name)
+        logger.debug("Database connection established")
+
+    @event.listens_for(pool, "checkout")
+    def receive_checkout(dbapi_conn, connection_record, connection_proxy):
+        """Log cuando se obtiene una conexión del pool"""
+        logger.debug("Connection checked out from pool")
+
+    @event.listens_for(pool, "close")
+    def receive_close(dbapi_conn, connection_record):
+        """Edad de la conexión al cerrarse y detección de reciclado"""
+        age = time.time() - connection_record.starttime
+        CONNECTION_AGE.observe(age, pool=name)
+        if -1 < pool._recycle <= age:
+            RECYCLES.inc(pool=name)
+            logger.debug(f"Connection recycled after {age:.0f}s")
+
+    @event.listens_for(pool, "invalidate")
+    def receive_invalidate(dbapi_conn, connection_record, exception):
+        """Conexión invalidada"""
+        INVALIDATIONS.inc(pool=name)
+
+    @event.listens_for(engine, "handle_error")
+    def receive_handle_error(context):
+        """Fallos de pool_pre_ping"""
+        if context.is_pre_ping:
+            PRE_PING_FAILURES.inc(pool=name)
+            logger.warning("Pre-ping found a stale database connection")
@@ -0,0 +1,118 @@
+from collections import OrderedDict
+from threading import Lock
+from typing import Any, Dict, Optional, Tuple
+import time
+
+
+class PrincipalCache:
+    """
+    Caché LRU con TTL de usuarios ya verificados, indexada por token.
+
+    Cada entrada guarda una instantánea de las columnas del usuario junto
+    con la versión del usuario en el momento de leerla. Invalidar un usuario
+    incrementa su versión, de modo que todas sus entradas dejan de ser
+    válidas sin tener que recorrer la caché.
+
+    La caché es local a cada proceso: en despliegues con varios workers la
+    invalidación sólo alcanza al worker que hizo la escritura y el TTL acota
+    cuánto tiempo puede servir datos obsoletos el resto.
+    """
+
+    def __init__(self, max_size: int = 10000, ttl_seconds: float = 60):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, Tuple[int, int, float, Dict[str, Any]]]" = OrderedDict()
+        self._versions: Dict[int, int] = {}
+        self._lock = Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def version(self, user_id: int) -> int:
+        """Versión actual de un usuario (leer antes de consultar la BD)"""
+        with self._lock:
+            return self._versions.get(user_id, 0)
+
+    def get(self, token: str) -> Optional[Dict[str, Any]]:
+        """
+        Devuelve la instantánea del usuario asociada al token
+
+        Returns:
+            Diccionario con las columnas del usuario o None si no hay
+            entrada válida
+        """
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(token)
+            if entry is None:
+                self.misses += 1
+                return None
+
+            user_id, version, expires_at, snapshot = entry
+            if expires_at <= now or version != self._versions.get(user_id, 0):
+                del self._entries[token]
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(token)
+            self.hits += 1
+            return snapshot
+
+    def set(
+        self,
+        token: str,
+        user_id: int,
+        snapshot: Dict[str, Any],
+        version: int,
+        token_exp: Optional[int] = None
+    ) -> None:
+        """
+        Guarda la instantánea de un usuario
+
+        Args:
+            token: Token JWT verificado
+            user_id: ID del usuario
+            snapshot: Columnas del usuario
+            version: Versión leída con `version()` antes de la consulta
+            token_exp: Expiración del token (epoch), acota el TTL
+        """
+        ttl = self.ttl_seconds
+        if token_exp is not None:
+            ttl = min(ttl, token_exp - time.time())
+        if ttl <= 0:
+            return
+
+        expires_at = time.monotonic() + ttl
+        with self._lock:
+            self._entries[token] = (user_id, version, expires_at, snapshot)
+            self._entries.move_to_end(token)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate_user(self, user_id: int) -> None:
+        """Invalida todas las entradas de un usuario"""
+        with self._lock:
+            self._versions[user_id] = self._versions.get(user_id, 0) + 1
+            self.invalidations += 1
+
+    def clear(self) -> None:
+        """Vacía la caché"""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Contadores de la caché"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+                "hit_ratio": self.hits / lookups if lookups else 0.0,
+            }
@@ -0,0 +1,183 @@
+from sqlalchemy import case, func, insert, select, update
+from sqlalchemy.orm import Session
+from typing import Dict, Iterable, List, Optional
+from .config import settings
+from .models import Project, ProjectTaskCounter, Status, Task
+
+
+def _empty_stats() -> Dict[str, int]:
+    return {"total_tasks": 0, "completed_tasks": 0, "in_progress_tasks": 0}
+
+
+def _aggregate_stats(db: Session, project_ids: Iterable[int]) -> Dict[int, Dict[str, int]]:
+    """
+    Estadísticas de varios proyectos con un único GROUP BY sobre tasks
+    (usa idx_task_project_status)
+    """
+    project_ids = list(project_ids)
+    stats = {project_id: _empty_stats() for project_id in project_ids}
+    if not project_ids:
+        return stats
+
+    rows = db.execute(
+        select(
+            Task.project_id,
+            func.count(Task.id),
+            func.sum(case((Task.status == Status.COMPLETED, 1), else_=0)),
+            func.sum(case((Task.status == Status.IN_PROGRESS, 1), else_=0)),
+        )
+        .where(Task.project_id.in_(project_ids))
+        .group_by(Task.project_id)
+    ).all()
+
+    for project_id, total, completed, in_progress in rows:
+        stats[project_id] = {
+            "total_tasks": total,
+            "completed_tasks": completed or 0,
+            "in_progress_tasks": in_progress or 0,
+        }
+    return stats
+
+
+def _counter_stats(db: Session, project_ids: Iterable[int]) -> Dict[int, Dict[str, int]]:
+    """
+    Estadísticas desde la tabla de contadores. Los proyectos sin contador
+    se calculan con GROUP BY; la lectura no escribe nada (los contadores se
+    siembran en la primera escritura, ver `adjust_counters`).
+    """
+    project_ids = list(project_ids)
+    stats = {}
+    for counter in db.scalars(
+        select(ProjectTaskCounter).where(ProjectTaskCounter.project_id.in_(project_ids))
+    ):
+        stats[counter.project_id] = {
+            "total_tasks": counter.total_tasks,
+            "completed_tasks": counter.completed_tasks,
+            "in_progress_tasks": counter.in_progress_tasks,
+        }
+
+    missing = [project_id for project_id in project_ids if project_id not in stats]
+    if missing:
+        stats.update(_aggregate_stats(db, missing))
+
+    return stats
+
+
+def get_project_stats(db: Session, project_ids: Iterable[int]) -> Dict[int, Dict[str, float]]:
+    """
+    Estadísticas de tareas de una página de proyectos
+
+    Returns:
+        project_id -> total_tasks, completed_tasks, in_progress_tasks,
+        completion_percentage
+    """
+    if settings.PROJECT_STATS_COUNTERS:
+        stats = _counter_stats(db, project_ids)
+    else:
+        stats = _aggregate_stats(db, project_ids)
+
+    for values in stats.values():
+        total = values["total_tasks"]
+        values["completion_percentage"] = (
+            round(values["completed_tasks"] * 100 / total, 2) if total else 0.0
+        )
+    return stats
+
+
+def status_deltas(status: Optional[Status], sign: int = 1) -> Dict[str, int]:
+    """Incremento de contadores que aporta una tarea con `status`"""
+    return {
+        "total_tasks": sign,
+        "completed_tasks": sign if status == Status.COMPLETED else 0,
+        "in_progress_tasks": sign if status == Status.IN_PROGRESS else 0,
+    }
+
+
+def _insert_ignoring_duplicates(db: Session):
+    """INSERT de contadores que ignora los que otra transacción ya sembró"""
+    dialect = db.get_bind().dialect.name
+    if dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert as dialect_insert
+    elif dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert as dialect_insert
+    else:
+        return insert(ProjectTaskCounter)
+    return dialect_insert(ProjectTaskCounter).on_conflict_do_nothing(index_elements=["project_id"])
+
+
+def _seed_counters(db: Session, values_by_project: Dict[int, Dict[str, int]]) -> List[int]:
+    """
+    Inserta los contadores de proyectos que aún no lo tienen (sin commit)
+
+    Returns:
+        Proyectos insertados; los que faltan ya tenían contador (p. ej.
+        sembrado por otra escritura concurrente)
+    """
+    statement = _insert_ignoring_duplicates(db)
+    return [
+        project_id
+        for project_id, values in values_by_project.items()
+        if db.execute(statement.values(project_id=project_id, **values)).rowcount
+    ]
+
+
+def _update_counter(db: Session, project_id: int, values: Dict) -> int:
+    return db.execute(
+        update(ProjectTaskCounter)
+        .where(ProjectTaskCounter.project_id == project_id)
+        .values(values)
+        .execution_options(synchronize_session=False)
+    ).rowcount
+
+
+def adjust_counters(db: Session, project_id: Optional[int], deltas: Dict[str, int]) -> None:
+    """
+    Aplica un incremento a los contadores de un proyecto (sin commit)
+
+    Si el proyecto aún no tiene contador se siembra con un GROUP BY, que ya
+    incluye el cambio en curso (se hace flush antes).
+    """
+    if not settings.PROJECT_STATS_COUNTERS or project_id is None:
+        return
+    if not any(deltas.values()):
+        return
+
+    increments = {
+        getattr(ProjectTaskCounter, field): getattr(ProjectTaskCounter, field) + delta
+        for field, delta in deltas.items()
+        if delta
+    }
+    if _update_counter(db, project_id, increments):
+        return
+
+    db.flush()
+    if not _seed_counters(db, _aggregate_stats(db, [project_id])):
+        # Lo sembró otra transacción sin este cambio: aplicar el incremento
+        _update_counter(db, project_id, increments)
+
+
+def refresh_counters(db: Session, project_ids: Iterable[int]) -> None:
+    """
+    Recalcula los contadores de varios proyectos (sin commit). Se usa tras
+    operaciones en lote, donde calcular deltas fila a fila no compensa.
+    """
+    if not settings.PROJECT_STATS_COUNTERS:
+        return
+    project_ids = [project_id for project_id in set(project_ids) if project_id is not None]
+    if not project_ids:
+        return
+
+    db.flush()
+    computed = _aggregate_stats(db, project_ids)
+    missing = {
+        project_id: values
+        for project_id, values in computed.items()
+        if not _update_counter(db, project_id, values)
+    }
+    if missing:
+        # Los proyectos ya borrados (p. ej. al eliminar a su dueño) no se siembran
+        existing = set(db.scalars(select(Project.id).where(Project.id.in_(missing))))
+        missing = {project_id: missing[project_id] for project_id in existing}
+    seeded = _seed_counters(db, missing)
+    for project_id in missing.keys() - set(seeded):
+        _update_counter(db, project_id, missing[project_id])
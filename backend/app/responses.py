@@ -0,0 +1,73 @@
+from fastapi import Response
+from pydantic import BaseModel, TypeAdapter
+from functools import lru_cache
+from typing import Any, Optional
+
+# Serialización rápida de respuestas
+#
+# Si un endpoint devuelve objetos, FastAPI los valida contra `response_model`,
+# los vuelca a dicts/listas JSON-compatibles y JSONResponse los pasa por
+# json.dumps. Aquí se valida y se serializa a bytes en un solo paso con
+# pydantic-core (`dump_json`), sin el árbol intermedio de objetos Python.
+
+
+# Tipos de respuesta cacheados: los schemas fijos caben de sobra; los
+# reducidos de `fields=` (uno por combinación) rotan dentro del límite
+ADAPTER_CACHE_SIZE = 256
+
+
+@lru_cache(maxsize=ADAPTER_CACHE_SIZE)
+def _adapter(schema: Any) -> TypeAdapter:
+    """TypeAdapter por tipo de respuesta (List[schemas.Task], ...); construirlo es caro"""
+    return TypeAdapter(schema)
+
+
+class PydanticJSONResponse(Response):
+    """
+    Respuesta JSON serializada por pydantic-core
+
+    Acepta bytes ya serializados, modelos de Pydantic o cualquier valor
+    que Pydantic sepa volcar (dicts, listas, datetimes...).
+    """
+
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        if isinstance(content, bytes):
+            return content
+        if isinstance(content, BaseModel):
+            return content.model_dump_json().encode()
+        return _adapter(Any).dump_json(content)
+
+
+def schema_response(
+    schema: Any,
+    content: Any,
+    response: Optional[Response] = None,
+    status_code: Optional[int] = None
+) -> PydanticJSONResponse:
+    """
+    Valida `content` (objetos ORM, dicts...) contra `schema` y lo serializa a bytes
+
+    Los endpoints que la usan mantienen `response_model=schema` para la
+    documentación. FastAPI no aplica los headers del parámetro `response`
+    cuando el endpoint devuelve su propia respuesta: se copian aquí.
+
+    Args:
+        schema: Tipo de la respuesta, p. ej. List[schemas.Task]
+        content: Valor devuelto por el endpoint
+        response: Respuesta inyectada por FastAPI (headers, status_code)
+        status_code: Status explícito (por defecto el de `response` o 200)
+    """
+    adapter = _adapter(schema)
+    body = adapter.dump_json(adapter.validate_python(content, from_attributes=True))
+
+    if status_code is None:
+        status_code = (response.status_code if response is not None else None) or 200
+    result = PydanticJSONResponse(body, status_code=status_code)
+    if response is not None:
+        result.raw_headers.extend(
+            (key, value) for key, value in response.raw_headers
+            if key not in (b"content-length", b"content-type")
+        )
+    return result
@@ -1,7 +1,50 @@
-from fastapi import APIRouter
+from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app import crud, schemas
+from app.auth import authenticate_user_async, create_tokens_for_user
+from app.database import get_async_db
 
 router = APIRouter()
 
 @router.get("/test")
 async def test_auth():
-    return {"message": "Auth router working"}
\ No newline at end of file
+    return {"message": "Auth router working"}
+
+
+@router.post("/login", response_model=schemas.Token)
+async def login(
+    credentials: schemas.LoginRequest,
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Obtener access y refresh tokens con username (o email) y contraseña
+
+    bcrypt se ejecuta en el pool de `password_service` y la consulta del
+    usuario en la sesión async: el login no bloquea el event loop.
+    """
+    user = await authenticate_user_async(db, credentials.username, credentials.password)
+    if user is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Incorrect username or password",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    return create_tokens_for_user(user)
+
+
+@router.post("/register", response_model=schemas.User, status_code=status.HTTP_201_CREATED)
+async def register(
+    user: schemas.UserCreate,
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Registrar un usuario nuevo"""
+    try:
+        return await crud.create_user_async(db, user)
+    except IntegrityError:
+        await db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Email or username already registered"
+        )
@@ -1,7 +1,134 @@
-from fastapi import APIRouter
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from typing import Iterator, List, Optional
+
+from app import crud, models, schemas
+from app.auth import get_current_user, get_current_user_async, get_user_async_read_db
+from app.config import settings
+from app.database import SessionLocal, get_read_db
+from app.loaders import loader_options
+from app.pagination import next_cursor
+from app.responses import schema_response
 
 router = APIRouter()
 
 @router.get("/test")
 async def test_comments():
-    return {"message": "Comments router working"}
\ No newline at end of file
+    return {"message": "Comments router working"}
+
+
+def _ensure_task(db: Session, task_id: int, current_user: models.User) -> None:
+    """404 si la tarea no existe o el usuario no puede verla (ver crud.can_access_task)"""
+    if not crud.can_access_task(db, task_id, current_user):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Task not found"
+        )
+
+
+async def _ensure_task_async(db: AsyncSession, task_id: int, current_user: models.User) -> None:
+    """Como `_ensure_task` (async)"""
+    if not await crud.can_access_task_async(db, task_id, current_user):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Task not found"
+        )
+
+
+@router.get("/task/{task_id}", response_model=List[schemas.Comment])
+async def list_task_comments(
+    task_id: int,
+    response: Response,
+    limit: int = Query(settings.DEFAULT_PAGE_SIZE, ge=1, le=settings.MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    current_user: models.User = Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_user_async_read_db)
+):
+    """
+    Listar los comentarios de una tarea (más recientes primero)
+    
+    El cursor de la página siguiente se devuelve en `X-Next-Cursor`
+    """
+    await _ensure_task_async(db, task_id, current_user)
+    
+    comments = await crud.get_comments_by_task_async(
+        db,
+        task_id,
+        limit=limit,
+        cursor=cursor,
+        options=loader_options(models.Comment, schemas.Comment)
+    )
+    
+    following = next_cursor(comments, limit)
+    if following:
+        response.headers["X-Next-Cursor"] = following
+    
+    return schema_response(List[schemas.Comment], comments, response)
+
+
+@router.get("/task/{task_id}/compact", response_model=List[schemas.CommentCompact])
+async def list_task_comments_compact(
+    task_id: int,
+    response: Response,
+    limit: int = Query(settings.DEFAULT_PAGE_SIZE, ge=1, le=settings.MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    current_user: models.User = Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_user_async_read_db)
+):
+    """
+    Listar los comentarios de una tarea con el autor resumido
+    
+    Igual que `/task/{task_id}` pero cada comentario incluye sólo id,
+    username, nombre y avatar del autor.
+    """
+    await _ensure_task_async(db, task_id, current_user)
+    
+    comments = await crud.get_comments_by_task_async(
+        db,
+        task_id,
+        limit=limit,
+        cursor=cursor,
+        options=crud.compact_comment_options()
+    )
+    
+    following = next_cursor(comments, limit)
+    if following:
+        response.headers["X-Next-Cursor"] = following
+    
+    return schema_response(List[schemas.CommentCompact], comments, response)
+
+
+def _stream_comments(task_id: int) -> Iterator[bytes]:
+    # Sesión propia: la de la dependencia se cierra antes de enviar el cuerpo
+    with SessionLocal(info={"use_replica": True}) as db:
+        for batch in crud.iter_comments_by_task(
+            db,
+            task_id,
+            batch_size=settings.COMMENT_STREAM_BATCH_SIZE,
+            options=crud.compact_comment_options()
+        ):
+            yield b"".join(
+                schemas.CommentCompact.model_validate(comment).model_dump_json().encode() + b"\n"
+                for comment in batch
+            )
+
+
+@router.get("/task/{task_id}/stream")
+def stream_task_comments(
+    task_id: int,
+    current_user: models.User = Depends(get_current_user),
+    db: Session = Depends(get_read_db)
+):
+    """
+    Hilo completo de comentarios de una tarea como NDJSON (uno por línea)
+    
+    Se lee en lotes por cursor y se envía según se lee, sin cargar el hilo
+    entero en memoria.
+    """
+    _ensure_task(db, task_id, current_user)
+    return StreamingResponse(
+        _stream_comments(task_id),
+        media_type="application/x-ndjson"
+    )
@@ -0,0 +1,42 @@
+from fastapi import APIRouter, Depends
+from fastapi.responses import PlainTextResponse
+from sqlalchemy.orm import Session
+import secrets
+
+from app.auth import get_current_superuser, get_current_user, oauth2_scheme
+from app.config import settings
+from app.database import get_db
+from app.metrics import render_metrics
+
+
+async def require_metrics_access(
+    token: str = Depends(oauth2_scheme),
+    db: Session = Depends(get_db)
+) -> None:
+    """
+    Acceso a las rutas internas: el token de scraping (INTERNAL_METRICS_TOKEN)
+    o el JWT de un superusuario
+
+    Raises:
+        HTTPException: 401 sin credenciales válidas, 403 si no es superusuario
+    """
+    expected = settings.INTERNAL_METRICS_TOKEN
+    if expected and secrets.compare_digest(token.encode(), expected.encode()):
+        return
+    await get_current_superuser(await get_current_user(token, db))
+
+
+router = APIRouter(dependencies=[Depends(require_metrics_access)])
+
+
+@router.get("/metrics", response_class=PlainTextResponse)
+def metrics():
+    """
+    Métricas internas en formato de texto de Prometheus
+    (peticiones por ruta, pool de conexiones, caché de usuarios, hashing de
+    contraseñas, logging). Con METRICS_MULTIPROC_DIR, sumadas entre workers.
+    """
+    return PlainTextResponse(
+        render_metrics(),
+        media_type="text/plain; version=0.0.4; charset=utf-8"
+    )
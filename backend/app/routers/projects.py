@@ -1,7 +1,126 @@
-from fastapi import APIRouter
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query, Response, status
+from sqlalchemy.orm import Session
+from typing import List, Optional
+
+from app import crud, models, schemas
+from app.auth import get_current_user
+from app.config import settings
+from app.database import SessionLocal, get_db, get_read_db
+from app.fieldsets import projection_options, sparse_schema
+from app.pagination import next_cursor
+from app.responses import schema_response
 
 router = APIRouter()
 
 @router.get("/test")
 async def test_projects():
-    return {"message": "Projects router working"}
\ No newline at end of file
+    return {"message": "Projects router working"}
+
+
+@router.get("/with-stats", response_model=List[schemas.ProjectWithStats])
+def list_projects_with_stats(
+    response: Response,
+    skip: int = Query(0, ge=0),
+    limit: int = Query(settings.DEFAULT_PAGE_SIZE, ge=1, le=settings.MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    current_user: models.User = Depends(get_current_user),
+    db: Session = Depends(get_read_db)
+):
+    """
+    Listar los proyectos del usuario con totales de tareas y % completado
+    """
+    projects = crud.get_projects_with_stats(
+        db,
+        owner_id=current_user.id,
+        skip=skip,
+        limit=limit,
+        cursor=cursor
+    )
+    
+    following = next_cursor(projects, limit)
+    if following:
+        response.headers["X-Next-Cursor"] = following
+    
+    return schema_response(List[schemas.ProjectWithStats], projects, response)
+
+
+@router.get("/", response_model=List[schemas.Project])
+def list_projects(
+    response: Response,
+    skip: int = Query(0, ge=0),
+    limit: int = Query(settings.DEFAULT_PAGE_SIZE, ge=1, le=settings.MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    fields: Optional[str] = Query(None, description="Campos a devolver, separados por comas (id siempre)"),
+    current_user: models.User = Depends(get_current_user),
+    db: Session = Depends(get_read_db)
+):
+    """
+    Listar los proyectos del usuario
+    
+    El cursor de la página siguiente se devuelve en `X-Next-Cursor`.
+    Con `fields` sólo se devuelven (y leen) esos campos.
+    """
+    schema = sparse_schema(schemas.Project, fields)
+    projects = crud.get_projects(
+        db,
+        owner_id=current_user.id,
+        skip=skip,
+        limit=limit,
+        cursor=cursor,
+        options=projection_options(models.Project, schema)
+    )
+    
+    following = next_cursor(projects, limit)
+    if following:
+        response.headers["X-Next-Cursor"] = following
+    
+    return schema_response(List[schema], projects, response)
+
+
+@router.get("/{project_id}/tree", response_model=List[schemas.TaskTreeNode])
+def read_project_tree(
+    project_id: int,
+    depth: int = Query(settings.TASK_TREE_DEFAULT_DEPTH, ge=0, le=settings.TASK_TREE_MAX_DEPTH),
+    current_user: models.User = Depends(get_current_user),
+    db: Session = Depends(get_read_db)
+):
+    """Obtener las tareas raíz de un proyecto con sus subtareas anidadas"""
+    project = crud.get_project(db, project_id)
+    if not project or (project.owner_id != current_user.id and not current_user.is_superuser):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Project not found"
+        )
+    return crud.get_project_task_forest(db, project_id, max_depth=depth)
+
+
+def _purge_in_background(project_id: int) -> None:
+    with SessionLocal() as db:
+        crud.purge_project(db, project_id)
+
+
+@router.delete("/{project_id}", status_code=status.HTTP_204_NO_CONTENT, response_model=None)
+def delete_project(
+    project_id: int,
+    background_tasks: BackgroundTasks,
+    background: bool = Query(False, description="Borrar por partes en segundo plano (proyectos grandes)"),
+    current_user: models.User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Eliminar un proyecto con sus tareas, comentarios y asignaciones
+
+    El borrado en cascada lo hace la base de datos. Con `background=true` el
+    proyecto se desactiva al momento y sus tareas se borran por partes.
+    """
+    project = crud.get_project(db, project_id)
+    if not project or (project.owner_id != current_user.id and not current_user.is_superuser):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Project not found"
+        )
+    if background:
+        background_tasks.add_task(_purge_in_background, project_id)
+        return Response(status_code=status.HTTP_202_ACCEPTED)
+    crud.delete_project(db, project_id)
+    return Response(status_code=status.HTTP_204_NO_CONTENT)
@@ -1,7 +1,271 @@
-from fastapi import APIRouter
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query, Response, status
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, undefer
+from typing import List, Optional
+
+from app import crud, models, schemas
+from app.auth import get_current_superuser, get_current_user, get_current_user_async, get_user_async_read_db
+from app.config import settings
+from app.counts import CountMode
+from app.database import SessionLocal, get_db, get_read_db
+from app.fieldsets import projection_options, sparse_schema
+from app.loaders import loader_options
+from app.pagination import next_cursor
+from app.responses import schema_response
 
 router = APIRouter()
 
 @router.get("/test")
 async def test_tasks():
-    return {"message": "Tasks router working"}
\ No newline at end of file
+    return {"message": "Tasks router working"}
+
+
+@router.get("/", response_model=List[schemas.Task])
+async def list_tasks(
+    response: Response,
+    project_id: Optional[int] = None,
+    task_status: Optional[models.Status] = Query(None, alias="status"),
+    priority: Optional[models.Priority] = None,
+    tags_any: Optional[List[str]] = Query(None),
+    tags_all: Optional[List[str]] = Query(None),
+    include_archived: bool = False,
+    skip: int = Query(0, ge=0),
+    limit: int = Query(settings.DEFAULT_PAGE_SIZE, ge=1, le=settings.MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    count_mode: Optional[CountMode] = None,
+    fields: Optional[str] = Query(None, description="Campos a devolver, separados por comas (id siempre)"),
+    current_user: models.User = Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_user_async_read_db)
+):
+    """
+    Listar las tareas del usuario
+    
+    - **cursor**: paginación por cursor (recomendada). El cursor de la
+      página siguiente se devuelve en el header `X-Next-Cursor`
+    - **skip**: paginación por offset (compatibilidad), se ignora si hay cursor
+    - **tags_any** / **tags_all**: tareas con alguna / todas las etiquetas
+      (repetir el parámetro: `?tags_any=frontend&tags_any=bug`)
+    - **include_archived**: incluir también las tareas archivadas
+    - **count_mode**: `exact`, `cached` o `estimated`; si se indica, el total
+      se devuelve en `X-Total-Count`
+    - **fields**: sólo estos campos (`?fields=title,status,priority,due_date`);
+      también se limitan las columnas leídas de la base de datos
+    """
+    schema = sparse_schema(schemas.Task, fields)
+    tasks = await crud.get_tasks_async(
+        db,
+        user_id=current_user.id,
+        project_id=project_id,
+        status=task_status,
+        priority=priority,
+        skip=skip,
+        limit=limit,
+        cursor=cursor,
+        options=projection_options(models.Task, schema),
+        tags_any=tags_any,
+        tags_all=tags_all,
+        include_archived=include_archived,
+        archived_options=projection_options(models.ArchivedTask, schema)
+    )
+    
+    following = next_cursor(tasks, limit)
+    if following:
+        response.headers["X-Next-Cursor"] = following
+    
+    if count_mode is not None:
+        # La caché y la estimación del planner son síncronas: run_sync las
+        # ejecuta con la sesión síncrona subyacente sin bloquear el event loop
+        total = await db.run_sync(
+            crud.count_tasks,
+            mode=count_mode,
+            user_id=current_user.id,
+            project_id=project_id,
+            status=task_status,
+            priority=priority,
+            tags_any=tags_any,
+            tags_all=tags_all
+        )
+        response.headers["X-Total-Count"] = str(total)
+    
+    return schema_response(List[schema], tasks, response)
+
+
+@router.post("/bulk", response_model=schemas.TaskBulkCreateResult)
+def bulk_create_tasks(
+    payload: schemas.TaskBulkCreate,
+    current_user: models.User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Crear tareas en lote (importaciones)
+    
+    Las tareas válidas se crean en una sola transacción; los errores se
+    devuelven por índice. Con **atomic** no se crea ninguna si alguna falla.
+    Un proyecto o tarea padre inexistente o de otro usuario es un error del
+    elemento que lo referencia.
+    """
+    if len(payload.items) > settings.BULK_MAX_ITEMS:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"At most {settings.BULK_MAX_ITEMS} items per request"
+        )
+    
+    return crud.create_tasks_bulk(
+        db,
+        payload.items,
+        user_id=current_user.id,
+        atomic=payload.atomic,
+        owner_id=None if current_user.is_superuser else current_user.id
+    )
+
+
+@router.patch("/bulk", response_model=schemas.TaskBulkUpdateResult)
+def bulk_update_tasks(
+    changes: schemas.TaskBulkUpdate,
+    current_user: models.User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Cambiar estado, prioridad o asignado de muchas tareas a la vez
+    
+    - **task_ids** o **filter**: tareas afectadas
+    - **status** / **priority**: nuevos valores
+    - **reassign_from** + **reassign_to**: mover asignaciones entre usuarios
+    
+    Los usuarios normales sólo pueden modificar sus propias tareas.
+    """
+    owner_id = None if current_user.is_superuser else current_user.id
+    return crud.bulk_update_tasks(db, changes, owner_id=owner_id)
+
+
+@router.get("/tags", response_model=List[schemas.TagCount])
+def tag_cloud(
+    project_id: Optional[int] = None,
+    limit: int = Query(50, ge=1, le=500),
+    current_user: models.User = Depends(get_current_user),
+    db: Session = Depends(get_read_db)
+):
+    """Etiquetas de las tareas del usuario con su número de tareas"""
+    return crud.get_task_tag_cloud(
+        db,
+        user_id=current_user.id,
+        project_id=project_id,
+        limit=limit
+    )
+
+
+@router.get("/search", response_model=List[schemas.SearchHit])
+def search_tasks(
+    q: str = Query(..., min_length=1, max_length=200),
+    limit: int = Query(20, ge=1, le=settings.SEARCH_MAX_RESULTS),
+    current_user: models.User = Depends(get_current_user),
+    db: Session = Depends(get_read_db)
+):
+    """
+    Buscar en títulos y descripciones de tareas y en comentarios
+    
+    Resultados ordenados por relevancia; cada palabra se busca como prefijo.
+    Los usuarios normales sólo ven sus tareas y las que tienen asignadas.
+    """
+    user_id = None if current_user.is_superuser else current_user.id
+    return crud.search_tasks(db, q, user_id=user_id, limit=limit)
+
+
+def _archive_in_background(older_than_days: Optional[int]) -> None:
+    with SessionLocal() as db:
+        crud.archive_old_tasks(db, older_than_days)
+
+
+@router.post("/archive", response_model=schemas.Message, status_code=status.HTTP_202_ACCEPTED)
+def archive_tasks(
+    background_tasks: BackgroundTasks,
+    older_than_days: Optional[int] = Query(None, ge=0),
+    current_user: models.User = Depends(get_current_superuser)
+):
+    """
+    Archivar las tareas terminadas hace más de `older_than_days` días
+    (por defecto ARCHIVE_AFTER_DAYS). Se ejecuta en segundo plano, por lotes.
+    """
+    background_tasks.add_task(_archive_in_background, older_than_days)
+    return {"message": "Archiving started"}
+
+
+@router.post("/{task_id}/restore", response_model=schemas.Task)
+def restore_task(
+    task_id: int,
+    current_user: models.User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Devolver una tarea archivada a las tareas activas"""
+    archived = db.get(models.ArchivedTask, task_id)
+    if not archived:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Archived task not found"
+        )
+    if archived.user_id != current_user.id and not current_user.is_superuser:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Not enough privileges"
+        )
+    return crud.restore_archived_task(db, task_id)
+
+
+@router.get("/{task_id}", response_model=schemas.TaskWithDetails)
+async def read_task(
+    task_id: int,
+    include_archived: bool = False,
+    current_user: models.User = Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_user_async_read_db)
+):
+    """
+    Obtener una tarea con su propietario, proyecto y asignados
+    
+    Sólo la ven su propietario, sus asignados y los superusuarios.
+    Con **include_archived** también se buscan las tareas archivadas.
+    """
+    task = await crud.get_task_async(
+        db,
+        task_id,
+        options=(
+            *loader_options(models.Task, schemas.TaskWithDetails),
+            undefer(models.Task.subtasks_count),
+        ),
+        include_archived=include_archived,
+        archived_options=loader_options(models.ArchivedTask, schemas.TaskWithDetails)
+    )
+    # 404 también sin acceso, para no revelar qué IDs existen
+    if not task or not crud.task_visible_to(task, current_user):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Task not found"
+        )
+    return task
+
+
+@router.get("/{task_id}/tree", response_model=schemas.TaskTreeNode)
+def read_task_tree(
+    task_id: int,
+    depth: int = Query(settings.TASK_TREE_DEFAULT_DEPTH, ge=0, le=settings.TASK_TREE_MAX_DEPTH),
+    current_user: models.User = Depends(get_current_user),
+    db: Session = Depends(get_read_db)
+):
+    """
+    Obtener una tarea con todas sus subtareas anidadas
+    
+    Cada nodo incluye agregados de su subárbol: número de subtareas,
+    horas estimadas/reales sumadas y progreso medio. Mismo acceso que
+    al leer la tarea raíz.
+    """
+    if not crud.can_access_task(db, task_id, current_user):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Task not found"
+        )
+    tree = crud.get_task_subtree(db, task_id, max_depth=depth)
+    if not tree:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Task not found"
+        )
+    return tree
@@ -1,7 +1,49 @@
-from fastapi import APIRouter
+from fastapi import APIRouter, Depends, Query, Response
+from sqlalchemy.orm import Session
+from typing import List, Optional
+
+from app import crud, models, schemas
+from app.auth import get_current_superuser
+from app.config import settings
+from app.database import get_read_db
+from app.fieldsets import projection_options, sparse_schema
+from app.pagination import next_cursor
+from app.responses import schema_response
 
 router = APIRouter()
 
 @router.get("/test")
 async def test_users():
-    return {"message": "Users router working"}
\ No newline at end of file
+    return {"message": "Users router working"}
+
+
+@router.get("/", response_model=List[schemas.User])
+def list_users(
+    response: Response,
+    skip: int = Query(0, ge=0),
+    limit: int = Query(settings.DEFAULT_PAGE_SIZE, ge=1, le=settings.MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    fields: Optional[str] = Query(None, description="Campos a devolver, separados por comas (id siempre)"),
+    current_user: models.User = Depends(get_current_superuser),
+    db: Session = Depends(get_read_db)
+):
+    """
+    Listar usuarios (sólo superusuarios: incluye emails)
+    
+    El cursor de la página siguiente se devuelve en `X-Next-Cursor`.
+    Con `fields` sólo se devuelven (y leen) esos campos.
+    """
+    schema = sparse_schema(schemas.User, fields)
+    users = crud.get_users(
+        db,
+        skip=skip,
+        limit=limit,
+        cursor=cursor,
+        options=projection_options(models.User, schema)
+    )
+    
+    following = next_cursor(users, limit)
+    if following:
+        response.headers["X-Next-Cursor"] = following
+    
+    return schema_response(List[schema], users, response)
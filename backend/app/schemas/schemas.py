@@ -1,9 +1,14 @@
-from pydantic import BaseModel, EmailStr, Field, validator
-from typing import Optional, List
+from pydantic import BaseModel, EmailStr, Field, WithJsonSchema, model_validator, validator
+from typing import Annotated, Any, Dict, Optional, List
 from datetime import datetime
 from .models import Priority, Status, UserRole
 
 
+# Email ya validado al guardarse: en las respuestas no se vuelve a pasar por
+# email-validator (~100 µs por valor); se documenta igual que EmailStr
+StoredEmail = Annotated[str, WithJsonSchema({"type": "string", "format": "email"})]
+
+
 # ============ User Schemas ============
 class UserBase(BaseModel):
     email: EmailStr
@@ -42,6 +47,7 @@ class UserUpdatePassword(BaseModel):
 
 
 class User(UserBase):
+    email: StoredEmail
     id: int
     role: UserRole
     is_active: bool
@@ -154,6 +160,12 @@ class TaskUpdate(BaseModel):
     assignee_ids: Optional[List[int]] = None
 
 
+class AssigneeDiff(BaseModel):
+    """Cambios de asignación aplicados a una tarea"""
+    added: List[int] = []
+    removed: List[int] = []
+
+
 class TaskAssignee(BaseModel):
     id: int
     username: str
@@ -173,6 +185,7 @@ class Task(TaskBase):
     created_at: datetime
     updated_at: datetime
     assignees: List[TaskAssignee] = []
+    archived_at: Optional[datetime] = None  # Sólo en tareas archivadas
 
     class Config:
         from_attributes = True
@@ -184,6 +197,90 @@ class TaskWithDetails(Task):
     subtasks_count: int = 0
 
 
+class TaskTreeNode(BaseModel):
+    """Nodo de un árbol de subtareas con agregados de su subárbol"""
+    id: int
+    title: str
+    status: Status
+    priority: Priority
+    progress: int
+    estimated_hours: Optional[int] = None
+    actual_hours: Optional[int] = None
+    project_id: Optional[int] = None
+    parent_task_id: Optional[int] = None
+    depth: int
+    subtasks_count: int = 0
+    descendants_count: int = 0
+    total_estimated_hours: int = 0
+    total_actual_hours: int = 0
+    average_progress: float = 0.0
+    truncated: bool = False  # Tiene subtareas por debajo de la profundidad pedida
+    children: List["TaskTreeNode"] = []
+
+
+class TaskBulkCreate(BaseModel):
+    """Lote de tareas a crear; cada elemento se valida como TaskCreate"""
+    items: List[Dict[str, Any]] = Field(..., min_length=1)
+    atomic: bool = False  # Si hay errores, no crear ninguna
+
+
+class BulkItemError(BaseModel):
+    index: int
+    errors: List[Dict[str, Any]]
+
+
+class TaskBulkCreateResult(BaseModel):
+    created_ids: List[int] = []
+    errors: List[BulkItemError] = []
+
+
+class TaskBulkFilter(BaseModel):
+    project_id: Optional[int] = None
+    status: Optional[Status] = None
+    priority: Optional[Priority] = None
+    assignee_id: Optional[int] = None
+
+
+class TaskBulkUpdate(BaseModel):
+    """Cambio aplicado a un conjunto de tareas (por IDs o por filtro)"""
+    task_ids: Optional[List[int]] = Field(None, min_length=1)
+    filter: Optional[TaskBulkFilter] = None
+    status: Optional[Status] = None
+    priority: Optional[Priority] = None
+    reassign_from: Optional[int] = None
+    reassign_to: Optional[int] = None
+    
+    @model_validator(mode='after')
+    def validate_target_and_changes(self):
+        if (self.task_ids is None) == (self.filter is None):
+            raise ValueError('Provide exactly one of task_ids or filter')
+        if (self.reassign_from is None) != (self.reassign_to is None):
+            raise ValueError('reassign_from and reassign_to go together')
+        if self.reassign_from is not None and self.reassign_from == self.reassign_to:
+            raise ValueError('reassign_from and reassign_to must be different users')
+        if self.status is None and self.priority is None and self.reassign_from is None:
+            raise ValueError('No changes requested')
+        return self
+
+
+class TaskBulkUpdateResult(BaseModel):
+    updated: int = 0
+    reassigned: int = 0
+
+
+class TagCount(BaseModel):
+    name: str
+    count: int
+
+
+class SearchHit(BaseModel):
+    entity_type: str  # "task" o "comment"
+    entity_id: int
+    task_id: int
+    title: str  # Título de la tarea
+    rank: float
+
+
 # ============ Comment Schemas ============
 class CommentBase(BaseModel):
     content: str = Field(..., min_length=1)
@@ -209,6 +306,27 @@ class Comment(CommentBase):
         from_attributes = True
 
 
+class CommentAuthor(BaseModel):
+    """Proyección mínima del autor para hilos de comentarios"""
+    id: int
+    username: str
+    full_name: Optional[str] = None
+    avatar_url: Optional[str] = None
+
+    class Config:
+        from_attributes = True
+
+
+class CommentCompact(CommentBase):
+    id: int
+    created_at: datetime
+    updated_at: datetime
+    author: CommentAuthor
+
+    class Config:
+        from_attributes = True
+
+
 # ============ Pagination Schema ============
 class PaginationParams(BaseModel):
     skip: int = Field(default=0, ge=0)
@@ -0,0 +1,306 @@
+from sqlalchemy import Select, bindparam, column, delete, event, table, text
+from sqlalchemy.orm import Session
+from typing import Iterable, List, Optional, Tuple
+import logging
+import re
+from .config import settings
+from .database import Base
+
+logger = logging.getLogger(__name__)
+
+# Índice de búsqueda de texto completo sobre tareas y comentarios
+#
+# - PostgreSQL: tabla `search_documents` con un tsvector ponderado (título
+#   con peso A, descripción/contenido con peso B) e índice GIN. La FK a
+#   tasks con ON DELETE CASCADE limpia el índice al borrar tareas.
+# - SQLite: tabla virtual FTS5 con el mismo nombre, para poder probar la
+#   búsqueda en local.
+#
+# Las funciones `index_*` / `remove_*` no hacen commit: se llaman desde las
+# rutas de escritura de crud.py dentro de la misma transacción.
+
+SEARCH_TABLE = "search_documents"
+MAX_TERMS = 8
+
+_POSTGRES_DDL = [
+    f"""
+    CREATE TABLE IF NOT EXISTS {SEARCH_TABLE} (
+        entity_type VARCHAR(16) NOT NULL,
+        entity_id INTEGER NOT NULL,
+        task_id INTEGER NOT NULL REFERENCES tasks(id) ON DELETE CASCADE,
+        document TSVECTOR NOT NULL,
+        PRIMARY KEY (entity_type, entity_id)
+    )
+    """,
+    f"CREATE INDEX IF NOT EXISTS idx_search_document ON {SEARCH_TABLE} USING GIN (document)",
+    f"CREATE INDEX IF NOT EXISTS idx_search_task ON {SEARCH_TABLE} (task_id)",
+]
+
+_SQLITE_DDL = [
+    f"""
+    CREATE VIRTUAL TABLE IF NOT EXISTS {SEARCH_TABLE} USING fts5(
+        entity_type UNINDEXED,
+        entity_id UNINDEXED,
+        task_id UNINDEXED,
+        title,
+        body,
+        tokenize = 'unicode61 remove_diacritics 2'
+    )
+    """,
+]
+
+
+def _dialect(bind) -> str:
+    return bind.dialect.name
+
+
+def create_search_schema(connection) -> None:
+    """Crea la tabla/índices de búsqueda para el motor de la conexión"""
+    dialect = _dialect(connection)
+    if dialect == "postgresql":
+        statements = _POSTGRES_DDL
+    elif dialect == "sqlite":
+        statements = _SQLITE_DDL
+    else:
+        logger.warning(f"Full-text search not supported on {dialect}")
+        return
+
+    for statement in statements:
+        connection.execute(text(statement))
+
+
+@event.listens_for(Base.metadata, "after_create")
+def _create_search_schema(target, connection, **kw):
+    """Crea el índice de búsqueda junto con el resto de tablas (create_all)"""
+    create_search_schema(connection)
+
+
+def _upsert_statement(dialect: str):
+    if dialect == "postgresql":
+        return text(f"""
+            INSERT INTO {SEARCH_TABLE} (entity_type, entity_id, task_id, document)
+            VALUES (
+                :entity_type, :entity_id, :task_id,
+                setweight(to_tsvector(CAST(:config AS regconfig), coalesce(:title, '')), 'A')
+                || setweight(to_tsvector(CAST(:config AS regconfig), coalesce(:body, '')), 'B')
+            )
+            ON CONFLICT (entity_type, entity_id)
+            DO UPDATE SET task_id = EXCLUDED.task_id, document = EXCLUDED.document
+        """)
+    return text(f"""
+        INSERT INTO {SEARCH_TABLE} (entity_type, entity_id, task_id, title, body)
+        VALUES (:entity_type, :entity_id, :task_id, coalesce(:title, ''), coalesce(:body, ''))
+    """)
+
+
+def _index(db: Session, rows: List[dict]) -> None:
+    if not rows:
+        return
+    dialect = _dialect(db.get_bind())
+    if dialect not in ("postgresql", "sqlite"):
+        return
+
+    if dialect == "sqlite":
+        # FTS5 no tiene restricciones únicas: borrar antes de insertar
+        for row in rows:
+            db.execute(
+                text(f"DELETE FROM {SEARCH_TABLE} WHERE entity_type = :entity_type AND entity_id = :entity_id"),
+                {"entity_type": row["entity_type"], "entity_id": row["entity_id"]}
+            )
+
+    params = [{**row, "config": settings.SEARCH_TEXT_CONFIG} for row in rows]
+    db.execute(_upsert_statement(dialect), params)
+
+
+def index_tasks(db: Session, rows: Iterable[Tuple[int, str, Optional[str]]]) -> None:
+    """Indexa (o reindexa) tareas a partir de tuplas (id, título, descripción)"""
+    _index(db, [
+        {
+            "entity_type": "task",
+            "entity_id": task_id,
+            "task_id": task_id,
+            "title": title,
+            "body": description,
+        }
+        for task_id, title, description in rows
+    ])
+
+
+def index_task(db: Session, task) -> None:
+    """Indexa (o reindexa) título y descripción de una tarea"""
+    index_tasks(db, [(task.id, task.title, task.description)])
+
+
+def index_comment(db: Session, comment) -> None:
+    """Indexa (o reindexa) el contenido de un comentario"""
+    _index(db, [{
+        "entity_type": "comment",
+        "entity_id": comment.id,
+        "task_id": comment.task_id,
+        "title": None,
+        "body": comment.content,
+    }])
+
+
+def remove_task(db: Session, task_id: int) -> None:
+    """
+    Elimina del índice una tarea y sus comentarios
+
+    En PostgreSQL la FK ya lo hace en cascada; en SQLite las entradas de
+    subtareas borradas en cascada quedan huérfanas, pero `search` las
+    descarta al hacer JOIN con tasks.
+    """
+    remove_tasks(db, [task_id])
+
+
+def remove_tasks(db: Session, task_ids: List[int]) -> None:
+    """Elimina del índice varias tareas y sus comentarios (un DELETE)"""
+    if task_ids and _dialect(db.get_bind()) in ("postgresql", "sqlite"):
+        db.execute(
+            text(f"DELETE FROM {SEARCH_TABLE} WHERE task_id IN :task_ids").bindparams(
+                bindparam("task_ids", expanding=True)
+            ),
+            {"task_ids": list(task_ids)}
+        )
+
+
+def remove_tasks_matching(db: Session, task_ids: Select) -> None:
+    """
+    Elimina del índice las tareas de una subconsulta de IDs
+
+    Sólo hace falta en SQLite: en PostgreSQL la FK ya lo hace en cascada.
+    """
+    if _dialect(db.get_bind()) == "sqlite":
+        documents = table(SEARCH_TABLE, column("task_id"))
+        db.execute(delete(documents).where(documents.c.task_id.in_(task_ids)))
+
+
+def remove_comments_matching(db: Session, comment_ids: Select) -> None:
+    """
+    Elimina del índice los comentarios de una subconsulta de IDs
+
+    Necesario en todos los motores cuando se borran comentarios en cascada
+    sin borrar su tarea (p. ej. al eliminar al autor).
+    """
+    if _dialect(db.get_bind()) in ("postgresql", "sqlite"):
+        documents = table(SEARCH_TABLE, column("entity_type"), column("entity_id"))
+        db.execute(delete(documents).where(
+            documents.c.entity_type == "comment",
+            documents.c.entity_id.in_(comment_ids)
+        ))
+
+
+def remove_comment(db: Session, comment_id: int) -> None:
+    """Elimina del índice un comentario"""
+    if _dialect(db.get_bind()) in ("postgresql", "sqlite"):
+        db.execute(
+            text(f"DELETE FROM {SEARCH_TABLE} WHERE entity_type = 'comment' AND entity_id = :entity_id"),
+            {"entity_id": comment_id}
+        )
+
+
+def rebuild_index(db: Session) -> None:
+    """
+    Reconstruye el índice completo desde tasks y comments (dos INSERT ... SELECT)
+
+    Para poblar el índice en bases de datos existentes.
+    """
+    dialect = _dialect(db.get_bind())
+    db.execute(text(f"DELETE FROM {SEARCH_TABLE}"))
+
+    if dialect == "postgresql":
+        db.execute(text(f"""
+            INSERT INTO {SEARCH_TABLE} (entity_type, entity_id, task_id, document)
+            SELECT 'task', id, id,
+                setweight(to_tsvector(CAST(:config AS regconfig), coalesce(title, '')), 'A')
+                || setweight(to_tsvector(CAST(:config AS regconfig), coalesce(description, '')), 'B')
+            FROM tasks
+        """), {"config": settings.SEARCH_TEXT_CONFIG})
+        db.execute(text(f"""
+            INSERT INTO {SEARCH_TABLE} (entity_type, entity_id, task_id, document)
+            SELECT 'comment', id, task_id,
+                setweight(to_tsvector(CAST(:config AS regconfig), coalesce(content, '')), 'B')
+            FROM comments
+        """), {"config": settings.SEARCH_TEXT_CONFIG})
+    elif dialect == "sqlite":
+        db.execute(text(f"""
+            INSERT INTO {SEARCH_TABLE} (entity_type, entity_id, task_id, title, body)
+            SELECT 'task', id, id, coalesce(title, ''), coalesce(description, '') FROM tasks
+        """))
+        db.execute(text(f"""
+            INSERT INTO {SEARCH_TABLE} (entity_type, entity_id, task_id, title, body)
+            SELECT 'comment', id, task_id, '', coalesce(content, '') FROM comments
+        """))
+
+    db.commit()
+
+
+def _terms(query: str) -> List[str]:
+    """Palabras de la búsqueda (sólo caracteres de palabra)"""
+    return re.findall(r"\w+", query.lower(), re.UNICODE)[:MAX_TERMS]
+
+
+def search(
+    db: Session,
+    query: str,
+    user_id: Optional[int] = None,
+    limit: int = 20
+) -> List[dict]:
+    """
+    Busca tareas y comentarios por texto, ordenados por relevancia
+
+    Cada palabra se busca como prefijo ("dise" encuentra "diseño") y deben
+    aparecer todas.
+
+    Args:
+        db: Sesión de base de datos
+        query: Texto a buscar
+        user_id: Si se indica, sólo tareas propias o asignadas a ese usuario
+        limit: Número máximo de resultados
+
+    Returns:
+        Lista de dicts con entity_type, entity_id, task_id, title y rank
+    """
+    terms = _terms(query)
+    if not terms:
+        return []
+
+    dialect = _dialect(db.get_bind())
+    scope = ""
+    params = {"limit": limit, "user_id": user_id}
+    if user_id is not None:
+        scope = """
+            AND (t.user_id = :user_id OR EXISTS (
+                SELECT 1 FROM task_assignments ta
+                WHERE ta.task_id = t.id AND ta.user_id = :user_id
+            ))
+        """
+
+    if dialect == "postgresql":
+        params["tsquery"] = " & ".join(f"{term}:*" for term in terms)
+        params["config"] = settings.SEARCH_TEXT_CONFIG
+        statement = text(f"""
+            SELECT s.entity_type, s.entity_id, s.task_id, t.title,
+                   ts_rank(s.document, q.query) AS rank
+            FROM {SEARCH_TABLE} s
+            JOIN tasks t ON t.id = s.task_id,
+                 to_tsquery(CAST(:config AS regconfig), :tsquery) AS q(query)
+            WHERE s.document @@ q.query {scope}
+            ORDER BY rank DESC, s.task_id DESC
+            LIMIT :limit
+        """)
+    elif dialect == "sqlite":
+        params["match"] = " AND ".join(f'"{term}"*' for term in terms)
+        statement = text(f"""
+            SELECT s.entity_type, s.entity_id, s.task_id, t.title,
+                   -bm25({SEARCH_TABLE}, 0, 0, 0, 4.0, 1.0) AS rank
+            FROM {SEARCH_TABLE} s
+            JOIN tasks t ON t.id = s.task_id
+            WHERE {SEARCH_TABLE} MATCH :match {scope}
+            ORDER BY rank DESC, s.task_id DESC
+            LIMIT :limit
+        """)
+    else:
+        return []
+
+    return [dict(row._mapping) for row in db.execute(statement, params)]
@@ -0,0 +1,166 @@
+from sqlalchemy import Select, delete, func, insert, select
+from sqlalchemy.orm import Session
+from typing import Dict, Iterable, List, Optional, Tuple
+import json
+from . import models
+
+# Etiquetas normalizadas
+#
+# `Task.tags` sigue siendo la fuente que envían los clientes (array JSON como
+# texto); las rutas de escritura de crud.py lo replican en tags/task_tags
+# para poder filtrar y agregar por etiqueta con índices.
+
+TAG_MAX_LENGTH = 50
+
+
+def normalize_tag_names(names: Iterable[str]) -> List[str]:
+    """Minúsculas, sin espacios sobrantes, sin vacíos ni duplicados"""
+    normalized = []
+    for name in names:
+        name = str(name).strip().lower()[:TAG_MAX_LENGTH]
+        if name:
+            normalized.append(name)
+    return list(dict.fromkeys(normalized))
+
+
+def parse_tags(raw: Optional[str]) -> List[str]:
+    """
+    Etiquetas de `Task.tags`
+
+    Acepta un array JSON (formato documentado) o, por compatibilidad con
+    datos antiguos, una lista separada por comas.
+    """
+    if not raw:
+        return []
+    try:
+        values = json.loads(raw)
+    except ValueError:
+        values = raw.split(",")
+    if isinstance(values, str):
+        values = [values]
+    if not isinstance(values, list):
+        return []
+    return normalize_tag_names(v for v in values if isinstance(v, (str, int, float)))
+
+
+def _insert_ignoring_duplicates(db: Session):
+    """INSERT de etiquetas que ignora las que otra transacción ya creó"""
+    dialect = db.get_bind().dialect.name
+    if dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert as dialect_insert
+    elif dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert as dialect_insert
+    else:
+        return insert(models.Tag)
+    return dialect_insert(models.Tag).on_conflict_do_nothing(index_elements=["name"])
+
+
+def get_tag_ids(db: Session, names: List[str]) -> Dict[str, int]:
+    """IDs de las etiquetas por nombre, creando las que falten"""
+    if not names:
+        return {}
+    ids = dict(db.execute(
+        select(models.Tag.name, models.Tag.id).where(models.Tag.name.in_(names))
+    ).all())
+    missing = [name for name in names if name not in ids]
+    if missing:
+        db.execute(_insert_ignoring_duplicates(db), [{"name": name} for name in missing])
+        ids.update(db.execute(
+            select(models.Tag.name, models.Tag.id).where(models.Tag.name.in_(missing))
+        ).all())
+    return ids
+
+
+def sync_task_tags(db: Session, tags_by_task: Dict[int, Optional[str]]) -> None:
+    """
+    Reemplaza las etiquetas normalizadas de varias tareas (sin commit)
+
+    Args:
+        db: Sesión de base de datos
+        tags_by_task: task_id -> valor de `Task.tags`
+    """
+    if not tags_by_task:
+        return
+
+    parsed = {task_id: parse_tags(raw) for task_id, raw in tags_by_task.items()}
+    db.execute(delete(models.TaskTag).where(models.TaskTag.task_id.in_(list(parsed))))
+
+    names = list(dict.fromkeys(name for task_names in parsed.values() for name in task_names))
+    if not names:
+        return
+
+    ids = get_tag_ids(db, names)
+    db.execute(insert(models.TaskTag), [
+        {"task_id": task_id, "tag_id": ids[name]}
+        for task_id, task_names in parsed.items()
+        for name in task_names
+    ])
+
+
+def tagged_task_ids(names: List[str], match_all: bool = False) -> Select:
+    """
+    Subconsulta de IDs de tareas con alguna (o todas) de las etiquetas
+
+    Usar como `Task.id.in_(tagged_task_ids(...))`.
+    """
+    query = (
+        select(models.TaskTag.task_id)
+        .join(models.Tag, models.Tag.id == models.TaskTag.tag_id)
+        .where(models.Tag.name.in_(names))
+    )
+    if match_all:
+        query = query.group_by(models.TaskTag.task_id).having(
+            func.count(models.TaskTag.tag_id) == len(names)
+        )
+    return query
+
+
+def get_tag_cloud(
+    db: Session,
+    user_id: Optional[int] = None,
+    project_id: Optional[int] = None,
+    limit: int = 50
+) -> List[Tuple[str, int]]:
+    """Etiquetas más usadas con su número de tareas (un GROUP BY)"""
+    count = func.count(models.TaskTag.task_id).label("count")
+    query = (
+        select(models.Tag.name, count)
+        .join(models.TaskTag, models.TaskTag.tag_id == models.Tag.id)
+    )
+    if user_id or project_id:
+        query = query.join(models.Task, models.Task.id == models.TaskTag.task_id)
+        if user_id:
+            query = query.where(models.Task.user_id == user_id)
+        if project_id:
+            query = query.where(models.Task.project_id == project_id)
+
+    query = query.group_by(models.Tag.id, models.Tag.name).order_by(
+        count.desc(), models.Tag.name
+    ).limit(limit)
+    return [tuple(row) for row in db.execute(query).all()]
+
+
+def backfill_task_tags(db: Session, batch_size: int = 1000) -> int:
+    """
+    Rellena tags/task_tags desde `Task.tags` para datos existentes
+
+    Recorre las tareas por ID en lotes y confirma cada lote.
+
+    Returns:
+        Número de tareas procesadas
+    """
+    last_id = 0
+    processed = 0
+    while True:
+        rows = db.execute(
+            select(models.Task.id, models.Task.tags)
+            .where(models.Task.id > last_id, models.Task.tags.isnot(None))
+            .order_by(models.Task.id)
+            .limit(batch_size)
+        ).all()
+        if not rows:
+            return processed
+        sync_task_tags(db, dict(rows))
+        db.commit()
+        last_id = rows[-1][0]
+        processed += len(rows)
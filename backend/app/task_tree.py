@@ -0,0 +1,122 @@
+from sqlalchemy import Select, literal, select
+from sqlalchemy.orm import Session, aliased
+from typing import Any, Dict, List, Optional
+from .models import Task
+
+# Árboles de subtareas
+#
+# El subárbol completo se carga con un único CTE recursivo (limitado en
+# profundidad) que recorre idx_task_parent; los agregados por nodo se
+# calculan en Python de las hojas a la raíz sobre las filas ya cargadas.
+
+NODE_COLUMNS = (
+    "id", "title", "status", "priority", "progress", "estimated_hours",
+    "actual_hours", "project_id", "parent_task_id",
+)
+
+
+def _tree_rows(db: Session, root_condition: Any, max_depth: int) -> List[Dict[str, Any]]:
+    """Filas de los árboles cuyas raíces cumplen `root_condition` (un CTE)"""
+    tree = (
+        select(Task.id, literal(0).label("depth"))
+        .where(root_condition)
+        .cte("task_tree", recursive=True)
+    )
+    child = aliased(Task)
+    tree = tree.union_all(
+        select(child.id, tree.c.depth + 1)
+        .where(child.parent_task_id == tree.c.id, tree.c.depth < max_depth)
+    )
+
+    columns = [getattr(Task, name) for name in NODE_COLUMNS]
+    rows = db.execute(
+        select(*columns, tree.c.depth)
+        .join(tree, Task.id == tree.c.id)
+        .order_by(tree.c.depth, Task.created_at, Task.id)
+    ).all()
+    return [dict(row._mapping) for row in rows]
+
+
+def subtree_ids(task_id: int) -> Select:
+    """IDs de la tarea y de todas sus subtareas, a cualquier profundidad (un CTE)"""
+    tree = select(Task.id).where(Task.id == task_id).cte("subtree", recursive=True)
+    child = aliased(Task)
+    tree = tree.union_all(select(child.id).where(child.parent_task_id == tree.c.id))
+    return select(tree.c.id)
+
+
+def _truncated_ids(db: Session, nodes: List[Dict[str, Any]], max_depth: int) -> set:
+    """Nodos en la profundidad máxima que tienen hijos sin cargar"""
+    deepest = [node["id"] for node in nodes if node["depth"] == max_depth]
+    if not deepest:
+        return set()
+    return set(db.scalars(
+        select(Task.parent_task_id).where(Task.parent_task_id.in_(deepest)).distinct()
+    ).all())
+
+
+def _rollup(node: Dict[str, Any]) -> None:
+    """Agregados del nodo a partir de los de sus hijos (ya calculados)"""
+    children = node["children"]
+    descendants = sum(c["descendants_count"] + 1 for c in children)
+    progress_sum = node["progress"] + sum(
+        c["average_progress"] * (c["descendants_count"] + 1) for c in children
+    )
+
+    node["subtasks_count"] = len(children)
+    node["descendants_count"] = descendants
+    node["total_estimated_hours"] = (node["estimated_hours"] or 0) + sum(
+        c["total_estimated_hours"] for c in children
+    )
+    node["total_actual_hours"] = (node["actual_hours"] or 0) + sum(
+        c["total_actual_hours"] for c in children
+    )
+    node["average_progress"] = round(progress_sum / (descendants + 1), 2)
+
+
+def _build_forest(db: Session, root_condition: Any, max_depth: int) -> List[Dict[str, Any]]:
+    nodes = _tree_rows(db, root_condition, max_depth)
+    truncated = _truncated_ids(db, nodes, max_depth)
+
+    by_id = {}
+    roots = []
+    for node in nodes:
+        node["children"] = []
+        node["truncated"] = node["id"] in truncated
+        by_id[node["id"]] = node
+        parent = by_id.get(node["parent_task_id"]) if node["depth"] > 0 else None
+        if parent is not None:
+            parent["children"].append(node)
+        else:
+            roots.append(node)
+
+    # Las filas vienen ordenadas por profundidad: recorrer al revés
+    # garantiza que los hijos se agregan antes que su padre
+    for node in reversed(nodes):
+        _rollup(node)
+
+    return roots
+
+
+def get_task_tree(db: Session, task_id: int, max_depth: int) -> Optional[Dict[str, Any]]:
+    """
+    Subárbol de una tarea con agregados por nodo
+
+    Los agregados (descendientes, horas, progreso medio) incluyen al propio
+    nodo y cubren sólo hasta `max_depth`; `truncated` marca los nodos con
+    subtareas más profundas que no se han cargado.
+
+    Returns:
+        Nodo raíz con `children` anidados, o None si la tarea no existe
+    """
+    roots = _build_forest(db, Task.id == task_id, max_depth)
+    return roots[0] if roots else None
+
+
+def get_project_forest(db: Session, project_id: int, max_depth: int) -> List[Dict[str, Any]]:
+    """Árboles de todas las tareas raíz de un proyecto (un único CTE)"""
+    return _build_forest(
+        db,
+        (Task.project_id == project_id) & Task.parent_task_id.is_(None),
+        max_depth
+    )
@@ -0,0 +1,57 @@
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from contextlib import contextmanager
+from typing import Iterator, List
+
+
+class StatementCounter:
+    """Registra las sentencias SQL ejecutadas por un engine"""
+
+    def __init__(self):
+        self.statements: List[str] = []
+
+    @property
+    def count(self) -> int:
+        return len(self.statements)
+
+    def _record(self, conn, cursor, statement, parameters, context, executemany):
+        self.statements.append(statement)
+
+
+@contextmanager
+def count_statements(engine: Engine) -> Iterator[StatementCounter]:
+    """
+    Cuenta las sentencias ejecutadas dentro del bloque
+
+    Ejemplo:
+        with count_statements(db.get_bind()) as counter:
+            crud.get_tasks(db)
+        print(counter.count)
+    """
+    counter = StatementCounter()
+    event.listen(engine, "before_cursor_execute", counter._record)
+    try:
+        yield counter
+    finally:
+        event.remove(engine, "before_cursor_execute", counter._record)
+
+
+@contextmanager
+def assert_max_statements(engine: Engine, max_count: int) -> Iterator[StatementCounter]:
+    """
+    Falla si el bloque ejecuta más de `max_count` sentencias SQL
+
+    Pensado para tests de listados: serializar dentro del bloque para que
+    cualquier lazy load (N+1) cuente.
+
+    Raises:
+        AssertionError: Si se supera el límite
+    """
+    with count_statements(engine) as counter:
+        yield counter
+
+    if counter.count > max_count:
+        executed = "\n".join(f"  {statement}" for statement in counter.statements)
+        raise AssertionError(
+            f"Expected at most {max_count} statements, got {counter.count}:\n{executed}"
+        )
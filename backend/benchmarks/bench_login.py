@@ -0,0 +1,90 @@
+"""
+Benchmark: latencia de login bajo carga concurrente
+
+Compara la verificación bcrypt síncrona dentro del event loop (como hacía
+`authenticate_user`) con `password_service`, que la ejecuta en un pool.
+Mide el p50/p99 de los logins y de requests "ligeras" que comparten el loop.
+
+Uso (desde backend/):
+    python -m benchmarks.bench_login --concurrency 50 --rounds 12
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import time
+
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+os.environ.setdefault("REDIS_URL", "redis://localhost:6379/0")
+os.environ.setdefault("SECRET_KEY", "benchmark")
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+async def run(mode, concurrency, hashed, service, pwd_context):
+    login_latencies = []
+    probe_latencies = []
+    done = asyncio.Event()
+
+    async def login(arrival):
+        # Todas las peticiones llegan a la vez: la latencia incluye la espera
+        if mode == "inline":
+            pwd_context.verify("Password123", hashed)
+        else:
+            await service.verify("Password123", hashed)
+        login_latencies.append(time.perf_counter() - arrival)
+
+    async def probe():
+        # Request ligera que sólo necesita el event loop
+        while not done.is_set():
+            start = time.perf_counter()
+            await asyncio.sleep(0.005)
+            probe_latencies.append(time.perf_counter() - start - 0.005)
+
+    probe_task = asyncio.create_task(probe())
+    await asyncio.sleep(0)
+    arrival = time.perf_counter()
+    await asyncio.gather(*(login(arrival) for _ in range(concurrency)))
+    done.set()
+    await probe_task
+    return login_latencies, probe_latencies
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--rounds", type=int, default=12)
+    parser.add_argument("--workers", type=int, default=4)
+    args = parser.parse_args()
+
+    os.environ["BCRYPT_ROUNDS"] = str(args.rounds)
+    os.environ["PASSWORD_HASH_WORKERS"] = str(args.workers)
+    os.environ["PASSWORD_HASH_MAX_PENDING"] = str(args.concurrency)
+
+    from app.passwords import password_service, pwd_context
+
+    hashed = pwd_context.hash("Password123")
+
+    print(f"{args.concurrency} concurrent logins, bcrypt rounds={args.rounds}, workers={args.workers}")
+    print(f"{'mode':<10}{'login p50':>12}{'login p99':>12}{'probe p99':>12}")
+    for mode in ("inline", "pool"):
+        logins, probes = asyncio.run(
+            run(mode, args.concurrency, hashed, password_service, pwd_context)
+        )
+        probe_p99 = percentile(probes, 99) if probes else 0.0
+        print(
+            f"{mode:<10}"
+            f"{statistics.median(logins) * 1000:>10.1f}ms"
+            f"{percentile(logins, 99) * 1000:>10.1f}ms"
+            f"{probe_p99 * 1000:>10.1f}ms"
+        )
+
+    password_service.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+"""
+Benchmark: coste por petición de los middlewares de observabilidad
+
+Compara una app FastAPI mínima sin middlewares, con los dos
+`@app.middleware("http")` anteriores (BaseHTTPMiddleware: X-Process-Time y
+dos líneas de log) y con `ObservabilityMiddleware` (ASGI puro, una línea).
+Las peticiones se envían directamente a la app ASGI, sin servidor ni
+cliente HTTP, para que la diferencia sea sólo la de los middlewares.
+
+Uso (desde backend/):
+    python -m benchmarks.bench_middleware --requests 20000
+"""
+import argparse
+import asyncio
+import logging
+import os
+import statistics
+import time
+
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+os.environ.setdefault("REDIS_URL", "redis://localhost:6379/0")
+os.environ.setdefault("SECRET_KEY", "benchmark")
+
+
+def build_app(mode):
+    from fastapi import FastAPI, Request
+    from app.middleware import ObservabilityMiddleware
+
+    app = FastAPI()
+    logger = logging.getLogger("bench.requests")
+
+    @app.get("/ping")
+    async def ping():
+        return {"ok": True}
+
+    if mode == "basehttp":
+        # Copia de los middlewares que había en main.py
+        @app.middleware("http")
+        async def add_process_time_header(request: Request, call_next):
+            start_time = time.time()
+            response = await call_next(request)
+            response.headers["X-Process-Time"] = str(time.time() - start_time)
+            return response
+
+        @app.middleware("http")
+        async def log_requests(request: Request, call_next):
+            logger.info(f"{request.method} {request.url.path}")
+            response = await call_next(request)
+            logger.info(f"Status: {response.status_code}")
+            return response
+    elif mode == "asgi":
+        app.add_middleware(ObservabilityMiddleware)
+
+    return app
+
+
+async def call(app):
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1",
+        "method": "GET", "scheme": "http", "path": "/ping", "raw_path": b"/ping",
+        "root_path": "", "query_string": b"", "headers": [(b"host", b"bench")],
+        "client": ("127.0.0.1", 50000), "server": ("bench", 80),
+    }
+
+    messages = [{"type": "http.request", "body": b"", "more_body": False}]
+    disconnected = asyncio.Event()
+
+    async def receive():
+        # Como un servidor real: después del cuerpo, esperar al disconnect
+        if messages:
+            return messages.pop()
+        await disconnected.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        pass
+
+    await app(scope, receive, send)
+
+
+async def measure(app, requests, warmup):
+    for _ in range(warmup):
+        await call(app)
+    latencies = []
+    for _ in range(requests):
+        start = time.perf_counter()
+        await call(app)
+        latencies.append(time.perf_counter() - start)
+    latencies.sort()
+    return statistics.mean(latencies), statistics.median(latencies), latencies[int(len(latencies) * 0.99) - 1]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=20000)
+    parser.add_argument("--warmup", type=int, default=1000)
+    args = parser.parse_args()
+
+    # Los logs se formatean y escriben de verdad, pero a /dev/null
+    handler = logging.StreamHandler(open(os.devnull, "w"))
+    handler.setFormatter(logging.Formatter("%(asctime)s - %(name)s - %(levelname)s - %(message)s"))
+    root = logging.getLogger()
+    root.handlers = [handler]
+    root.setLevel(logging.INFO)
+
+    results = {}
+    for mode in ("none", "basehttp", "asgi"):
+        results[mode] = asyncio.run(measure(build_app(mode), args.requests, args.warmup))
+
+    baseline = results["none"][0]
+    print(f"{'middleware':<12}{'mean':>10}{'p50':>10}{'p99':>10}{'overhead':>11}")
+    for mode, (mean, p50, p99) in results.items():
+        print(
+            f"{mode:<12}{mean * 1e6:>8.1f}us{p50 * 1e6:>8.1f}us{p99 * 1e6:>8.1f}us"
+            f"{(mean - baseline) * 1e6:>9.1f}us"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""
+Benchmark: serialización de listados grandes de tareas
+
+Compara el camino por defecto de FastAPI (validar contra `response_model`,
+volcar a dicts JSON-compatibles y `JSONResponse`/json.dumps) con
+`responses.schema_response` (validar y `dump_json` a bytes con
+pydantic-core). Las tareas son objetos ORM sin sesión con `owner`,
+`project` y `assignees`, como los que devuelve crud con `loader_options`.
+
+Uso (desde backend/):
+    python -m benchmarks.bench_serialization --tasks 100 --assignees 3
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import time
+from datetime import datetime, timedelta, timezone
+
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+os.environ.setdefault("REDIS_URL", "redis://localhost:6379/0")
+os.environ.setdefault("SECRET_KEY", "benchmark")
+
+
+def build_tasks(models, count, assignees_per_task):
+    now = datetime.now(timezone.utc)
+    users = [
+        models.User(
+            id=i, email=f"user{i}@example.com", username=f"user{i}", full_name=f"User {i}",
+            role=models.UserRole.USER, is_active=True, is_verified=True,
+            created_at=now, updated_at=now
+        )
+        for i in range(1, assignees_per_task + 2)
+    ]
+    project = models.Project(
+        id=1, name="Project", slug="project", color="#3B82F6", owner_id=1,
+        is_active=True, is_archived=False, created_at=now, updated_at=now
+    )
+    tasks = []
+    for i in range(1, count + 1):
+        created = now - timedelta(minutes=i)
+        task = models.Task(
+            id=i, title=f"Task {i}", description="Lorem ipsum dolor sit amet " * 4,
+            status=models.Status.IN_PROGRESS, priority=models.Priority.HIGH,
+            due_date=created + timedelta(days=7), progress=i % 101, estimated_hours=8,
+            actual_hours=3, tags='["backend", "api"]', user_id=1, project_id=1,
+            created_at=created, updated_at=created
+        )
+        task.owner = users[0]
+        task.project = project
+        task.assignees = users[1:]
+        task.subtasks_count = 0
+        tasks.append(task)
+    return tasks
+
+
+def measure(func, repeat):
+    latencies = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        latencies.append(time.perf_counter() - start)
+    latencies.sort()
+    return statistics.median(latencies), latencies[int(len(latencies) * 0.99) - 1]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--tasks", type=int, default=100)
+    parser.add_argument("--assignees", type=int, default=3)
+    parser.add_argument("--repeat", type=int, default=300)
+    args = parser.parse_args()
+
+    from typing import List
+    from fastapi.responses import JSONResponse
+    from fastapi.routing import serialize_response
+    from fastapi.utils import create_response_field
+    from app import models, schemas
+    from app.responses import schema_response
+
+    tasks = build_tasks(models, args.tasks, args.assignees)
+    loop = asyncio.new_event_loop()
+
+    for label, schema in (("Task", schemas.Task), ("TaskWithDetails", schemas.TaskWithDetails)):
+        response_type = List[schema]
+        field = create_response_field(name="response", type_=response_type)
+
+        def default_path():
+            content = loop.run_until_complete(
+                serialize_response(field=field, response_content=tasks, is_coroutine=True)
+            )
+            return JSONResponse(content).body
+
+        def fast_path():
+            return schema_response(response_type, tasks).body
+
+        assert json.loads(default_path()) == json.loads(fast_path())
+
+        print(f"\n{label}: {args.tasks} tasks, {len(fast_path()) / 1024:.0f} KiB")
+        print(f"{'path':<12}{'p50':>10}{'p99':>10}")
+        results = {"default": measure(default_path, args.repeat), "fast": measure(fast_path, args.repeat)}
+        for name, (p50, p99) in results.items():
+            print(f"{name:<12}{p50 * 1000:>8.2f}ms{p99 * 1000:>8.2f}ms")
+        print(f"speedup     {results['default'][0] / results['fast'][0]:>9.1f}x")
+
+    loop.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,177 @@
+"""
+Benchmark: planes de ejecución de las consultas de CRUD con volumen real
+
+Crea un esquema temporal en PostgreSQL, lo llena con generate_series
+(por defecto 1M de tareas y 1M de comentarios), ejecuta ANALYZE y comprueba
+con EXPLAIN que cada consulta de listado/búsqueda usa un índice y no un
+Seq Scan sobre la tabla principal. Sale con código 1 si alguna no lo hace.
+
+Uso (desde backend/, con DATABASE_URL apuntando a PostgreSQL):
+    python -m benchmarks.explain_indexes --tasks 1000000 --analyze
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+os.environ.setdefault("REDIS_URL", "redis://localhost:6379/0")
+os.environ.setdefault("SECRET_KEY", "benchmark")
+
+SCHEMA = "bench_indexes"
+INDEX_NODES = {"Index Scan", "Index Only Scan", "Bitmap Index Scan"}
+
+
+def populate(connection, users, tasks):
+    """Datos sintéticos con distribuciones parecidas a producción"""
+    from sqlalchemy import text
+
+    projects = users * 2
+    statements = [
+        f"""INSERT INTO users (email, username, hashed_password, full_name, role,
+                is_active, is_superuser, is_verified, created_at, updated_at)
+            SELECT 'user' || i || '@example.com', 'user' || i, 'x', 'User ' || i, 'USER',
+                   true, false, true, now() - (i || ' minutes')::interval, now()
+            FROM generate_series(1, {users}) AS i""",
+        f"""INSERT INTO projects (name, slug, color, owner_id, is_active, is_archived,
+                created_at, updated_at)
+            SELECT 'Project ' || i, 'project-' || i, '#3B82F6', 1 + i % {users}, true, false,
+                   now() - (i || ' minutes')::interval, now()
+            FROM generate_series(1, {projects}) AS i""",
+        f"""INSERT INTO tasks (title, description, status, priority, progress, tags,
+                user_id, project_id, parent_task_id, created_at, updated_at)
+            SELECT 'Task ' || i, 'Description ' || i,
+                   (ARRAY['TODO','IN_PROGRESS','REVIEW','COMPLETED','ARCHIVED'])[1 + i % 5]::status,
+                   (ARRAY['LOW','MEDIUM','HIGH','URGENT'])[1 + i % 4]::priority,
+                   i % 101, NULL,
+                   1 + i % {users}, 1 + i % {projects},
+                   CASE WHEN i > 10 AND i % 10 = 0 THEN i - 10 END,
+                   now() - (i || ' seconds')::interval, now()
+            FROM generate_series(1, {tasks}) AS i""",
+        f"""INSERT INTO task_assignments (task_id, user_id, assigned_at)
+            SELECT i, 1 + (i * 7) % {users}, now()
+            FROM generate_series(1, {tasks}, 3) AS i""",
+        f"""INSERT INTO comments (content, task_id, author_id, created_at, updated_at)
+            SELECT 'Comment ' || i, 1 + i % {tasks}, 1 + i % {users},
+                   now() - (i || ' seconds')::interval, now()
+            FROM generate_series(1, {tasks}) AS i""",
+        "ANALYZE",
+    ]
+    for statement in statements:
+        start = time.perf_counter()
+        connection.execute(text(statement))
+        print(f"  {statement.split()[0]} {statement.split()[2] if statement.startswith('INSERT') else ''}"
+              f" {time.perf_counter() - start:.1f}s")
+
+
+def queries():
+    """Consultas tal y como las construye crud.py (nombre, tabla, SELECT)"""
+    from sqlalchemy import func, select
+    from app import crud, models
+    from app.pagination import encode_cursor
+    from datetime import datetime, timezone
+
+    cursor = encode_cursor(datetime.now(timezone.utc), 10**9)
+    return [
+        ("user by email", "users",
+         select(models.User).where(models.User.email == "user42@example.com")),
+        ("user listing (cursor)", "users",
+         select(models.User).order_by(models.User.created_at.desc(), models.User.id.desc()).limit(20)),
+        ("project by slug", "projects",
+         select(models.Project).where(models.Project.slug == "project-42")),
+        ("projects by owner (cursor)", "projects",
+         select(models.Project).where(models.Project.owner_id == 42)
+         .order_by(models.Project.created_at.desc(), models.Project.id.desc()).limit(20)),
+        ("tasks by user", "tasks",
+         crud._select_tasks(user_id=42, limit=20)),
+        ("tasks by user + status", "tasks",
+         crud._select_tasks(user_id=42, status=models.Status.IN_PROGRESS, limit=20)),
+        ("tasks by user + status (cursor)", "tasks",
+         crud._select_tasks(user_id=42, status=models.Status.IN_PROGRESS, limit=20, cursor=cursor)),
+        ("tasks by user + project", "tasks",
+         crud._select_tasks(user_id=42, project_id=84, limit=20)),
+        ("task count by project + status", "tasks",
+         select(func.count(models.Task.id)).where(
+             models.Task.project_id == 84, models.Task.status == models.Status.COMPLETED)),
+        ("subtasks of task", "tasks",
+         select(models.Task).where(models.Task.parent_task_id == 1000)),
+        ("assignments by user", "task_assignments",
+         select(models.TaskAssignment).where(models.TaskAssignment.user_id == 42)),
+        ("comments by task (cursor)", "comments",
+         crud._select_comments_by_task(1000, limit=20)),
+        ("comments by author", "comments",
+         select(models.Comment.id).where(models.Comment.author_id == 42)),
+    ]
+
+
+def plan_nodes(plan):
+    yield plan
+    for child in plan.get("Plans", []):
+        yield from plan_nodes(child)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--users", type=int, default=10000)
+    parser.add_argument("--tasks", type=int, default=1000000)
+    parser.add_argument("--analyze", action="store_true", help="EXPLAIN ANALYZE (ejecuta las consultas)")
+    parser.add_argument("--keep", action="store_true", help="No borrar el esquema al terminar")
+    args = parser.parse_args()
+
+    from sqlalchemy import create_engine, text
+    from app.config import settings
+    from app.database import Base
+
+    engine = create_engine(settings.DATABASE_URL)
+    if engine.dialect.name != "postgresql":
+        sys.exit("explain_indexes requires PostgreSQL (DATABASE_URL)")
+
+    failures = 0
+    with engine.connect() as connection:
+        connection.execute(text(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE"))
+        connection.execute(text(f"CREATE SCHEMA {SCHEMA}"))
+        connection.execute(text(f"SET search_path TO {SCHEMA}"))
+        Base.metadata.create_all(connection)
+
+        print(f"Populating {args.users} users / {args.tasks} tasks...")
+        populate(connection, args.users, args.tasks)
+        connection.commit()
+
+        options = "ANALYZE, BUFFERS, FORMAT JSON" if args.analyze else "FORMAT JSON"
+        print(f"\n{'query':<34}{'result':<8}{'cost':>10}{'time':>10}  index")
+        for name, table, query in queries():
+            sql = str(query.compile(dialect=connection.dialect, compile_kwargs={"literal_binds": True}))
+            plan = connection.exec_driver_sql(f"EXPLAIN ({options}) {sql}").scalar()
+            if isinstance(plan, str):
+                plan = json.loads(plan)
+            root = plan[0]["Plan"]
+
+            nodes = [node for node in plan_nodes(root) if node.get("Relation Name") == table]
+            # Los Bitmap Index Scan cuelgan del Bitmap Heap Scan de la tabla
+            indexes = sorted({
+                inner["Index Name"]
+                for node in nodes
+                for inner in plan_nodes(node)
+                if inner["Node Type"] in INDEX_NODES
+            })
+            seq_scan = any(node["Node Type"] == "Seq Scan" for node in nodes)
+            ok = bool(indexes) and not seq_scan
+            failures += not ok
+
+            elapsed = f"{root['Actual Total Time']:.2f}ms" if args.analyze else "-"
+            print(
+                f"{name:<34}{'OK' if ok else 'FAIL':<8}{root['Total Cost']:>10.1f}{elapsed:>10}  "
+                f"{', '.join(indexes) or 'Seq Scan on ' + table}"
+            )
+
+        if not args.keep:
+            connection.execute(text(f"DROP SCHEMA {SCHEMA} CASCADE"))
+            connection.commit()
+
+    if failures:
+        print(f"\n{failures} queries without index scan")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
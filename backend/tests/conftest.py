@@ -0,0 +1,56 @@
+"""Fixtures comunes: SQLite en un fichero temporal, con claves foráneas"""
+import os
+
+# La configuración exige estas variables; los tests no usan Redis ni la BD real
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+os.environ.setdefault("REDIS_URL", "redis://localhost:6379/0")
+os.environ.setdefault("SECRET_KEY", "test-secret-key")
+
+import itertools
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+
+from app import models, search  # noqa: F401  (search registra su tabla en create_all)
+from app.database import Base, enable_sqlite_foreign_keys
+
+
+@pytest.fixture
+def database_path(tmp_path):
+    return tmp_path / "test.db"
+
+
+@pytest.fixture
+def engine(database_path):
+    """Engine síncrono sobre un fichero SQLite nuevo con todas las tablas"""
+    engine = create_engine(f"sqlite:///{database_path}")
+    enable_sqlite_foreign_keys(engine)
+    Base.metadata.create_all(engine)
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def db(engine):
+    with Session(engine) as session:
+        yield session
+
+
+@pytest.fixture
+def make_user(db):
+    """Crea (y confirma) un usuario con nombre único"""
+    counter = itertools.count(1)
+
+    def make(**values) -> models.User:
+        n = next(counter)
+        user = models.User(
+            email=f"user{n}@example.com",
+            username=f"user{n}",
+            hashed_password="x",
+            **values
+        )
+        db.add(user)
+        db.commit()
+        return user
+
+    return make
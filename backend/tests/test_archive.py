@@ -0,0 +1,136 @@
+"""Archivado de tareas: mover a la tabla fría y restaurar"""
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import select
+
+from app import crud, models, schemas
+from app.archive import archive_tasks
+from app.project_stats import get_project_stats
+
+OLD = datetime.utcnow() - timedelta(days=200)
+
+
+@pytest.fixture
+def owner(make_user):
+    return make_user()
+
+
+@pytest.fixture
+def project(db, owner):
+    project = models.Project(name="Project", slug="project", owner_id=owner.id)
+    db.add(project)
+    db.commit()
+    return project
+
+
+def _task(db, owner, title, status=models.Status.COMPLETED, completed_at=OLD, **fields):
+    task = crud.create_task(db, schemas.TaskCreate(title=title, status=status, **fields), user_id=owner.id)
+    task.completed_at = completed_at
+    db.commit()
+    return task.id
+
+
+def _active_ids(db):
+    return set(db.scalars(select(models.Task.id)))
+
+
+def _archived_ids(db):
+    return set(db.scalars(select(models.ArchivedTask.id)))
+
+
+def test_archive_and_restore_round_trip(db, owner, make_user, project):
+    assignee = make_user()
+    task_id = _task(db, owner, "Informe final", project_id=project.id, tags='["report"]', description="Q3")
+    crud.create_comment(db, schemas.CommentCreate(content="Revisado", task_id=task_id), assignee.id)
+    db.add(models.TaskAssignment(task_id=task_id, user_id=assignee.id))
+    db.commit()
+    before = crud.get_task(db, task_id)
+    assignee_id = assignee.id
+    fields = {name: getattr(before, name) for name in ("title", "description", "status", "tags", "project_id")}
+    comments = [(c.id, c.author_id, c.content, c.created_at) for c in before.comments]
+    owner_id, project_id = owner.id, project.id
+    db.expunge_all()
+
+    assert crud.archive_old_tasks(db, older_than_days=30) == 1
+    assert _active_ids(db) == set() and _archived_ids(db) == {task_id}
+    assert crud.get_task(db, task_id) is None
+    assert crud.get_task(db, task_id, include_archived=True).title == "Informe final"
+    assert crud.search_tasks(db, "informe") == []
+    assert get_project_stats(db, [project_id])[project_id]["total_tasks"] == 0
+
+    restored = crud.restore_archived_task(db, task_id)
+    assert restored.id == task_id
+    db.expunge_all()
+
+    after = crud.get_task(db, task_id)
+    assert {name: getattr(after, name) for name in fields} == fields
+    assert [(c.id, c.author_id, c.content, c.created_at) for c in after.comments] == comments
+    assert [user.id for user in after.assignees] == [assignee_id]
+    assert _archived_ids(db) == set()
+    assert [t.id for t in crud.get_tasks(db, user_id=owner_id, tags_all=["report"])] == [task_id]
+    assert {hit["entity_type"] for hit in crud.search_tasks(db, "informe")} == {"task"}
+    assert {hit["entity_type"] for hit in crud.search_tasks(db, "revisado")} == {"comment"}
+    assert get_project_stats(db, [project_id])[project_id]["completed_tasks"] == 1
+
+
+def test_only_old_finished_tasks_are_archived(db, owner):
+    old = _task(db, owner, "Old")
+    recent = _task(db, owner, "Recent", completed_at=datetime.utcnow())
+    open_task = _task(db, owner, "Open", status=models.Status.IN_PROGRESS, completed_at=None)
+    parent = _task(db, owner, "Parent")
+    _task(db, owner, "Active child", status=models.Status.TODO, completed_at=None, parent_task_id=parent)
+
+    assert crud.archive_old_tasks(db, older_than_days=30) == 1
+    assert _archived_ids(db) == {old}
+    assert {recent, open_task, parent} <= _active_ids(db)
+
+
+def test_archive_in_batches(db, owner):
+    ids = {_task(db, owner, f"Task {n}") for n in range(5)}
+
+    assert archive_tasks(db, older_than_days=30, batch_size=2, max_batches=1) == 2
+    assert archive_tasks(db, older_than_days=30, batch_size=2) == 3
+    assert _archived_ids(db) == ids
+
+
+def test_restore_brings_back_archived_parent(db, owner):
+    parent = _task(db, owner, "Parent")
+    child = _task(db, owner, "Child", parent_task_id=parent)
+    # Primero el hijo (el padre espera a que no tenga subtareas activas)
+    archive_tasks(db, older_than_days=30)
+    archive_tasks(db, older_than_days=30)
+    assert _archived_ids(db) == {parent, child}
+
+    crud.restore_archived_task(db, child)
+
+    assert _active_ids(db) == {parent, child}
+    assert db.get(models.Task, child).parent_task_id == parent
+
+
+def test_restore_drops_references_to_deleted_users(db, owner, make_user):
+    gone = make_user()
+    task_id = _task(db, owner, "Task")
+    crud.create_comment(db, schemas.CommentCreate(content="Bye", task_id=task_id), gone.id)
+    db.add(models.TaskAssignment(task_id=task_id, user_id=gone.id))
+    db.commit()
+    archive_tasks(db, older_than_days=30)
+    db.delete(db.get(models.User, gone.id))
+    db.commit()
+
+    task = crud.restore_archived_task(db, task_id)
+    assert task.comments == [] and task.assignees == []
+
+
+def test_include_archived_lists_and_filters_by_tag(db, owner):
+    archived = _task(db, owner, "Archived", tags='["Report"]')
+    archive_tasks(db, older_than_days=30)
+    active = _task(db, owner, "Active", status=models.Status.TODO, completed_at=None, tags='["report"]')
+
+    listed = crud.get_tasks(db, user_id=owner.id, include_archived=True, tags_any=["report"])
+    assert [task.id for task in listed] == [active, archived]
+    assert [task.id for task in crud.get_tasks(db, user_id=owner.id, tags_any=["report"])] == [active]
+
+
+def test_restore_unknown_task(db):
+    assert crud.restore_archived_task(db, 12345) is None
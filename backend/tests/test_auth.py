@@ -0,0 +1,88 @@
+"""Registro, login y usuario actual"""
+import asyncio
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+from app import models, schemas
+from app.auth import create_access_token, get_current_user, get_current_user_async, principal_cache
+from app.routers.auth import login, register
+
+PASSWORD = "Secret123"
+
+
+@pytest.fixture
+def async_engine(engine, database_path):
+    async_engine = create_async_engine(f"sqlite+aiosqlite:///{database_path}")
+    yield async_engine
+    asyncio.run(async_engine.dispose())
+
+
+@pytest.fixture
+def call(async_engine):
+    """Ejecuta un endpoint async con su propia sesión, como una request"""
+    def call(endpoint, payload):
+        async def run():
+            async with AsyncSession(async_engine, expire_on_commit=False) as session:
+                return await endpoint(payload, db=session)
+        return asyncio.run(run())
+    return call
+
+
+def _register(call, username="alice"):
+    return call(register, schemas.UserCreate(
+        email=f"{username}@example.com", username=username, password=PASSWORD
+    ))
+
+
+def test_register_and_login(call, db):
+    user = _register(call)
+    assert user.id is not None and user.hashed_password != PASSWORD
+
+    for login_name in ("alice", "alice@example.com"):
+        tokens = call(login, schemas.LoginRequest(username=login_name, password=PASSWORD))
+        current = get_current_user(token=tokens["access_token"], db=db)
+        assert current.id == user.id
+
+
+def test_register_duplicate(call):
+    _register(call)
+    with pytest.raises(HTTPException) as error:
+        _register(call)
+    assert error.value.status_code == 400
+
+
+@pytest.mark.parametrize("username, password", [("alice", "Wrong1234"), ("nobody", PASSWORD)])
+def test_login_rejects_bad_credentials(call, username, password):
+    _register(call)
+    with pytest.raises(HTTPException) as error:
+        call(login, schemas.LoginRequest(username=username, password=password))
+    assert error.value.status_code == 401
+
+
+def test_login_rejects_inactive_user(call, db):
+    user = _register(call)
+    db.get(models.User, user.id).is_active = False
+    db.commit()
+    with pytest.raises(HTTPException) as error:
+        call(login, schemas.LoginRequest(username="alice", password=PASSWORD))
+    assert error.value.status_code == 401
+
+
+@pytest.mark.parametrize("cached", [False, True])
+def test_async_current_user_uses_request_session(async_engine, make_user, cached):
+    """Los endpoints async resuelven el usuario en su propia sesión (sin get_db)"""
+    user = make_user()
+    token = create_access_token({"sub": str(user.id)})
+    principal_cache.clear()
+
+    async def run():
+        async with AsyncSession(async_engine) as session:
+            if cached:
+                await get_current_user_async(token=token, db=session)
+                session.expunge_all()
+            current = await get_current_user_async(token=token, db=session)
+            return current.id, current in session, session.info["user_id"]
+
+    assert asyncio.run(run()) == (user.id, True, user.id)
@@ -0,0 +1,67 @@
+"""POST /tasks/bulk: referencias a proyectos y tareas padre"""
+import pytest
+from sqlalchemy import func, select
+
+from app import crud, models
+
+
+@pytest.fixture
+def owner(make_user):
+    return make_user()
+
+
+@pytest.fixture
+def refs(db, owner, make_user):
+    """Proyecto y tarea propios y un proyecto de otro usuario"""
+    other = make_user()
+    project = models.Project(name="Own", slug="own", owner_id=owner.id)
+    foreign = models.Project(name="Foreign", slug="foreign", owner_id=other.id)
+    db.add_all([project, foreign])
+    db.flush()
+    parent = models.Task(title="Parent", user_id=owner.id, project_id=project.id)
+    db.add(parent)
+    db.commit()
+    return {"project": project.id, "foreign": foreign.id, "parent": parent.id}
+
+
+@pytest.fixture
+def items(refs):
+    return [
+        {"title": "Ok", "project_id": refs["project"], "parent_task_id": refs["parent"]},
+        {"title": "Foreign project", "project_id": refs["foreign"]},
+        {"title": "Missing parent", "parent_task_id": refs["parent"] + 1000},
+        {"title": "Ok without project"},
+    ]
+
+
+def _titles(db, owner):
+    return set(db.scalars(select(models.Task.title).where(models.Task.user_id == owner.id)))
+
+
+def _error_locs(result):
+    return {error.index: [e["loc"] for e in error.errors] for error in result.errors}
+
+
+def test_bad_references_only_skip_their_items(db, owner, items):
+    result = crud.create_tasks_bulk(db, items, user_id=owner.id, owner_id=owner.id)
+
+    assert len(result.created_ids) == 2
+    assert _error_locs(result) == {1: [["project_id"]], 2: [["parent_task_id"]]}
+    assert _titles(db, owner) == {"Parent", "Ok", "Ok without project"}
+
+
+def test_bad_references_reject_atomic_batch(db, owner, items):
+    result = crud.create_tasks_bulk(db, items, user_id=owner.id, atomic=True, owner_id=owner.id)
+
+    assert result.created_ids == []
+    assert _error_locs(result) == {1: [["project_id"]], 2: [["parent_task_id"]]}
+    assert _titles(db, owner) == {"Parent"}
+
+
+def test_superuser_may_reference_any_project(db, owner, refs):
+    result = crud.create_tasks_bulk(
+        db, [{"title": "Foreign project", "project_id": refs["foreign"]}], user_id=owner.id
+    )
+
+    assert result.errors == []
+    assert db.scalar(select(func.count()).where(models.Task.project_id == refs["foreign"])) == 1
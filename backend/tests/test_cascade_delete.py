@@ -0,0 +1,129 @@
+"""Borrado de usuarios y proyectos con ON DELETE CASCADE"""
+import pytest
+from sqlalchemy import func, select, text
+
+from app import crud, models, schemas, search
+from app.project_stats import get_project_stats
+from app.testing import count_statements
+
+
+@pytest.fixture
+def owner(make_user):
+    return make_user()
+
+
+@pytest.fixture
+def other(make_user):
+    return make_user()
+
+
+def _project(db, owner, name):
+    project = models.Project(name=name, slug=name.lower(), owner_id=owner.id)
+    db.add(project)
+    db.commit()
+    return project.id
+
+
+def _task(db, owner, title, **fields):
+    return crud.create_task(db, schemas.TaskCreate(title=title, **fields), user_id=owner.id).id
+
+
+def _comment(db, author, task_id, content):
+    return crud.create_comment(db, schemas.CommentCreate(content=content, task_id=task_id), author.id).id
+
+
+def _count(db, model, *conditions):
+    return db.scalar(select(func.count()).select_from(model).where(*conditions))
+
+
+def _indexed(db):
+    return db.scalar(text(f"SELECT count(*) FROM {search.SEARCH_TABLE}"))
+
+
+def _populate(db, owner, other, tasks=3):
+    """Proyecto y tareas de `owner` con subtareas, etiquetas, comentarios y asignaciones"""
+    project_id = _project(db, owner, "Owned")
+    for n in range(tasks):
+        parent = _task(db, owner, f"Task {n}", project_id=project_id, tags='["bug"]')
+        _task(db, owner, f"Subtask {n}", project_id=project_id, parent_task_id=parent)
+        _comment(db, other, parent, "Comentario ajeno")
+        db.add(models.TaskAssignment(task_id=parent, user_id=other.id))
+    db.commit()
+    return project_id
+
+
+def test_delete_user_cascades(db, owner, other):
+    _populate(db, owner, other)
+    foreign_project = _project(db, other, "Foreign")
+    # Tarea del usuario en un proyecto ajeno y comentario suyo en una tarea ajena
+    _task(db, owner, "In foreign project", project_id=foreign_project)
+    kept = _task(db, other, "Kept", project_id=foreign_project)
+    _comment(db, owner, kept, "Comentario propio")
+    owner_id = owner.id
+
+    assert crud.delete_user(db, owner_id)
+
+    assert db.get(models.User, owner_id) is None
+    assert _count(db, models.Project, models.Project.owner_id == owner_id) == 0
+    assert set(db.scalars(select(models.Task.id))) == {kept}
+    assert _count(db, models.Comment) == 0
+    assert _count(db, models.TaskAssignment) == 0
+    assert _count(db, models.TaskTag) == 0
+    assert _indexed(db) == 1
+    assert get_project_stats(db, [foreign_project])[foreign_project]["total_tasks"] == 1
+
+
+def test_delete_user_does_not_load_dependants(db, engine, make_user):
+    counts = []
+    for tasks in (1, 10):
+        owner, other = make_user(), make_user()
+        _populate(db, owner, other, tasks=tasks)
+        owner_id = owner.id
+        db.expunge_all()
+        with count_statements(engine) as counter:
+            assert crud.delete_user(db, owner_id)
+        counts.append(counter.count)
+    assert counts[0] == counts[1]
+
+
+def test_delete_project_cascades(db, owner, other):
+    project_id = _populate(db, owner, other)
+    elsewhere = _task(db, owner, "No project")
+
+    assert crud.delete_project(db, project_id)
+
+    assert db.get(models.Project, project_id) is None
+    assert set(db.scalars(select(models.Task.id))) == {elsewhere}
+    assert _count(db, models.Comment) == 0
+    assert _count(db, models.TaskAssignment) == 0
+    assert _count(db, models.ProjectTaskCounter) == 0
+    assert _indexed(db) == 1
+
+
+def test_purge_project_in_chunks(db, owner, other):
+    project_id = _populate(db, owner, other)
+
+    assert crud.purge_project(db, project_id, chunk_size=2) == 6
+
+    assert db.get(models.Project, project_id) is None
+    assert _count(db, models.Task) == 0
+    assert _indexed(db) == 0
+
+
+def test_orm_delete_leaves_cascade_to_the_database(db, engine, owner, other):
+    _populate(db, owner, other)
+    user = db.get(models.User, owner.id)
+
+    with count_statements(engine) as counter:
+        db.delete(user)
+        db.commit()
+
+    # passive_deletes: no se cargan las colecciones para borrarlas una a una
+    assert not [s for s in counter.statements if s.lstrip().startswith("SELECT")]
+    assert _count(db, models.Task) == 0
+    assert _count(db, models.Comment) == 0
+
+
+def test_delete_missing(db):
+    assert not crud.delete_user(db, 12345)
+    assert not crud.delete_project(db, 12345)
@@ -0,0 +1,53 @@
+"""Hilo de comentarios en NDJSON (/comments/task/{task_id}/stream)"""
+import asyncio
+import json
+
+import pytest
+from sqlalchemy.orm import sessionmaker
+
+from app import crud, models
+from app.config import settings
+from app.routers import comments
+
+
+@pytest.fixture
+def thread(db, make_user):
+    """Tarea con 7 comentarios creados en el mismo segundo"""
+    author = make_user()
+    task = models.Task(title="Task", user_id=author.id)
+    db.add(task)
+    db.flush()
+    db.add_all([
+        models.Comment(task_id=task.id, author_id=author.id, content=f"Comment {n}")
+        for n in range(7)
+    ])
+    db.commit()
+    return author, task
+
+
+def test_stream_sends_every_batch_and_ends(engine, db, thread, monkeypatch):
+    author, task = thread
+    monkeypatch.setattr(comments, "SessionLocal", sessionmaker(bind=engine))
+    monkeypatch.setattr(settings, "COMMENT_STREAM_BATCH_SIZE", 3)
+
+    response = comments.stream_task_comments(task.id, current_user=author, db=db)
+
+    async def read_body():
+        return b"".join([chunk async for chunk in response.body_iterator])
+
+    body = asyncio.run(asyncio.wait_for(read_body(), timeout=10))
+    lines = [json.loads(line) for line in body.decode().splitlines()]
+    ids = [line["id"] for line in lines]
+    assert len(ids) == 7
+    assert len(set(ids)) == 7
+
+
+def test_iteration_stops_if_cursor_does_not_advance(db, thread, monkeypatch):
+    _, task = thread
+    batch = crud.get_comments_by_task(db, task.id, limit=3)
+    # Una consulta que siempre devuelve el mismo lote completo
+    monkeypatch.setattr(crud, "get_comments_by_task", lambda *args, **kwargs: batch)
+
+    batches = list(crud.iter_comments_by_task(db, task.id, batch_size=3))
+
+    assert len(batches) == 2
@@ -0,0 +1,91 @@
+"""Totales de listados: modos de conteo y caché"""
+import pytest
+
+from app import crud, models, schemas
+from app.counts import CountCache, CountMode
+
+
+@pytest.fixture
+def cache(monkeypatch):
+    cache = CountCache(ttl_seconds=60)
+    monkeypatch.setattr(crud, "task_count_cache", cache)
+    return cache
+
+
+@pytest.fixture
+def owners(db, make_user):
+    owners = [make_user(), make_user()]
+    for owner, count in zip(owners, (3, 2)):
+        db.add_all([models.Task(title=f"Task {n}", user_id=owner.id) for n in range(count)])
+    db.add(models.Task(title="Done", user_id=owners[0].id, status=models.Status.COMPLETED))
+    db.commit()
+    return owners
+
+
+def _add_silently(db, owner):
+    """Inserta sin pasar por crud: la caché no se entera"""
+    db.add(models.Task(title="Silent", user_id=owner.id))
+    db.commit()
+
+
+@pytest.mark.parametrize("mode", list(CountMode))
+def test_modes_agree_on_fresh_data(db, cache, owners, mode):
+    owner = owners[0]
+    assert crud.count_tasks(db, mode, user_id=owner.id) == 4
+    assert crud.count_tasks(db, mode, user_id=owner.id, status=models.Status.COMPLETED) == 1
+    # Sin PostgreSQL no hay estimación: se cuenta de forma exacta
+    assert crud.count_tasks(db, mode) == 6
+
+
+def test_cached_count_is_reused_until_a_write(db, cache, owners):
+    owner = owners[0]
+    assert crud.count_tasks(db, CountMode.CACHED, user_id=owner.id) == 4
+    _add_silently(db, owner)
+    assert crud.count_tasks(db, CountMode.CACHED, user_id=owner.id) == 4
+    assert crud.count_tasks(db, CountMode.EXACT, user_id=owner.id) == 5
+
+    crud.create_task(db, schemas.TaskCreate(title="New"), user_id=owner.id)
+    assert crud.count_tasks(db, CountMode.CACHED, user_id=owner.id) == 6
+    assert (cache.hits, cache.misses) == (1, 2)
+
+
+def test_invalidation_is_scoped_to_the_writer(db, cache, owners):
+    writer, other = owners
+    for user_id in (writer.id, other.id, None):
+        crud.count_tasks(db, CountMode.CACHED, user_id=user_id)
+    _add_silently(db, other)
+
+    crud.create_task(db, schemas.TaskCreate(title="New"), user_id=writer.id)
+
+    assert crud.count_tasks(db, CountMode.CACHED, user_id=writer.id) == 5
+    # Los conteos de otros usuarios siguen en caché (aunque estén desfasados)
+    assert crud.count_tasks(db, CountMode.CACHED, user_id=other.id) == 2
+    # Los que no filtran por usuario incluyen al que escribió
+    assert crud.count_tasks(db, CountMode.CACHED) == 8
+
+
+def test_global_invalidation(db, cache, owners):
+    owner = owners[0]
+    crud.count_tasks(db, CountMode.CACHED, user_id=owner.id)
+    _add_silently(db, owner)
+    cache.invalidate()
+    assert crud.count_tasks(db, CountMode.CACHED, user_id=owner.id) == 5
+
+
+def test_count_started_before_a_write_is_not_stored():
+    cache = CountCache()
+    generation = cache.generation(1)
+    cache.invalidate(1)
+    cache.set((1,), 10, generation)
+    assert cache.get((1,)) is None
+
+
+def test_ttl_and_size_limits():
+    cache = CountCache(ttl_seconds=0)
+    cache.set((1,), 10, cache.generation(1))
+    assert cache.get((1,)) is None
+
+    cache = CountCache(max_size=2)
+    for user_id in (1, 2, 3):
+        cache.set((user_id,), user_id, cache.generation(user_id))
+    assert [cache.get((user_id,)) for user_id in (1, 2, 3)] == [None, 2, 3]
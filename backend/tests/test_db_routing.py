@@ -0,0 +1,152 @@
+"""RoutingSession con dos bases de datos: primario y réplica"""
+import time
+
+import pytest
+from sqlalchemy import create_engine, select
+from sqlalchemy.orm import sessionmaker
+
+from app import db_routing, models
+from app.database import Base
+from app.db_routing import LocalStickyStore, RedisStickyStore, RoutingSession
+
+PRIMARY_EMAIL = "primary@example.com"
+REPLICA_EMAIL = "replica@example.com"
+
+
+@pytest.fixture
+def databases(tmp_path):
+    """Cada base de datos con un usuario distinto para saber de dónde se lee"""
+    primary = create_engine(f"sqlite:///{tmp_path / 'primary.db'}")
+    replica = create_engine(f"sqlite:///{tmp_path / 'replica.db'}")
+    for engine, email in ((primary, PRIMARY_EMAIL), (replica, REPLICA_EMAIL)):
+        Base.metadata.create_all(bind=engine)
+        with sessionmaker(bind=engine)() as session:
+            session.add(models.User(email=email, username=email.split("@")[0], hashed_password="x"))
+            session.commit()
+    yield primary, replica
+    primary.dispose()
+    replica.dispose()
+
+
+@pytest.fixture
+def sticky_store(monkeypatch):
+    store = LocalStickyStore()
+    monkeypatch.setattr(db_routing, "_sticky_store", store)
+    return store
+
+
+@pytest.fixture
+def make_session(databases, sticky_store):
+    primary, replica = databases
+    factory = sessionmaker(
+        class_=RoutingSession, primary=primary, replicas=[replica], sticky_seconds=60
+    )
+
+    def make_session(use_replica=True, user_id=None):
+        session = factory()
+        session.info["use_replica"] = use_replica
+        if user_id is not None:
+            session.info["user_id"] = user_id
+        return session
+    return make_session
+
+
+def _emails(session):
+    return set(session.scalars(select(models.User.email)))
+
+
+def _emails_in(engine):
+    with engine.connect() as connection:
+        return set(connection.scalars(select(models.User.email)))
+
+
+def test_reads_go_to_replica_only_when_marked(make_session):
+    with make_session(use_replica=True) as session:
+        assert _emails(session) == {REPLICA_EMAIL}
+    with make_session(use_replica=False) as session:
+        assert _emails(session) == {PRIMARY_EMAIL}
+
+
+def test_writes_go_to_primary(databases, make_session):
+    primary, replica = databases
+    with make_session() as session:
+        session.add(models.User(email="new@example.com", username="new", hashed_password="x"))
+        session.flush()
+        # Tras escribir, la propia sesión lee del primario
+        assert _emails(session) == {PRIMARY_EMAIL, "new@example.com"}
+        session.commit()
+
+    assert "new@example.com" in _emails_in(primary)
+    assert "new@example.com" not in _emails_in(replica)
+
+
+def test_user_reads_primary_after_commit(make_session):
+    with make_session(user_id=1) as session:
+        session.add(models.User(email="new@example.com", username="new", hashed_password="x"))
+        session.commit()
+
+    # Siguiente petición del mismo usuario: ve su escritura
+    with make_session(user_id=1) as session:
+        assert "new@example.com" in _emails(session)
+    # Otros usuarios siguen leyendo de la réplica
+    with make_session(user_id=2) as session:
+        assert _emails(session) == {REPLICA_EMAIL}
+
+
+def test_sticky_window_expires(make_session, sticky_store):
+    sticky_store.mark(1, 0.01)
+    time.sleep(0.02)
+    with make_session(user_id=1) as session:
+        assert _emails(session) == {REPLICA_EMAIL}
+
+
+def test_read_only_commit_does_not_pin_user(make_session):
+    with make_session(user_id=1) as session:
+        _emails(session)
+        session.commit()
+    with make_session(user_id=1) as session:
+        assert _emails(session) == {REPLICA_EMAIL}
+
+
+class FakeRedis:
+    """Lo mínimo de redis.Redis que usa RedisStickyStore"""
+
+    def __init__(self):
+        self.keys = {}
+
+    def set(self, key, value, px):
+        self.keys[key] = time.monotonic() + px / 1000
+
+    def exists(self, key):
+        return int(self.keys.get(key, 0) > time.monotonic())
+
+
+class BrokenRedis:
+    def set(self, *args, **kwargs):
+        raise ConnectionError("redis down")
+
+    exists = set
+
+
+def test_redis_store_is_shared_between_workers(make_session, monkeypatch):
+    client = FakeRedis()
+    # Dos workers: cada uno con su almacén, los dos sobre el mismo Redis
+    writer, reader = RedisStickyStore(client=client), RedisStickyStore(client=client)
+
+    monkeypatch.setattr(db_routing, "_sticky_store", writer)
+    with make_session(user_id=1) as session:
+        session.add(models.User(email="new@example.com", username="new", hashed_password="x"))
+        session.commit()
+
+    monkeypatch.setattr(db_routing, "_sticky_store", reader)
+    with make_session(user_id=1) as session:
+        assert "new@example.com" in _emails(session)
+
+
+def test_redis_errors_fall_back_to_primary(make_session, monkeypatch):
+    monkeypatch.setattr(db_routing, "_sticky_store", RedisStickyStore(client=BrokenRedis()))
+    with make_session(user_id=1) as session:
+        session.add(models.User(email="new@example.com", username="new", hashed_password="x"))
+        session.commit()
+    with make_session(user_id=1) as session:
+        assert _emails(session) == {PRIMARY_EMAIL, "new@example.com"}
@@ -0,0 +1,70 @@
+"""Paginación por cursor (created_at, id)"""
+from datetime import datetime
+
+from app import crud, models
+from app.pagination import next_cursor
+
+
+def _all_pages(fetch, limit):
+    """Recorre las páginas siguiendo el cursor; falla si no termina"""
+    pages, cursor = [], None
+    for _ in range(100):
+        page = fetch(cursor)
+        pages.append([item.id for item in page])
+        cursor = next_cursor(page, limit)
+        if cursor is None:
+            return pages
+    raise AssertionError(f"Pagination did not end: {pages[:5]}...")
+
+
+def test_task_cursor_with_shared_timestamp(db, make_user):
+    owner = make_user()
+    # Mismo segundo para todas (CURRENT_TIMESTAMP dentro de una transacción)
+    db.add_all([models.Task(title=f"Task {n}", user_id=owner.id) for n in range(7)])
+    db.commit()
+
+    pages = _all_pages(
+        lambda cursor: crud.get_tasks(db, user_id=owner.id, limit=2, cursor=cursor), limit=2
+    )
+
+    ids = [task_id for page in pages for task_id in page]
+    assert len(ids) == 7
+    assert len(set(ids)) == 7
+    assert ids == sorted(ids, reverse=True)
+
+
+def test_task_cursor_mixes_stored_formats(db, make_user):
+    owner = make_user()
+    # Fechas con y sin fracción de segundo (parámetro vs. CURRENT_TIMESTAMP)
+    db.add_all([models.Task(title=f"Task {n}", user_id=owner.id) for n in range(3)])
+    db.add_all([
+        models.Task(title="Exact second", user_id=owner.id, created_at=datetime(2020, 1, 1, 12, 0, 0)),
+        models.Task(title="Fraction", user_id=owner.id, created_at=datetime(2020, 1, 1, 12, 0, 0, 500)),
+        models.Task(title="Same second", user_id=owner.id, created_at=datetime(2020, 1, 1, 12, 0, 0)),
+    ])
+    db.commit()
+
+    pages = _all_pages(
+        lambda cursor: crud.get_tasks(db, user_id=owner.id, limit=2, cursor=cursor), limit=2
+    )
+
+    ids = [task_id for page in pages for task_id in page]
+    assert sorted(ids) == sorted(set(ids))
+    assert len(ids) == 6
+
+
+def test_offset_pages_use_cursor_order(db, make_user):
+    users = [make_user() for _ in range(5)]
+    db.add_all([
+        models.Project(name=f"Project {n}", slug=f"project-{n}", owner_id=users[0].id)
+        for n in range(5)
+    ])
+    db.commit()
+
+    for fetch in (crud.get_users, crud.get_projects):
+        offset_ids = [item.id for skip in (0, 2, 4) for item in fetch(db, skip=skip, limit=2)]
+        cursor_ids = [
+            item_id for page in _all_pages(lambda cursor: fetch(db, limit=2, cursor=cursor), limit=2)
+            for item_id in page
+        ]
+        assert offset_ids == cursor_ids == sorted(offset_ids, reverse=True)
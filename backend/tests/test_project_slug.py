@@ -0,0 +1,58 @@
+"""Slugs de proyecto: colisiones y sufijos"""
+import pytest
+
+from app import crud, models, schemas
+
+
+@pytest.fixture
+def owner(make_user):
+    return make_user()
+
+
+@pytest.fixture
+def create(db, owner):
+    def create(name):
+        return crud.create_project(db, schemas.ProjectCreate(name=name), owner_id=owner.id).slug
+    return create
+
+
+def test_collisions_get_next_suffix(create):
+    assert [create("Marketing") for _ in range(3)] == ["marketing", "marketing-1", "marketing-2"]
+
+
+def test_names_ending_in_a_number_are_not_suffixes(create):
+    assert create("Marketing 2024") == "marketing-2024"
+    assert create("Marketing Team") == "marketing-team"
+    assert create("Marketing") == "marketing"
+    assert create("Marketing") == "marketing-1"
+    assert create("Marketing 2024") == "marketing-2024-1"
+
+
+def test_suffix_taken_by_a_name_skips_past_it(create):
+    assert create("Marketing") == "marketing"
+    assert create("Marketing 1") == "marketing-1"
+    assert create("Marketing") == "marketing-2"
+
+
+def test_retry_after_concurrent_insert(db, owner, create, monkeypatch):
+    create("Marketing")
+    # Un nombre sin guardar de la misma sesión sobrevive a los SAVEPOINT
+    pending = models.Project(name="Pending", slug="pending", owner_id=owner.id)
+    db.add(pending)
+
+    calls = []
+    next_free_slug = crud._next_free_slug
+
+    def racing_next_free_slug(db, base_slug):
+        # Otra petición se queda con el sufijo libre entre la consulta y el INSERT
+        slug = next_free_slug(db, base_slug)
+        if not calls:
+            db.add(models.Project(name="Marketing", slug=slug, owner_id=owner.id))
+            db.flush()
+        calls.append(slug)
+        return slug
+
+    monkeypatch.setattr(crud, "_next_free_slug", racing_next_free_slug)
+    assert create("Marketing") == "marketing-2"
+    assert calls == ["marketing-1", "marketing-2"]
+    assert db.query(models.Project).filter_by(slug="pending").count() == 1
@@ -0,0 +1,76 @@
+"""GET /tasks/{task_id}: control de acceso y número de consultas"""
+import asyncio
+import pytest
+from fastapi import HTTPException
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+from app import models, schemas
+from app.routers.tasks import read_task
+from app.testing import assert_max_statements
+
+# Tarea con propietario y proyecto (JOIN) + asignados (selectin)
+READ_TASK_STATEMENTS = 2
+
+
+@pytest.fixture
+def async_engine(engine, database_path):
+    """Engine async (el del endpoint) sobre la misma base de datos"""
+    async_engine = create_async_engine(f"sqlite+aiosqlite:///{database_path}")
+    yield async_engine
+    asyncio.run(async_engine.dispose())
+
+
+def _read_task(async_engine, task_id, current_user):
+    """Llama al endpoint y serializa la respuesta (dentro de la sesión async)"""
+    async def run():
+        async with AsyncSession(async_engine, expire_on_commit=False) as session:
+            task = await read_task(task_id, current_user=current_user, db=session)
+            return schemas.TaskWithDetails.model_validate(task)
+    return asyncio.run(run())
+
+
+@pytest.fixture
+def users(db):
+    owner = models.User(email="owner@example.com", username="owner", hashed_password="x")
+    assignee = models.User(email="assignee@example.com", username="assignee", hashed_password="x")
+    stranger = models.User(email="stranger@example.com", username="stranger", hashed_password="x")
+    admin = models.User(
+        email="admin@example.com", username="admin", hashed_password="x", is_superuser=True
+    )
+    db.add_all([owner, assignee, stranger, admin])
+    db.commit()
+    return {"owner": owner, "assignee": assignee, "stranger": stranger, "admin": admin}
+
+
+@pytest.fixture
+def task(db, users):
+    project = models.Project(name="Project", slug="project", owner_id=users["owner"].id)
+    db.add(project)
+    db.flush()
+    task = models.Task(title="Task", user_id=users["owner"].id, project_id=project.id)
+    db.add(task)
+    db.flush()
+    db.add(models.TaskAssignment(task_id=task.id, user_id=users["assignee"].id))
+    db.commit()
+    return task
+
+
+@pytest.mark.parametrize("role", ["owner", "assignee", "admin"])
+def test_read_task_statement_count(async_engine, db, users, task, role):
+    task_id, assignee_id = task.id, users["assignee"].id
+    # Usuario ya cargado, como tras get_current_user
+    current_user = db.get(models.User, users[role].id)
+
+    # Se serializa dentro del bloque: cualquier lazy load contaría
+    with assert_max_statements(async_engine.sync_engine, READ_TASK_STATEMENTS):
+        result = _read_task(async_engine, task_id, current_user)
+
+    assert result.id == task_id
+    assert [assignee.id for assignee in result.assignees] == [assignee_id]
+
+
+def test_read_task_hidden_from_other_users(async_engine, db, users, task):
+    current_user = db.get(models.User, users["stranger"].id)
+    with pytest.raises(HTTPException) as error:
+        _read_task(async_engine, task.id, current_user)
+    assert error.value.status_code == 404
@@ -0,0 +1,97 @@
+"""Búsqueda de texto completo (FTS5 en SQLite)"""
+import pytest
+from sqlalchemy import text
+
+from app import crud, models, schemas, search
+
+
+@pytest.fixture
+def owner(make_user):
+    return make_user()
+
+
+@pytest.fixture
+def create_task(db, owner):
+    def create_task(title, description=None, user_id=None):
+        return crud.create_task(
+            db, schemas.TaskCreate(title=title, description=description), user_id=user_id or owner.id
+        ).id
+    return create_task
+
+
+def _search(db, query, **kwargs):
+    return [(hit["entity_type"], hit["task_id"]) for hit in crud.search_tasks(db, query, **kwargs)]
+
+
+def test_title_ranks_above_description(db, create_task):
+    in_description = create_task("Sprint notes", "Revisar el presupuesto")
+    in_title = create_task("Presupuesto anual", "Cifras de 2025")
+    create_task("Unrelated")
+
+    assert _search(db, "presupuesto") == [("task", in_title), ("task", in_description)]
+
+
+def test_prefix_and_diacritics(db, create_task):
+    task_id = create_task("Diseño de la portada")
+
+    for query in ("dise", "diseno", "DISEÑO", "portada dise"):
+        assert _search(db, query) == [("task", task_id)]
+
+
+def test_all_terms_must_match(db, create_task):
+    both = create_task("Deploy backend")
+    create_task("Deploy frontend")
+
+    assert _search(db, "deploy backend") == [("task", both)]
+
+
+def test_comments_point_to_their_task(db, owner, create_task):
+    task_id = create_task("Release")
+    comment = crud.create_comment(db, schemas.CommentCreate(content="Falta el changelog", task_id=task_id), owner.id)
+
+    assert _search(db, "changelog") == [("comment", task_id)]
+
+    crud.delete_comment(db, comment.id)
+    assert _search(db, "changelog") == []
+
+
+def test_index_follows_updates_and_deletes(db, create_task):
+    task_id = create_task("Borrador")
+
+    crud.update_task(db, task_id, schemas.TaskUpdate(title="Definitivo"))
+    assert _search(db, "borrador") == []
+    assert _search(db, "definitivo") == [("task", task_id)]
+
+    crud.delete_task(db, task_id)
+    assert _search(db, "definitivo") == []
+
+
+def test_scoped_to_own_and_assigned_tasks(db, owner, make_user, create_task):
+    other = make_user()
+    own = create_task("Informe propio")
+    assigned = create_task("Informe asignado", user_id=other.id)
+    create_task("Informe ajeno", user_id=other.id)
+    db.add(models.TaskAssignment(task_id=assigned, user_id=owner.id))
+    db.commit()
+
+    assert {task_id for _, task_id in _search(db, "informe", user_id=owner.id)} == {own, assigned}
+    assert len(_search(db, "informe")) == 3
+
+
+@pytest.mark.parametrize("query, found", [
+    ("", False), ("***", False), ('"', False), ('"and" OR (not', True), ("and-or*not", True),
+])
+def test_query_syntax_is_not_passed_through(db, create_task, query, found):
+    task_id = create_task("And or not")
+    # Sólo palabras: los operadores y comillas de FTS5 no llegan al MATCH
+    assert _search(db, query) == ([("task", task_id)] if found else [])
+
+
+def test_rebuild_index(db, create_task):
+    task_id = create_task("Reconstruir")
+    db.execute(text(f"DELETE FROM {search.SEARCH_TABLE}"))
+    db.commit()
+    assert _search(db, "reconstruir") == []
+
+    search.rebuild_index(db)
+    assert _search(db, "reconstruir") == [("task", task_id)]
@@ -0,0 +1,86 @@
+"""Filtros por etiqueta: tags_any y tags_all"""
+import pytest
+
+from app import crud, schemas
+from app.counts import CountMode
+
+
+@pytest.fixture
+def owner(make_user):
+    return make_user()
+
+
+@pytest.fixture
+def tasks(db, owner):
+    """Tareas por nombre con sus etiquetas (JSON, salvo el formato antiguo)"""
+    tags = {
+        "bug": '["bug"]',
+        "frontend_bug": '["Frontend", " BUG "]',
+        "frontend": '["frontend", "frontend"]',
+        "legacy": "backend, bug",
+        "untagged": None,
+    }
+    return {
+        name: crud.create_task(db, schemas.TaskCreate(title=name, tags=value), user_id=owner.id).id
+        for name, value in tags.items()
+    }
+
+
+def _filter(db, owner, **filters):
+    ids = {task.id for task in crud.get_tasks(db, user_id=owner.id, **filters)}
+    assert crud.count_tasks(db, CountMode.EXACT, user_id=owner.id, **filters) == len(ids)
+    return ids
+
+
+def _ids(tasks, *names):
+    return {tasks[name] for name in names}
+
+
+def test_tags_any(db, owner, tasks):
+    assert _filter(db, owner, tags_any=["bug"]) == _ids(tasks, "bug", "frontend_bug", "legacy")
+    assert _filter(db, owner, tags_any=["frontend", "backend"]) == _ids(
+        tasks, "frontend_bug", "frontend", "legacy"
+    )
+
+
+def test_tags_all(db, owner, tasks):
+    assert _filter(db, owner, tags_all=["bug", "frontend"]) == _ids(tasks, "frontend_bug")
+    # Una etiqueta repetida (o con otra grafía) no exige dos coincidencias
+    assert _filter(db, owner, tags_all=["frontend", "FRONTEND "]) == _ids(
+        tasks, "frontend_bug", "frontend"
+    )
+
+
+def test_tags_any_and_all_together(db, owner, tasks):
+    assert _filter(db, owner, tags_any=["backend", "frontend"], tags_all=["bug"]) == _ids(
+        tasks, "frontend_bug", "legacy"
+    )
+
+
+def test_unknown_tags_match_nothing(db, owner, tasks):
+    assert _filter(db, owner, tags_any=["missing"]) == set()
+    assert _filter(db, owner, tags_all=["bug", "missing"]) == set()
+
+
+def test_filters_follow_tag_updates(db, owner, tasks):
+    crud.update_task(db, tasks["bug"], schemas.TaskUpdate(tags='["frontend"]'))
+    crud.update_task(db, tasks["untagged"], schemas.TaskUpdate(tags='["bug"]'))
+
+    assert _filter(db, owner, tags_any=["bug"]) == _ids(tasks, "frontend_bug", "legacy", "untagged")
+    assert _filter(db, owner, tags_all=["frontend"]) == _ids(tasks, "bug", "frontend_bug", "frontend")
+
+
+def test_filters_are_scoped_to_the_user(db, owner, make_user, tasks):
+    other = make_user()
+    crud.create_task(db, schemas.TaskCreate(title="other", tags='["bug"]'), user_id=other.id)
+
+    assert _filter(db, owner, tags_any=["bug"]) == _ids(tasks, "bug", "frontend_bug", "legacy")
+
+
+def test_tag_cloud(db, owner, tasks):
+    cloud = crud.get_task_tag_cloud(db, user_id=owner.id)
+    assert cloud == [
+        {"name": "bug", "count": 3},
+        {"name": "frontend", "count": 2},
+        {"name": "backend", "count": 1},
+    ]